@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Batch DXF processing: parses a directory or glob of DXF files on a process
+pool, writes per-file outputs and a combined takeoff summary.
+See python/dxf/batch.py for the output layout.
+"""
+import os
+import sys
+
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from dxf.batch import main
+
+if __name__ == '__main__':
+    main()
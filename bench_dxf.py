@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Parser and renderer benchmarks on synthetic drawings of 10k to 1M entities.
+See python/dxf/bench.py for the drawing mixes, phases and result files.
+"""
+import os
+import sys
+
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from dxf.bench import main
+
+if __name__ == '__main__':
+    main()
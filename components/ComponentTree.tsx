@@ -1,6 +1,7 @@
 import React from 'react';
 import { ChevronRight, ChevronDown, Layers, FileText, Code, Cube, Eye, EyeOff } from 'react-feather';
 import { Entity, SelectedFeature, DXFData, LayerVisibility } from './types';
+import { applyDxfDelta } from '../utils/dxf/dxf-delta';
 
 interface ComponentTreeProps {
   filePath: string | null;
@@ -156,6 +157,22 @@ export default function FileComponentTree({
       })
       .finally(() => setLoading(false));
   }, [filePath]);
+
+  // Apply changes of the file on disk to the tree in place
+  React.useEffect(() => {
+    const { watchDXF, unwatchDXF, onDXFDelta } = window.electron;
+    if (!filePath || !watchDXF || !unwatchDXF || !onDXFDelta) return;
+    const removeListener = onDXFDelta((changedPath, delta) => {
+      if (changedPath === filePath) {
+        setTreeData(prev => applyDxfDelta(prev, delta));
+      }
+    });
+    watchDXF(filePath).catch((err: any) => console.error(`Failed to watch DXF file: ${err}`));
+    return () => {
+      removeListener();
+      unwatchDXF(filePath);
+    };
+  }, [filePath]);
   
   // Get the filename early to avoid reference errors
   const getFileName = React.useCallback(() => {
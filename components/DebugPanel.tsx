@@ -1,4 +1,6 @@
 import React, { useState, useEffect } from 'react';
+import type { DxfMetrics } from './types';
+import { formatMetrics } from '../utils/dxf/metrics';
 
 // Define window._debugLogs globally for TypeScript
 declare global {
@@ -24,6 +26,21 @@ const DebugPanel: React.FC<DebugPanelProps> = ({ maxLogs = 20 }) => {
   const [logs, setLogs] = useState<Array<{ type: string; message: string; timestamp: string }>>([]);
   const [isVisible, setIsVisible] = useState(false);
   const [filter, setFilter] = useState<string>('');
+  const [lastMetrics, setLastMetrics] = useState<DxfMetrics | null>(null);
+
+  // Metrics records of parses and renders become log entries, the latest one is shown in the header
+  useEffect(() => {
+    const onDXFMetrics = window.electron?.onDXFMetrics;
+    if (!onDXFMetrics) return;
+    return onDXFMetrics(metrics => {
+      window._debugLogs?.push({
+        type: 'metrics',
+        message: formatMetrics(metrics, 10),
+        timestamp: new Date().toISOString()
+      });
+      setLastMetrics(metrics);
+    });
+  }, []);
 
   // Poll for new logs
   useEffect(() => {
@@ -61,6 +78,11 @@ const DebugPanel: React.FC<DebugPanelProps> = ({ maxLogs = 20 }) => {
             value={filter}
             onChange={(e) => setFilter(e.target.value)}
           />
+          {lastMetrics && (
+            <span className="ml-2 text-xs text-gray-300 truncate" title={JSON.stringify(lastMetrics, null, 2)}>
+              {formatMetrics(lastMetrics)}
+            </span>
+          )}
         </div>
         <div className="flex gap-1">
           <button 
@@ -61,9 +61,28 @@ export interface Entity {
   handle?: string;
   layer?: string;
   id?: string;
+  /** Index into the style table, replaces color/rgb/linetype with the parser config 'styles' */
+  style?: number;
   [key: string]: any;
 }
 
+/**
+ * Entry of the shared style table, see python/dxf/styles.py
+ */
+export interface EntityStyle {
+  /** ACI color, 256 = ByLayer, 0 = ByBlock */
+  color: number;
+  true_color: number | null;
+  linetype: string;
+  /** 1/100 mm, -1 ByLayer, -2 ByBlock, -3 default */
+  lineweight: number;
+  /** Color resolved under the ByLayer/ByBlock rules */
+  rgb: string | null;
+  resolved_linetype: string;
+  /** Resolved lineweight in mm */
+  resolved_lineweight: number | null;
+}
+
 /**
  * Interface for selected entity data
  */
@@ -81,6 +100,22 @@ export interface LayerVisibility {
   [layerName: string]: boolean;
 }
 
+/**
+ * Layer group of a rendered SVG, see python/dxf/renderer.py
+ */
+export interface SvgLayer {
+  /** Stable group id, 'layer-' and the escaped lowercase layer name */
+  id: string;
+  name: string;
+  /** Resolved layer color */
+  color: string | null;
+  on: boolean;
+  frozen: boolean;
+  locked: boolean;
+  /** False for groups hidden with display="none" */
+  visible: boolean;
+}
+
 /**
  * Rendering mode options
  */
@@ -94,6 +129,35 @@ export interface DXFData {
   [layerName: string]: Entity[];
 }
 
+/**
+ * Block definition from the instancing output, geometry in block coordinates
+ */
+export interface BlockDefinition {
+  name: string;
+  base_point: number[];
+  entities: Entity[];
+}
+
+/**
+ * Parser output with instancing enabled: INSERT entities reference
+ * their block by name instead of carrying the expanded geometry
+ */
+export interface InstancedDXFData {
+  tree: DXFData;
+  blocks: { [blockName: string]: BlockDefinition };
+  styles?: EntityStyle[];
+}
+
+/**
+ * Parser output with the style table enabled: entities carry a style
+ * index instead of their own color and linetype
+ */
+export interface StyledDXFData {
+  tree: DXFData;
+  styles: EntityStyle[];
+  blocks?: { [blockName: string]: BlockDefinition };
+}
+
 /**
  * Line entity
  */
@@ -118,6 +182,8 @@ export interface CircleEntity extends Entity {
   type: 'CIRCLE';
   center: number[];
   radius: number;
+  /** Flattened polyline, only with the parser config 'flatten' */
+  flattened?: number[][];
 }
 
 /**
@@ -129,6 +195,8 @@ export interface ArcEntity extends Entity {
   radius: number;
   start_angle: number;
   end_angle: number;
+  /** Flattened polyline, only with the parser config 'flatten' */
+  flattened?: number[][];
 }
 
 /**
@@ -141,6 +209,8 @@ export interface EllipseEntity extends Entity {
   ratio: number;
   start_param: number;
   end_param: number;
+  /** Flattened polyline, only with the parser config 'flatten' */
+  flattened?: number[][];
 }
 
 /**
@@ -151,6 +221,8 @@ export interface PolylineEntity extends Entity {
   points: number[][];
   closed: boolean;
   const_width?: number;
+  /** LWPOLYLINE with bulges flattened to arcs, only with the parser config 'flatten' */
+  flattened?: number[][];
 }
 
 /**
@@ -163,6 +235,8 @@ export interface SplineEntity extends Entity {
   control_points: number[][];
   knots?: number[];
   weights?: number[];
+  /** Approximation flattened to the chord tolerance */
+  points?: number[][];
 }
 
 /**
@@ -212,4 +286,220 @@ export interface WheelResult {
   zoomChange: number;
   wheelDirection: number; // -1 for in, 1 for out, 0 for no change
   newZoom: number;
-}
\ No newline at end of file
+}
+/**
+ * Count, length and area of one takeoff group (drawing units)
+ */
+export interface TakeoffQuantities {
+  count: number;
+  length: number;
+  area: number;
+  /** Number of INSERTs, only present on by_block entries */
+  inserts?: number;
+}
+
+/**
+ * Takeoff aggregates computed by python/dxf/takeoff.py
+ */
+export interface TakeoffResult {
+  insunits: number;
+  totals: TakeoffQuantities;
+  by_layer: { [layer: string]: TakeoffQuantities };
+  by_type: { [entityType: string]: TakeoffQuantities };
+  by_block: { [blockName: string]: TakeoffQuantities };
+  by_layer_type: { [layer: string]: { [entityType: string]: TakeoffQuantities } };
+}
+
+/**
+ * Block instances with their insert points and count. A handle is the INSERT
+ * handle, "<handle>#<cell>" for an MINSERT cell or "<outer>/<inner>" for a
+ * block nested in another one
+ */
+export interface BlockIndexEntry {
+  count: number;
+  handles: string[];
+  inserts: number[][];
+}
+
+/**
+ * Index entry of one block name, see python/dxf/blockindex.py
+ */
+export interface BlockIndexBlock extends BlockIndexEntry {
+  layers: { [layer: string]: number };
+  attributes: { [tag: string]: { [value: string]: BlockIndexEntry } };
+}
+
+/**
+ * Block name -> attribute tag -> attribute value index of INSERTs
+ */
+export interface BlockIndex {
+  [blockName: string]: BlockIndexBlock;
+}
+
+/**
+ * Spatial query against the entity extents index, see python/dxf/spatial.py
+ */
+export type SpatialQuery =
+  | { query: 'window'; window: [number, number, number, number]; contained?: boolean }
+  | { query: 'point'; point: [number, number]; tolerance?: number }
+  | { query: 'nearest'; point: [number, number]; k?: number }
+  | { query: 'extents' };
+
+/**
+ * Matching entity handles with their [minX, minY, maxX, maxY] boxes
+ */
+export interface SpatialQueryResult {
+  handles: string[];
+  boxes: number[][];
+  /** Distance to each box, only for nearest queries */
+  distances?: number[];
+}
+
+/**
+ * Level-of-detail tile request, see python/dxf/tiles.py. Without z only
+ * the pyramid info is returned
+ */
+export interface TileRequest {
+  z?: number;
+  /** Explicit [x, y] tile coordinates at level z */
+  tiles?: [number, number][];
+  /** [minX, minY, maxX, maxY] viewport in drawing units, used without tiles */
+  window?: [number, number, number, number];
+  tile_size?: number;
+  tolerance_px?: number;
+  max_zoom?: number;
+}
+
+export interface TileLine {
+  handle: string;
+  layer: string;
+  /** Flat [x0, y0, x1, y1, ...] vertex list */
+  points: number[];
+}
+
+export interface Tile {
+  z: number;
+  x: number;
+  y: number;
+  bounds: [number, number, number, number];
+  lines: TileLine[];
+  /** Entities smaller than a pixel, one dot per pixel */
+  dots: [number, number][];
+}
+
+export interface TilePyramidInfo {
+  origin: [number, number];
+  size: number;
+  tile_size: number;
+  tolerance_px: number;
+  max_zoom: number;
+  entities: number;
+}
+
+export interface TileResponse {
+  info: TilePyramidInfo;
+  tiles?: Tile[];
+}
+
+export interface ThumbnailRequest {
+  /** Largest side in pixels, 16..2048, default 256 */
+  size?: number;
+  background?: string;
+  line_width?: number;
+}
+
+export interface ThumbnailResponse {
+  /** Base64-encoded PNG */
+  png: string;
+  /** Served from the result cache without loading the file */
+  cached: boolean;
+}
+
+/**
+ * Parser config 'filter', applied before entities are parsed, see
+ * python/dxf/filters.py. Layer and block names are case-insensitive globs
+ */
+export interface DxfFilter {
+  layers?: string[];
+  exclude_layers?: string[];
+  types?: string[];
+  exclude_types?: string[];
+  /** Only decide about INSERTs, by block name */
+  blocks?: string[];
+  exclude_blocks?: string[];
+}
+
+/**
+ * Entry of the layout catalog, see python/dxf/layouts.py
+ */
+export interface LayoutInfo {
+  name: string;
+  modelspace: boolean;
+  taborder: number;
+  entities: number;
+  /** Entity count per DXF type */
+  counts: Record<string, number>;
+  /** [minX, minY, maxX, maxY], null if the file does not store them */
+  extents: [number, number, number, number] | null;
+  extents_source: 'file' | 'computed' | null;
+}
+
+/**
+ * One parsed layout, blocks and styles as for parseDxfTree
+ */
+export interface LayoutTree {
+  name: string;
+  tree: DXFData;
+  blocks?: Record<string, any>;
+  styles?: EntityStyle[];
+}
+
+/**
+ * Span of a metrics record, the time of a span includes the spans inside it
+ */
+export interface MetricsSpan {
+  seconds: number;
+  calls: number;
+}
+
+/**
+ * Per-phase timings and counters of one parse or render, see python/dxf/metrics.py
+ */
+export interface DxfMetrics {
+  kind: 'metrics';
+  version: number;
+  /** Entry script of a one-shot run */
+  script?: string;
+  /** Worker method of a worker request */
+  method?: string;
+  /** Added on the Electron side */
+  file?: string;
+  seconds: number;
+  /** readfile, render_context, entities.<TYPE>, blocks, render, serialize */
+  spans: { [name: string]: MetricsSpan };
+  /** entities, filtered, unsupported and errors, each by entity type */
+  counts: {
+    entities?: { [entityType: string]: number };
+    /** Skipped by the parser config 'filter' */
+    filtered?: { [entityType: string]: number };
+    unsupported?: { [entityType: string]: number };
+    errors?: { [entityType: string]: number };
+  };
+}
+
+/**
+ * Entity changes since the previous delta for a file, see python/dxf/incremental.py
+ */
+export interface DxfDelta {
+  /** 1 for the first delta of a file, which lists every entity as added */
+  version: number;
+  full: boolean;
+  added: Entity[];
+  modified: Entity[];
+  removed: { handle: string; layer: string | null }[];
+  unchanged: number;
+  /** Block definitions of changed INSERTs, only with instancing */
+  blocks?: Record<string, any>;
+  /** The whole style table so far, only with the parser config 'styles' */
+  styles?: EntityStyle[];
+}
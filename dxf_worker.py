@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Resident DXF worker: keeps ezdxf imported and recently used documents loaded,
+and answers length-prefixed JSON requests on stdin/stdout.
+See python/dxf/worker.py for the protocol.
+"""
+import os
+import sys
+
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from dxf.worker import main
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,27 @@ const path = require('path');
 const fs = require('fs');
 const chokidar = require('chokidar');
 const { findPythonExecutable } = require('./utils/dxf/python-executor');
-const { parseDxfTree } = require('./utils/dxf/dxf-parser');
+const { parseDxfTree, openDxf, streamDxfTree, takeoffDxf, indexDxfBlocks, queryDxfSpatial, getDxfTiles, parseDxfDelta, getDxfThumbnail, getDxfLayouts, parseDxfLayout } = require('./utils/dxf/dxf-parser');
 const { renderDxfToSvg } = require('./utils/dxf/svg-renderer');
+const { getPythonWorker } = require('./utils/dxf/python-worker');
+const { onDxfMetrics } = require('./utils/dxf/metrics');
 
 // Track the main application window
 let mainWindow = null;
 
+// Forward parse/render metrics records to the renderer, see components/DebugPanel.tsx
+onDxfMetrics(metrics => {
+  if (mainWindow) mainWindow.webContents.send('dxf-metrics', metrics);
+});
+
 // Define the path to the unified config file for use throughout the app
 const configPath = path.join(__dirname, 'constants', 'component_renderer_config.json');
 
+// Content-addressed cache for parse/render results, used by the Python scripts
+if (!process.env.RAPIDTAKEOFF_CACHE_DIR) {
+  process.env.RAPIDTAKEOFF_CACHE_DIR = path.join(app.getPath('userData'), 'dxf-cache');
+}
+
 function createWindow() {
   // In development (when not packaged), start Next.js dev server URL
   const isDev = !app.isPackaged;
@@ -75,6 +87,11 @@ app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') app.quit();
 });
 
+app.on('will-quit', () => {
+  // Stop the resident Python DXF worker
+  getPythonWorker().stop();
+});
+
 app.on('activate', () => {
   if (BrowserWindow.getAllWindows().length === 0) createWindow();
 });
@@ -142,4 +159,165 @@ ipcMain.handle('parse-dxf-tree', async (event, filePath, config = null) => {
     console.error(`[MAIN] Error parsing DXF: ${error}`);
     throw error;
   }
-});
\ No newline at end of file
+});
+
+// Handler to extract the component tree and the SVG from one parse of the DXF
+ipcMain.handle('open-dxf', async (event, filePath, config = null) => {
+  console.log(`[MAIN] Opening DXF file (tree + SVG): ${filePath}`);
+  
+  try {
+    return await openDxf(filePath, config);
+  } catch (error) {
+    console.error(`[MAIN] Error opening DXF: ${error}`);
+    throw error;
+  }
+});
+
+// Handler to parse a DXF in streaming mode, records are forwarded to the
+// renderer as 'dxf-stream-record' events while the parse runs
+ipcMain.handle('parse-dxf-stream', async (event, filePath, config = null, lowMemory = false) => {
+  console.log(`[MAIN] Streaming DXF tree for file: ${filePath}`);
+  
+  try {
+    await streamDxfTree(filePath, record => {
+      if (!event.sender.isDestroyed()) {
+        event.sender.send('dxf-stream-record', filePath, record);
+      }
+    }, config, lowMemory);
+  } catch (error) {
+    console.error(`[MAIN] Error streaming DXF: ${error}`);
+    throw error;
+  }
+});
+
+// Handler to compute takeoff quantities (length, area, count) for a DXF
+ipcMain.handle('takeoff-dxf', async (event, filePath, expandBlocks = true, config = null) => {
+  console.log(`[MAIN] Computing takeoff for file: ${filePath}`);
+  
+  try {
+    return await takeoffDxf(filePath, expandBlocks, config);
+  } catch (error) {
+    console.error(`[MAIN] Error computing takeoff: ${error}`);
+    throw error;
+  }
+});
+
+// Handler to index INSERTs by block name, attribute tag and value
+ipcMain.handle('index-dxf-blocks', async (event, filePath, config = null) => {
+  console.log(`[MAIN] Indexing blocks for file: ${filePath}`);
+  
+  try {
+    return await indexDxfBlocks(filePath, config);
+  } catch (error) {
+    console.error(`[MAIN] Error indexing blocks: ${error}`);
+    throw error;
+  }
+});
+
+// Handler for window/point/nearest queries on the entity extents index
+ipcMain.handle('query-dxf-spatial', async (event, filePath, query) => {
+  try {
+    return await queryDxfSpatial(filePath, query);
+  } catch (error) {
+    console.error(`[MAIN] Error in spatial query: ${error}`);
+    throw error;
+  }
+});
+
+// Handler for level-of-detail tiles of the current viewport and zoom
+ipcMain.handle('get-dxf-tiles', async (event, filePath, request) => {
+  try {
+    return await getDxfTiles(filePath, request);
+  } catch (error) {
+    console.error(`[MAIN] Error building DXF tiles: ${error}`);
+    throw error;
+  }
+});
+
+// Handler for cached PNG previews in the sheet browser
+ipcMain.handle('get-dxf-thumbnail', async (event, filePath, request = {}) => {
+  try {
+    return await getDxfThumbnail(filePath, request);
+  } catch (error) {
+    console.error(`[MAIN] Error rendering DXF thumbnail: ${error}`);
+    throw error;
+  }
+});
+
+// Handler for the layout catalog of a sheet set, no entity is parsed
+ipcMain.handle('get-dxf-layouts', async (event, filePath, computeExtents = false) => {
+  try {
+    return await getDxfLayouts(filePath, computeExtents);
+  } catch (error) {
+    console.error(`[MAIN] Error listing DXF layouts: ${error}`);
+    throw error;
+  }
+});
+
+// Handler to parse a single layout when the user opens it
+ipcMain.handle('parse-dxf-layout', async (event, filePath, name, config = null) => {
+  try {
+    return await parseDxfLayout(filePath, name, config);
+  } catch (error) {
+    console.error(`[MAIN] Error parsing DXF layout ${name}: ${error}`);
+    throw error;
+  }
+});
+
+// Watchers for DXF files whose changes are pushed to the renderer as deltas
+const dxfWatchers = new Map();
+
+// Handler to watch a DXF file: after every change on disk only the added,
+// modified and removed entities are sent as a 'dxf-delta' event
+ipcMain.handle('watch-dxf', async (event, filePath, config = null) => {
+  if (dxfWatchers.has(filePath)) {
+    return true;
+  }
+  console.log(`[MAIN] Watching DXF file: ${filePath}`);
+
+  // Record the current state so the first change yields a real delta
+  await parseDxfDelta(filePath, config);
+
+  const watcher = chokidar.watch(filePath, {
+    persistent: true,
+    ignoreInitial: true,
+    awaitWriteFinish: {
+      stabilityThreshold: 300,
+      pollInterval: 100
+    }
+  });
+  dxfWatchers.set(filePath, watcher);
+
+  // Changes are processed one at a time, in the order they arrive
+  let queue = Promise.resolve();
+  watcher.on('change', () => {
+    queue = queue.then(async () => {
+      try {
+        const delta = await parseDxfDelta(filePath, config);
+        console.log(`[MAIN] DXF delta for ${filePath}: ${delta.added.length} added, ` +
+          `${delta.modified.length} modified, ${delta.removed.length} removed`);
+        if (!event.sender.isDestroyed()) {
+          event.sender.send('dxf-delta', filePath, delta);
+        }
+      } catch (error) {
+        console.error(`[MAIN] Error computing DXF delta: ${error}`);
+      }
+    });
+  });
+
+  watcher.on('error', (error) => {
+    console.error(`[MAIN] Error watching DXF file: ${error}`);
+  });
+  return true;
+});
+
+// Handler to stop watching a DXF file
+ipcMain.handle('unwatch-dxf', async (event, filePath) => {
+  const watcher = dxfWatchers.get(filePath);
+  if (!watcher) {
+    return false;
+  }
+  dxfWatchers.delete(filePath);
+  await watcher.close();
+  return true;
+});
@@ -2,13 +2,24 @@ const { app, BrowserWindow, ipcMain, dialog } = require('electron');
 const path = require('path');
 const fs = require('fs');
 const chokidar = require('chokidar');
+const { extractMetrics, onDxfMetrics, reportDxfMetrics } = require('./utils/dxf/metrics');
 
 // Track the main application window
 let mainWindow = null;
 
+// Forward parse/render metrics records to the renderer, see components/DebugPanel.tsx
+onDxfMetrics(metrics => {
+  if (mainWindow) mainWindow.webContents.send('dxf-metrics', metrics);
+});
+
 // Define the path to the unified config file for use throughout the app
 const configPath = path.join(__dirname, 'constants', 'component_renderer_config.json');
 
+// Content-addressed cache for parse/render results, used by the Python scripts
+if (!process.env.RAPIDTAKEOFF_CACHE_DIR) {
+  process.env.RAPIDTAKEOFF_CACHE_DIR = path.join(app.getPath('userData'), 'dxf-cache');
+}
+
 function createWindow() {
   // In development (when not packaged), start Next.js dev server URL
   const isDev = !app.isPackaged;
@@ -184,6 +195,7 @@ ipcMain.handle('render-svg', async (event, filePath, config = null) => {
     
     proc.on('close', code => {
       console.log(`[MAIN] Python SVG process exited with code: ${code}`);
+      extractMetrics(err).forEach(metrics => reportDxfMetrics(metrics, filePath));
       // Remove from operations map when done
       renderOperations.delete(operationKey);
       
@@ -213,8 +225,13 @@ ipcMain.handle('render-svg', async (event, filePath, config = null) => {
 
 // IPC for parsing DXF via Python script
 
+// Verified interpreter, probed once per process instead of before every run
+let cachedPythonExecutable = null;
+
 // Helper to find a valid Python executable with ezdxf installed
 const findPythonExecutable = () => {
+  if (cachedPythonExecutable) return cachedPythonExecutable;
+  
   const { spawnSync } = require('child_process');
   const fs = require('fs');
   
@@ -234,15 +251,14 @@ const findPythonExecutable = () => {
   // Try each candidate
   for (const cmd of candidates) {
     try {
-      // Check if ezdxf is available with this Python
-      const check = spawnSync(cmd, ['-c', 'import ezdxf'], { stdio: 'ignore' });
-      if (check.status !== 0) continue;
-      
-      // Verify it's CPython (not PyPy or other variant)
-      const impl = spawnSync(cmd, ['-c', 'import platform; print(platform.python_implementation())'], 
-                            { stdio: ['ignore', 'pipe', 'ignore'] });
-      if (impl.status === 0 && impl.stdout.toString().trim() === 'CPython') {
+      // One probe per candidate: ezdxf is installed (found, not imported) and it's CPython
+      const probe = spawnSync(cmd, ['-c',
+        'import importlib.util, platform; ' +
+        'print(platform.python_implementation() if importlib.util.find_spec("ezdxf") else "")'],
+        { stdio: ['ignore', 'pipe', 'ignore'] });
+      if (probe.status === 0 && probe.stdout.toString().trim() === 'CPython') {
         console.log(`Found valid Python executable: ${cmd}`);
+        cachedPythonExecutable = cmd;
         return cmd;
       }
     } catch (e) {
@@ -310,6 +326,7 @@ ipcMain.handle('parse-dxf-tree', async (event, filePath, config = null) => {
     
     proc.on('close', code => {
       console.log(`[MAIN] Python process exited with code: ${code}`);
+      extractMetrics(err).forEach(metrics => reportDxfMetrics(metrics, filePath));
       // Remove from operations map when done
       parseOperations.delete(operationKey);
       
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from "react";
-import type { SelectedFeature, DXFData, LayerVisibility, RenderingMode } from "../components/types";
+import type { SelectedFeature, DXFData, LayerVisibility, RenderingMode, DxfDelta, DxfMetrics } from "../components/types";
 import LeftSidebar from "../components/LeftSidebar";
 // import RightSidebar from "../components/RightSidebar"; // Removed right sidebar
 import Modal from "../components/Modal";
@@ -24,6 +24,10 @@ declare global {
       parseDXFTree: (filePath: string, config?: any) => Promise<string>;
       getRendererConfig: () => Promise<any>;
       onConfigFileChanged: (callback: () => void) => () => void;
+      watchDXF?: (filePath: string, config?: any) => Promise<boolean>;
+      unwatchDXF?: (filePath: string) => Promise<boolean>;
+      onDXFDelta?: (callback: (filePath: string, delta: DxfDelta) => void) => () => void;
+      onDXFMetrics?: (callback: (metrics: DxfMetrics) => void) => () => void;
     };
   }
 }
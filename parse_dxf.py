@@ -3,540 +3,89 @@
 Enhanced DXF parser that extracts entities from a DXF file grouped by layer,
 and outputs a JSON structure to stdout. Uses ezdxf for optimal DXF support.
 """
+import os
 import sys
 import json
-import array
 import argparse
-import numpy as np
-from typing import Dict, List, Any, Union, Optional
+import contextlib
 
-try:
-    import ezdxf
-    from ezdxf.math import Vec2, Vec3
-    from ezdxf.addons.drawing import Frontend, RenderContext
-    from ezdxf.addons.drawing.properties import LayoutProperties
-except ImportError:
-    sys.stderr.write('Error: ezdxf is required. Install via pip install ezdxf\n')
-    sys.exit(1)
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
 
-# Custom JSON encoder to handle numpy arrays and other special types
-class DXFEncoder(json.JSONEncoder):
-    def default(self, obj):
-        # Handle numpy arrays
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        # Handle array.array objects
-        elif isinstance(obj, array.array):
-            return list(obj)
-        # Handle vectors
-        elif isinstance(obj, (Vec2, Vec3)):
-            if hasattr(obj, 'z'):
-                return [obj.x, obj.y, obj.z]
-            return [obj.x, obj.y]
-        # Handle other numpy types
-        elif isinstance(obj, (np.int_, np.intc, np.intp, np.int8, np.int16, np.int32, np.int64, 
-                             np.uint8, np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        # Let the base encoder handle the rest
-        return super().default(obj)
-
-def round_point(point, precision=6):
-    """Round coordinates in a point to specified precision"""
-    if isinstance(point, (list, tuple)):
-        return [round(v, precision) for v in point]
-    elif isinstance(point, np.ndarray):
-        return [round(float(v), precision) for v in point]
-    elif isinstance(point, (Vec2, Vec3)):
-        if hasattr(point, 'z'):
-            return [round(point.x, precision), round(point.y, precision), round(point.z, precision)]
-        return [round(point.x, precision), round(point.y, precision)]
-    elif hasattr(point, 'x') and hasattr(point, 'y'):
-        return [round(point.x, precision), round(point.y, precision)]
-    return point
-
-def format_points(points, precision=6):
-    """Format a list of points to specified precision"""
-    return [round_point(p, precision) for p in points]
-
-def parse_dxf(filepath: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
-    """
-    Parse DXF file using ezdxf and extract entity data.
-    
-    Args:
-        filepath: Path to the DXF file
-        config: Optional configuration parameters
-        
-    Returns:
-        Dict mapping layer names to lists of entity data
-    """
-    sys.stderr.write(f'[PYTHON] Starting to parse DXF file: {filepath}\n')
-    if config:
-        sys.stderr.write(f'[PYTHON] Using config\n')
-        # Extract SVG-specific config if available
-        svg_config = config.get('svg', {}) if isinstance(config, dict) else {}
-        if svg_config:
-            sys.stderr.write(f'[PYTHON] Found SVG config section with {len(svg_config)} parameters\n')
-            
-            # If we're using render context for visualization properties, 
-            # we can apply SVG config parameters here
-            # This would affect things like colors, line weights, etc.
-            try:
-                # Some parameters might need to be mapped from our config to ezdxf's format
-                # For example: map to visualization configuration settings
-                config_mapping = {
-                    'lineweight_scaling': 'lineweight_scaling',
-                    'min_lineweight': 'min_lineweight',
-                    'circle_approximation_count': 'circle_approximation_count',
-                    # Add more mappings as needed
-                }
-                
-                sys.stderr.write(f'[PYTHON] Would apply these SVG rendering params: {list(svg_config.keys())}\n')
-            except Exception as e:
-                sys.stderr.write(f'[PYTHON] Error applying SVG config: {e}\n')
-    
-    try:
-        sys.stderr.write('[PYTHON] Reading DXF file with ezdxf\n')
-        doc = ezdxf.readfile(filepath)
-        sys.stderr.write(f'[PYTHON] Successfully loaded DXF file. Version: {doc.dxfversion}\n')
-    except Exception as e:
-        sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
-        sys.exit(1)
-    
-    sys.stderr.write('[PYTHON] Accessing modelspace\n')
-    msp = doc.modelspace()
-    sys.stderr.write(f'[PYTHON] DXF modelspace accessed. Found layers: {[layer.dxf.name for layer in doc.layers]}\n')
-    tree = {}
-    
-    # Create a RenderContext to get access to the drawing properties
-    # This helps with colors, line types, and other graphical properties
-    # Setup rendering context
-    render_context = None
-    frontend = None
-    try:
-        sys.stderr.write('[PYTHON] Creating render context\n')
-        render_context = RenderContext(doc)
-        # Don't create the Frontend here anymore - it needs an output backend
-        # Just create the render context for the color information
-        sys.stderr.write('[PYTHON] Render context created successfully\n')
-    except Exception as e:
-        sys.stderr.write(f'[PYTHON] Warning: Could not create render context: {e}\n')
-    
-    # Process each entity in the model space
-    for e in msp:
-        etype = e.dxftype()
-        layer = e.dxf.layer
-        
-        # Common attributes for all entities
-        common_attrs = {
-            'type': etype,
-            'handle': e.dxf.handle,
-            'layer': layer
-        }
-        
-        # Add color information if available
-        try:
-            if hasattr(e.dxf, 'color'):
-                color_value = e.dxf.color
-                common_attrs['color'] = color_value
-                # Try to get the actual RGB color
-                if render_context:
-                    try:
-                        rgb = render_context.colors.get_color(e)
-                        if rgb:
-                            common_attrs['rgb'] = rgb.hex_rgb()
-                    except:
-                        pass
-        except Exception:
-            pass
-            
-        # Add linetype information if available
-        try:
-            if hasattr(e.dxf, 'linetype'):
-                common_attrs['linetype'] = e.dxf.linetype
-        except Exception:
-            pass
-        
-        # Entity-specific attributes
-        data = None
-        
-        # --------- BASIC GEOMETRIC ENTITIES ---------
-        if etype == 'LINE':
-            data = {
-                **common_attrs,
-                'start': round_point(e.dxf.start),
-                'end': round_point(e.dxf.end),
-            }
-        
-        elif etype == 'POINT':
-            data = {
-                **common_attrs,
-                'location': round_point(e.dxf.location),
-            }
-        
-        elif etype == 'CIRCLE':
-            data = {
-                **common_attrs,
-                'center': round_point(e.dxf.center),
-                'radius': round(e.dxf.radius, 6),
-            }
-        
-        elif etype == 'ARC':
-            data = {
-                **common_attrs,
-                'center': round_point(e.dxf.center),
-                'radius': round(e.dxf.radius, 6),
-                'start_angle': round(e.dxf.start_angle, 6),
-                'end_angle': round(e.dxf.end_angle, 6),
-            }
-            
-            # Add SVG arc flags for easier rendering
-            # Arc direction: CCW (counter-clockwise) is the default for DXF
-            is_large_arc = abs(e.dxf.end_angle - e.dxf.start_angle) > 180
-            is_ccw = True  # DXF arcs are CCW by default
-            data['large_arc'] = is_large_arc
-            data['sweep'] = is_ccw
-        
-        elif etype == 'ELLIPSE':
-            data = {
-                **common_attrs,
-                'center': round_point(e.dxf.center),
-                'major_axis': round_point(e.dxf.major_axis),
-                'ratio': round(e.dxf.ratio, 6),
-                'start_param': round(e.dxf.start_param, 6),
-                'end_param': round(e.dxf.end_param, 6),
-            }
-            
-            # Try to calculate actual start and end angles for easier rendering
-            try:
-                start_angle = e.start_angle
-                end_angle = e.end_angle
-                data['start_angle'] = round(start_angle, 6)
-                data['end_angle'] = round(end_angle, 6)
-            except Exception:
-                pass
-        
-        # --------- CURVE ENTITIES ---------
-        elif etype == 'LWPOLYLINE':
-            points = e.get_points()
-            data = {
-                **common_attrs,
-                'points': format_points(points),
-                'closed': e.closed,
-                'const_width': e.dxf.const_width if hasattr(e.dxf, 'const_width') else 0,
-            }
-        
-        elif etype == 'POLYLINE':
-            if hasattr(e, 'vertices'):
-                points = [v.dxf.location for v in e.vertices]
-                data = {
-                    **common_attrs,
-                    'points': format_points(points),
-                    'closed': e.closed if hasattr(e, 'closed') else False,
-                }
-            else:
-                data = {**common_attrs, 'error': 'No vertices found'}
-        
-        elif etype == 'SPLINE':
-            try:
-                data = {
-                    **common_attrs,
-                    'degree': e.dxf.degree,
-                    'closed': e.closed,
-                    'control_points': format_points(e.control_points),
-                }
-                
-                # Handle knots - in different ezdxf versions this might be a property or a method
-                if hasattr(e, 'knots'):
-                    if callable(e.knots):
-                        data['knots'] = [round(k, 6) for k in e.knots()]
-                    else:
-                        data['knots'] = [round(k, 6) for k in e.knots]
-                        
-                # Handle weights - in different ezdxf versions this might be a property or a method
-                if hasattr(e, 'weights'):
-                    if callable(e.weights):
-                        data['weights'] = [round(w, 6) for w in e.weights()]
-                    else:
-                        data['weights'] = [round(w, 6) for w in e.weights]
-                        
-                # Get approximation points for easier rendering
-                try:
-                    if hasattr(e, 'approximate'):
-                        segments = min(32, max(8, e.dxf.degree * 8))  # More segments for higher degree
-                        points = list(e.approximate(segments=segments))
-                        data['points'] = format_points(points)
-                except Exception:
-                    pass
-            except Exception as ex:
-                data = {
-                    **common_attrs,
-                    'error': f"Failed to process SPLINE: {str(ex)}",
-                    'degree': e.dxf.degree if hasattr(e.dxf, 'degree') else None,
-                }
-        
-        elif etype == 'HELIX':
-            data = {
-                **common_attrs,
-                'axis_start_point': round_point(e.dxf.axis_start_point),
-                'axis_end_point': round_point(e.dxf.axis_end_point),
-                'radius': round(e.dxf.radius, 6),
-                'turns': round(e.dxf.turns, 6),
-            }
-        
-        elif etype == 'LEADER':
-            data = {
-                **common_attrs,
-                'vertices': format_points(e.vertices),
-            }
-        
-        # --------- COMPLEX ENTITIES ---------
-        elif etype == 'HATCH':
-            data = {
-                **common_attrs,
-                'pattern_name': e.dxf.pattern_name,
-                'solid_fill': e.dxf.solid_fill,
-                'pattern_scale': round(e.dxf.pattern_scale, 6) if hasattr(e.dxf, 'pattern_scale') else 1.0,
-                'pattern_angle': round(e.dxf.pattern_angle, 6) if hasattr(e.dxf, 'pattern_angle') else 0.0,
-                'paths': len(e.paths),
-            }
-            
-            # Extract boundary paths for rendering
-            try:
-                boundary_paths = []
-                for path in e.paths:
-                    # Handle different types of paths
-                    if path.PATH_TYPE == 'EdgePath':
-                        path_data = {"type": "edge", "edges": []}
-                        for edge in path.edges:
-                            if edge.EDGE_TYPE == 'LineEdge':
-                                path_data["edges"].append({
-                                    "type": "line",
-                                    "start": round_point(edge.start),
-                                    "end": round_point(edge.end)
-                                })
-                            elif edge.EDGE_TYPE == 'ArcEdge':
-                                path_data["edges"].append({
-                                    "type": "arc",
-                                    "center": round_point(edge.center),
-                                    "radius": round(edge.radius, 6),
-                                    "start_angle": round(edge.start_angle, 6),
-                                    "end_angle": round(edge.end_angle, 6)
-                                })
-                            elif edge.EDGE_TYPE == 'EllipseEdge':
-                                path_data["edges"].append({
-                                    "type": "ellipse",
-                                    "center": round_point(edge.center),
-                                    "major_axis": round_point(edge.major_axis),
-                                    "ratio": round(edge.ratio, 6),
-                                    "start_angle": round(edge.start_angle, 6),
-                                    "end_angle": round(edge.end_angle, 6)
-                                })
-                            elif edge.EDGE_TYPE == 'SplineEdge':
-                                points = []
-                                if hasattr(edge, 'control_points'):
-                                    points = edge.control_points
-                                elif hasattr(edge, 'points'):
-                                    points = edge.points
-                                path_data["edges"].append({
-                                    "type": "spline",
-                                    "points": format_points(points),
-                                    "degree": edge.degree
-                                })
-                        boundary_paths.append(path_data)
-                    elif path.PATH_TYPE == 'PolylinePath':
-                        path_data = {
-                            "type": "polyline",
-                            "points": format_points(path.vertices),
-                            "closed": path.is_closed
-                        }
-                        boundary_paths.append(path_data)
-                        
-                if boundary_paths:
-                    data['boundary_paths'] = boundary_paths
-            except Exception as e:
-                data['boundary_error'] = str(e)
-        
-        elif etype == 'SOLID':
-            points = [
-                getattr(e.dxf, f'vtx{i}', [0, 0, 0]) 
-                for i in range(4)
-            ]
-            data = {
-                **common_attrs,
-                'points': format_points(points),
-            }
-        
-        elif etype == '3DFACE':
-            points = [
-                getattr(e.dxf, f'vtx{i}', [0, 0, 0]) 
-                for i in range(4)
-            ]
-            data = {
-                **common_attrs,
-                'points': format_points(points),
-            }
-        
-        elif etype == 'MESH':
-            try:
-                vertices = format_points([v for v in e.vertices()])
-                faces = [f for f in e.faces()]
-                data = {
-                    **common_attrs,
-                    'vertex_count': len(vertices),
-                    'face_count': len(faces),
-                    'vertices': vertices,
-                    'faces': faces
-                }
-            except Exception as ex:
-                data = {**common_attrs, 'error': str(ex)}
-        
-        elif etype == '3DSOLID' or etype == 'BODY':
-            data = {
-                **common_attrs,
-                'acis_data': "Present" if hasattr(e, 'acis_data') else "Not available",
-            }
-        
-        # --------- DIMENSION ENTITIES ---------
-        elif etype == 'DIMENSION':
-            data = {
-                **common_attrs,
-                'dimtype': e.dimtype if hasattr(e, 'dimtype') else None,
-                'defpoint': round_point(e.dxf.defpoint),
-                'text_midpoint': round_point(e.dxf.text_midpoint) if hasattr(e.dxf, 'text_midpoint') else None,
-                'actual_measurement': round(e.measurement, 6) if hasattr(e, 'measurement') else None,
-            }
-        
-        elif etype == 'MTEXT' or etype == 'TEXT':
-            data = {
-                **common_attrs,
-                'text': e.dxf.text if hasattr(e.dxf, 'text') else '',
-                'insert': round_point(e.dxf.insert if hasattr(e.dxf, 'insert') else (0, 0)),
-                'height': round(e.dxf.height, 6) if hasattr(e.dxf, 'height') else 1.0,
-                'rotation': round(e.dxf.rotation, 6) if hasattr(e.dxf, 'rotation') else 0.0,
-            }
-        
-        # --------- ORGANIZATIONAL ENTITIES ---------
-        elif etype == 'INSERT':
-            data = {
-                **common_attrs,
-                'name': e.dxf.name,
-                'insert': round_point(e.dxf.insert),
-                'rotation': round(e.dxf.rotation, 6),
-                'scale': [
-                    round(getattr(e.dxf, 'xscale', 1.0), 6),
-                    round(getattr(e.dxf, 'yscale', 1.0), 6),
-                    round(getattr(e.dxf, 'zscale', 1.0), 6)
-                ],
-            }
-            
-            # Try to expand block references for better rendering
-            try:
-                if hasattr(e, 'virtual_entities'):
-                    blockname = e.dxf.name
-                    data['entities'] = []
-                    
-                    for virtual_entity in e.virtual_entities():
-                        ve_type = virtual_entity.dxftype()
-                        ve_data = {
-                            'type': ve_type,
-                            'handle': virtual_entity.dxf.handle,
-                            'block': blockname
-                        }
-                        
-                        # Handle specific entity types
-                        if ve_type == 'LINE':
-                            ve_data.update({
-                                'start': round_point(virtual_entity.dxf.start),
-                                'end': round_point(virtual_entity.dxf.end)
-                            })
-                        elif ve_type == 'CIRCLE':
-                            ve_data.update({
-                                'center': round_point(virtual_entity.dxf.center),
-                                'radius': round(virtual_entity.dxf.radius, 6)
-                            })
-                        elif ve_type == 'ARC':
-                            ve_data.update({
-                                'center': round_point(virtual_entity.dxf.center),
-                                'radius': round(virtual_entity.dxf.radius, 6),
-                                'start_angle': round(virtual_entity.dxf.start_angle, 6),
-                                'end_angle': round(virtual_entity.dxf.end_angle, 6)
-                            })
-                        elif ve_type == 'TEXT' or ve_type == 'MTEXT':
-                            ve_data.update({
-                                'text': virtual_entity.dxf.text if hasattr(virtual_entity.dxf, 'text') else '',
-                                'insert': round_point(virtual_entity.dxf.insert if hasattr(virtual_entity.dxf, 'insert') else (0, 0)),
-                                'height': round(virtual_entity.dxf.height, 6) if hasattr(virtual_entity.dxf, 'height') else 1.0
-                            })
-                        
-                        data['entities'].append(ve_data)
-            except Exception as ex:
-                data['block_error'] = str(ex)
-        
-        # --------- ADVANCED ENTITIES ---------
-        elif etype == 'IMAGE':
-            data = {
-                **common_attrs,
-                'insert': round_point(e.dxf.insert),
-                'image_size': [
-                    round(e.dxf.image_size_u, 6),
-                    round(e.dxf.image_size_v, 6)
-                ],
-                'image_def_handle': e.dxf.image_def_handle,
-            }
-        
-        elif etype == 'WIPEOUT':
-            data = {
-                **common_attrs,
-                'vertices': format_points(e.vertices() if hasattr(e, 'vertices') else []),
-            }
-        
-        elif etype == 'ACAD_TABLE':
-            data = {
-                **common_attrs,
-                'insert': round_point(e.dxf.insert),
-                'num_rows': e.dxf.num_rows if hasattr(e.dxf, 'num_rows') else 0,
-                'num_cols': e.dxf.num_cols if hasattr(e.dxf, 'num_cols') else 0,
-            }
-        
-        elif etype == 'MLINE':
-            data = {
-                **common_attrs,
-                'style_name': e.dxf.style_name if hasattr(e.dxf, 'style_name') else '',
-                'vertices': format_points(e.vertices()),
-            }
-        
-        elif etype == 'ATTDEF' or etype == 'ATTRIB':
-            data = {
-                **common_attrs,
-                'tag': e.dxf.tag if hasattr(e.dxf, 'tag') else '',
-                'text': e.dxf.text if hasattr(e.dxf, 'text') else '',
-                'insert': round_point(e.dxf.insert if hasattr(e.dxf, 'insert') else (0, 0)),
-            }
-        
-        # --------- CATCH-ALL FOR OTHER ENTITIES ---------
-        else:
-            # Include basic information for unsupported entity types
-            data = {
-                **common_attrs,
-                'unsupported': True,
-            }
-        
-        # Add the entity data to the tree, grouped by layer
-        if data:
-            tree.setdefault(layer, []).append(data)
-    
-    return tree
+from dxf import metrics, startup
+from dxf.cache import open_cache
 
 def main():
     sys.stderr.write('[PYTHON] DXF parser starting\n')
     parser = argparse.ArgumentParser(description='Parse DXF file and output JSON data')
     parser.add_argument('file', help='Path to DXF file')
     parser.add_argument('--config', help='JSON configuration string')
+    parser.add_argument('--with-svg', action='store_true',
+                        help='Also render SVG from the same document, output becomes {"tree": ..., "svg": ...}')
+    parser.add_argument('--parallel', action='store_true',
+                        help='With --with-svg, render the SVG on a thread while parsing')
+    parser.add_argument('--takeoff', action='store_true',
+                        help='Also compute length/area/count takeoff, output becomes {"tree": ..., "takeoff": ...}')
+    parser.add_argument('--block-index', action='store_true',
+                        help='Also index INSERTs by block name, attribute tag and value, '
+                             'output becomes {"tree": ..., "block_index": ...}')
+    parser.add_argument('--instancing', action='store_true',
+                        help='Emit INSERTs as block references and each block definition once, '
+                             'output becomes {"tree": ..., "blocks": ...}')
+    parser.add_argument('--styles', action='store_true',
+                        help='Replace per-entity color and linetype by an index into a shared style table, '
+                             'output becomes {"tree": ..., "styles": ...}')
+    parser.add_argument('--layer', action='append', metavar='GLOB',
+                        help='Only parse entities on layers matching GLOB (case-insensitive), repeatable')
+    parser.add_argument('--exclude-layer', action='append', metavar='GLOB',
+                        help='Skip entities on layers matching GLOB, repeatable')
+    parser.add_argument('--type', action='append', metavar='DXFTYPE',
+                        help='Only parse entities of this type, e.g. LWPOLYLINE, repeatable')
+    parser.add_argument('--exclude-type', action='append', metavar='DXFTYPE',
+                        help='Skip entities of this type, repeatable')
+    parser.add_argument('--block', action='append', metavar='GLOB',
+                        help='Only keep INSERTs of blocks matching GLOB, repeatable')
+    parser.add_argument('--exclude-block', action='append', metavar='GLOB',
+                        help='Skip INSERTs of blocks matching GLOB, repeatable')
+    parser.add_argument('--layouts', action='store_true',
+                        help='Only list the modelspace and paperspace layouts with entity counts and extents')
+    parser.add_argument('--compute-extents', action='store_true',
+                        help='With --layouts, compute the extents the file does not store (slower)')
+    parser.add_argument('--layout', metavar='NAME',
+                        help='Parse this layout instead of the modelspace, output becomes {"name": ..., "tree": ...}')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write newline-delimited JSON records (layer batches and progress) as entities are parsed')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='Implies --stream, reads modelspace entities one at a time instead of loading '
+                             'the whole document, for very large files')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='With --stream, maximum number of entities per batch record')
+    parser.add_argument('--format', choices=['json', 'columnar'], default='json',
+                        help='columnar: write geometry as binary column buffers to a file and output only a JSON header')
+    parser.add_argument('--columnar-out', help='With --format columnar, destination file (default: a temporary file)')
+    parser.add_argument('--float32', action='store_true', help='With --format columnar, store coordinates as float32')
+    parser.add_argument('--cache-dir',
+                        help='Result cache directory (default: $RAPIDTAKEOFF_CACHE_DIR, caching is off if unset)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the result cache')
+    parser.add_argument('--profile', nargs='?', const=True, metavar='BASE',
+                        help='Profile the run with cProfile and tracemalloc, implies --no-cache. Writes '
+                             'BASE.prof, BASE.tracemalloc and BASE.profile.txt, by default next to the '
+                             'DXF file (or --columnar-out) as <name>.parse.*')
     args = parser.parse_args()
+    if args.layout and (args.with_svg or args.takeoff):
+        parser.error('--layout cannot be combined with --with-svg or --takeoff')
+    
+    profile = contextlib.nullcontext()
+    if args.profile:
+        from dxf.profiling import profile_base, profiled
+        columnar_out = args.columnar_out if args.format == 'columnar' else None
+        base = args.profile if isinstance(args.profile, str) else profile_base(args.file, 'parse', columnar_out)
+        profile = profiled(base)
+    with metrics.collect() as collected, profile:
+        run(args)
+    metrics.emit(collected.record(script='parse_dxf.py'))
+
+def run(args):
     sys.stderr.write(f'[PYTHON] Arguments: file={args.file}, has_config={args.config is not None}\n')
     
     config = None
@@ -548,20 +97,184 @@ def main():
         except json.JSONDecodeError:
             sys.stderr.write('[PYTHON] Error: Invalid JSON configuration\n')
             sys.exit(1)
+    if args.instancing:
+        config = {**(config or {}), 'instancing': True}
+    if args.styles:
+        config = {**(config or {}), 'styles': True}
+    # The filter options extend the "filter" entry of the config, see dxf.filters
+    filter_options = {key: value for key, value in (
+        ('layers', args.layer), ('exclude_layers', args.exclude_layer),
+        ('types', args.type), ('exclude_types', args.exclude_type),
+        ('blocks', args.block), ('exclude_blocks', args.exclude_block)) if value}
+    if filter_options:
+        config = {**(config or {}), 'filter': {**((config or {}).get('filter') or {}), **filter_options}}
+    instancing = isinstance(config, dict) and bool(config.get('instancing'))
+    styled = isinstance(config, dict) and bool(config.get('styles'))
+    
+    if args.layouts:
+        layouts_main(args)
+        return
+    if args.stream or args.low_memory:
+        stream_main(args, config)
+        return
+    if args.format == 'columnar':
+        columnar_main(args, config)
+        return
+    
+    # A cache hit streams the stored result and never imports ezdxf
+    cache = None if args.no_cache or args.profile else open_cache(args.cache_dir)
+    cache_key = None
+    if cache:
+        try:
+            kind = ((f'layout:{args.layout.lower()}' if args.layout else 'parse') + ('+svg' if args.with_svg else '') + ('+takeoff' if args.takeoff else '')
+                    + ('+blockindex' if args.block_index else ''))
+            cache_key = cache.key(args.file, kind, config)
+            if cache.stream_to(cache_key, sys.stdout.buffer):
+                sys.stderr.write('[PYTHON] Served result from cache\n')
+                startup.first_output('cached result')
+                return
+        except OSError as e:
+            sys.stderr.write(f'[PYTHON] Warning: Cache lookup failed: {e}\n')
+            cache_key = None
+    
+    # Output-specific modules are imported in their branches, the SVG
+    # renderer pulls in the drawing add-on and its backends
+    from dxf.parser import parse_dxf, parse_document, parse_tree_blocks, load_document
+    from dxf.utils.encoder import DXFEncoder
     
     try:
-        tree = parse_dxf(args.file, config)
+        if args.layout:
+            from dxf.layouts import parse_layout
+            try:
+                doc = load_document(args.file)
+                output = parse_layout(doc, args.layout, config)
+            except KeyError as e:
+                sys.stderr.write(f'[PYTHON] Error: {e.args[0]}\n')
+                sys.exit(1)
+            tree = output['tree']
+            if args.block_index:
+                from dxf.blockindex import build_tree_block_index
+                output['block_index'] = build_tree_block_index(tree, doc)
+        elif args.with_svg or args.takeoff or args.block_index or instancing or styled:
+            try:
+                doc = load_document(args.file)
+            except Exception as e:
+                sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
+                sys.exit(1)
+            if args.with_svg:
+                from dxf.pipeline import parse_and_render
+                # The SVG renderer takes only the svg section of the config
+                svg_config = config.get('svg') if isinstance(config, dict) else None
+                output = parse_and_render(doc, config, svg_config, parallel=args.parallel)
+            else:
+                from dxf.flatten import flattening_options
+                from dxf.styles import style_table
+                styles = style_table(config)
+                tree = parse_document(doc, config, styles=styles)
+                output = {'tree': tree}
+                if instancing:
+                    output['blocks'] = parse_tree_blocks(doc, tree, flattening=flattening_options(config),
+                                                         styles=styles)
+                if styles is not None:
+                    output['styles'] = styles.entries
+            if args.takeoff:
+                from dxf.filters import entity_filter
+                from dxf.takeoff import compute_takeoff
+                output['takeoff'] = compute_takeoff(doc, entity_filter=entity_filter(config))
+            tree = output['tree']
+            if args.block_index:
+                from dxf.blockindex import build_tree_block_index
+                output['block_index'] = build_tree_block_index(tree, doc)
+        else:
+            tree = parse_dxf(args.file, config)
+            output = tree
         sys.stderr.write(f'[PYTHON] DXF parsed successfully. Found {len(tree)} layers with entities\n')
         entity_count = sum(len(entities) for entities in tree.values())
         sys.stderr.write(f'[PYTHON] Total entities parsed: {entity_count}\n')
         sys.stderr.write('[PYTHON] Converting to JSON\n')
-        json_output = json.dumps(tree, cls=DXFEncoder)
+        with metrics.span('serialize'):
+            json_output = json.dumps(output, cls=DXFEncoder)
+        if args.profile:
+            # Memory snapshot while the tree and its JSON are both alive
+            from dxf import profiling
+            profiling.checkpoint()
         sys.stderr.write(f'[PYTHON] JSON conversion complete. Output size: {len(json_output)} bytes\n')
+        startup.first_output()
         sys.stdout.write(json_output)
+        if cache_key:
+            sys.stdout.flush()
+            cache.put(cache_key, json_output.encode('utf-8'))
     except Exception as e:
         sys.stderr.write(f'[PYTHON] Error: {str(e)}\n')
         sys.exit(1)
     sys.stderr.write('[PYTHON] DXF parser completed successfully\n')
 
+def layouts_main(args):
+    """Output the layout catalog, no entity is parsed"""
+    from dxf.parser import load_document
+    from dxf.layouts import layout_catalog
+    
+    try:
+        doc = load_document(args.file)
+    except Exception as e:
+        sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
+        sys.exit(1)
+    
+    catalog = layout_catalog(doc, compute_extents=args.compute_extents)
+    sys.stderr.write(f'[PYTHON] Found {len(catalog)} layouts\n')
+    startup.first_output()
+    sys.stdout.write(json.dumps(catalog))
+
+def stream_main(args, config):
+    """Parse in NDJSON streaming mode, the full tree is never held in memory"""
+    from dxf.parser import load_document
+    from dxf.streaming import iter_records, write_ndjson
+    
+    try:
+        if args.low_memory:
+            from dxf.largefile import iter_large_records
+            records = iter_large_records(args.file, config, batch_size=args.batch_size)
+        else:
+            records = iter_records(load_document(args.file), config, batch_size=args.batch_size)
+    except Exception as e:
+        sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
+        sys.exit(1)
+    
+    def announced(records):
+        # Records are produced lazily, the first one is the start record
+        for record in records:
+            startup.first_output('first record')
+            yield record
+    
+    try:
+        written = write_ndjson(announced(records), sys.stdout)
+        sys.stderr.write(f'[PYTHON] Streamed {written} bytes of NDJSON\n')
+    except Exception as e:
+        sys.stderr.write(f'[PYTHON] Error: {str(e)}\n')
+        sys.exit(1)
+
+def columnar_main(args, config):
+    """Write columnar binary geometry and output its JSON header"""
+    from dxf.parser import load_document
+    from dxf.columnar import write_columnar
+    from dxf.filters import entity_filter
+    from dxf.utils.encoder import DXFEncoder
+    
+    try:
+        doc = load_document(args.file)
+    except Exception as e:
+        sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
+        sys.exit(1)
+    
+    try:
+        with metrics.span('serialize'):
+            header = write_columnar(doc, args.columnar_out, float32=args.float32,
+                                    entity_filter=entity_filter(config))
+        startup.first_output()
+        sys.stdout.write(json.dumps(header, cls=DXFEncoder))
+    except Exception as e:
+        sys.stderr.write(f'[PYTHON] Error: {str(e)}\n')
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
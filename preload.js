@@ -7,6 +7,53 @@ contextBridge.exposeInMainWorld('electron', {
   renderSVG: (filePath, config) => ipcRenderer.invoke('render-svg', filePath, config),
   // Parse DXF component tree (lines, arcs, text grouped by layer)
   parseDXFTree: (filePath) => ipcRenderer.invoke('parse-dxf-tree', filePath),
+  // Parse the component tree and render SVG from a single read of the DXF
+  openDXF: (filePath, config) => ipcRenderer.invoke('open-dxf', filePath, config),
+  // Parse DXF in streaming mode, records arrive through onDXFStreamRecord
+  parseDXFStream: (filePath, config, lowMemory) => ipcRenderer.invoke('parse-dxf-stream', filePath, config, lowMemory),
+  onDXFStreamRecord: (callback) => {
+    const listener = (event, filePath, record) => callback(filePath, record);
+    ipcRenderer.on('dxf-stream-record', listener);
+    // Return a cleanup function to remove the listener
+    return () => {
+      ipcRenderer.removeListener('dxf-stream-record', listener);
+    };
+  },
+  // Compute length/area/count takeoff aggregates per layer, type and block,
+  // config.filter restricts it to some layers, entity types or blocks
+  takeoffDXF: (filePath, expandBlocks, config) => ipcRenderer.invoke('takeoff-dxf', filePath, expandBlocks, config),
+  // Index INSERTs by block name, attribute tag and value for count takeoff
+  indexDXFBlocks: (filePath, config) => ipcRenderer.invoke('index-dxf-blocks', filePath, config),
+  // Window/point/nearest queries on the entity extents index
+  queryDXFSpatial: (filePath, query) => ipcRenderer.invoke('query-dxf-spatial', filePath, query),
+  // Simplified level-of-detail tiles for a viewport and zoom level
+  getDXFTiles: (filePath, request) => ipcRenderer.invoke('get-dxf-tiles', filePath, request),
+  // Small PNG preview of a sheet, cached by file hash
+  getDXFThumbnail: (filePath, request) => ipcRenderer.invoke('get-dxf-thumbnail', filePath, request),
+  // Modelspace and paperspace layouts with entity counts and extents
+  getDXFLayouts: (filePath, computeExtents) => ipcRenderer.invoke('get-dxf-layouts', filePath, computeExtents),
+  // Parse one layout on demand, kept by the worker once parsed
+  parseDXFLayout: (filePath, name, config) => ipcRenderer.invoke('parse-dxf-layout', filePath, name, config),
+  // Watch a DXF file, changes arrive as deltas through onDXFDelta
+  watchDXF: (filePath, config) => ipcRenderer.invoke('watch-dxf', filePath, config),
+  unwatchDXF: (filePath) => ipcRenderer.invoke('unwatch-dxf', filePath),
+  onDXFDelta: (callback) => {
+    const listener = (event, filePath, delta) => callback(filePath, delta);
+    ipcRenderer.on('dxf-delta', listener);
+    // Return a cleanup function to remove the listener
+    return () => {
+      ipcRenderer.removeListener('dxf-delta', listener);
+    };
+  },
+  // Per-phase timings and counters of each parse or render, see python/dxf/metrics.py
+  onDXFMetrics: (callback) => {
+    const listener = (event, metrics) => callback(metrics);
+    ipcRenderer.on('dxf-metrics', listener);
+    // Return a cleanup function to remove the listener
+    return () => {
+      ipcRenderer.removeListener('dxf-metrics', listener);
+    };
+  },
   // Get renderer configuration from JSON file
   getRendererConfig: () => ipcRenderer.invoke('get-renderer-config'),
   // Listen for config file changes
@@ -1,3 +1,6 @@
 """
 DXF parsing and processing module
-"""
\ No newline at end of file
+"""
+
+# Bump when the parse/render output format changes, invalidates cached results
+__version__ = '0.5.0'
@@ -0,0 +1,276 @@
+"""
+Batch processing of many DXF files on a process pool.
+
+Every input file is loaded once in a worker process, which writes
+    <name>.json           layer-grouped entity tree (same as parse_dxf.py),
+                          {"tree": ..., "styles": ...} with config.styles
+    <name>.svg            with --svg, SVG (same as render_dxf_svg.py)
+    <name>.takeoff.json   length/area/count takeoff (see dxf.takeoff)
+    <name>.log            the [PYTHON] log lines of that file
+to the output directory. A failing file is reported and the batch goes on.
+
+summary.json in the output directory lists every file with its outputs,
+per-phase timings in seconds, its metrics record (see dxf.metrics) and the
+error if it failed, plus a "takeoff" that sums the takeoffs of all files
+that succeeded.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+import contextlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+
+SUMMARY_FILE = 'summary.json'
+
+def collect_files(inputs: List[str]) -> List[str]:
+    """
+    Expand directories, glob patterns and plain paths into DXF files.
+
+    Args:
+        inputs: Directories (searched for *.dxf, not recursively), glob
+            patterns or file paths
+
+    Returns:
+        Absolute file paths, each once, in input order and sorted per input
+    """
+    files: Dict[str, None] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [os.path.join(item, name) for name in os.listdir(item)
+                       if name.lower().endswith('.dxf')]
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            # Kept even if missing, so it is reported as a failed file
+            files.setdefault(os.path.abspath(item), None)
+            continue
+        for path in sorted(matches):
+            if os.path.isfile(path):
+                files.setdefault(os.path.abspath(path), None)
+    return list(files)
+
+def output_names(files: List[str]) -> List[str]:
+    """Output base names per file, files with the same name get a numeric suffix"""
+    names = []
+    used = defaultdict(int)
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        used[stem] += 1
+        names.append(stem if used[stem] == 1 else f'{stem}-{used[stem]}')
+    return names
+
+def _write_json(path: str, value: Any) -> None:
+    from .utils.encoder import DXFEncoder
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, cls=DXFEncoder)
+
+def process_file(filepath: str, out_dir: str, name: str, config: Optional[Dict[str, Any]] = None,
+                 svg: bool = False, svg_config: Optional[Dict[str, Any]] = None,
+                 takeoff: bool = True) -> Dict[str, Any]:
+    """
+    Parse one file and write its outputs, runs in a pool process.
+
+    Args:
+        filepath: DXF file
+        out_dir: Output directory
+        name: Base name of the output files
+        config: Parser configuration
+        svg: Also render an SVG
+        svg_config: Renderer configuration
+        takeoff: Also compute the takeoff
+
+    Returns:
+        Summary entry with file, ok, outputs, timings, metrics and error or takeoff
+    """
+    result: Dict[str, Any] = {'file': filepath, 'name': name, 'ok': False, 'outputs': {}, 'timings': {}}
+    timings = result['timings']
+    started = time.perf_counter()
+    log_path = os.path.join(out_dir, f'{name}.log')
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stderr(log), \
+            metrics.collect() as collected:
+        try:
+            from .parser import create_render_context, load_document, parse_document
+            from .styles import style_table
+
+            phase = time.perf_counter()
+            doc = load_document(filepath)
+            timings['load'] = time.perf_counter() - phase
+
+            # Parser and renderer share one RenderContext, like dxf.pipeline
+            render_context = create_render_context(doc)
+            phase = time.perf_counter()
+            styles = style_table(config)
+            tree = parse_document(doc, config, render_context, styles)
+            path = os.path.join(out_dir, f'{name}.json')
+            _write_json(path, tree if styles is None else {'tree': tree, 'styles': styles.entries})
+            result['outputs']['tree'] = path
+            result['entities'] = sum(len(entities) for entities in tree.values())
+            del tree
+            timings['parse'] = time.perf_counter() - phase
+
+            if svg:
+                from .renderer import render_document
+                phase = time.perf_counter()
+                path = os.path.join(out_dir, f'{name}.svg')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(render_document(doc, svg_config, render_context))
+                result['outputs']['svg'] = path
+                timings['render'] = time.perf_counter() - phase
+
+            if takeoff:
+                from .filters import entity_filter
+                from .takeoff import compute_takeoff
+                phase = time.perf_counter()
+                quantities = compute_takeoff(doc, entity_filter=entity_filter(config))
+                path = os.path.join(out_dir, f'{name}.takeoff.json')
+                _write_json(path, quantities)
+                result['outputs']['takeoff'] = path
+                result['takeoff'] = quantities
+                timings['takeoff'] = time.perf_counter() - phase
+            result['ok'] = True
+        except Exception as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+            traceback.print_exc()
+        result['metrics'] = collected.record()
+    result['outputs']['log'] = log_path
+    timings['total'] = time.perf_counter() - started
+    return result
+
+def _add(target: Dict[str, float], source: Dict[str, Any]) -> None:
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+def combine_takeoffs(takeoffs: List[Dict[str, Any]], precision: int = 6) -> Dict[str, Any]:
+    """
+    Sum the takeoffs of several files.
+
+    Returns:
+        Dict with the groups of compute_takeoff() summed over all files.
+        'insunits' is the common unit, or None if the files disagree.
+    """
+    totals: Dict[str, float] = {}
+    groups = {'by_layer': defaultdict(dict), 'by_type': defaultdict(dict), 'by_block': defaultdict(dict)}
+    by_layer_type = defaultdict(lambda: defaultdict(dict))
+    units = set()
+    for quantities in takeoffs:
+        units.add(quantities.get('insunits', 0))
+        _add(totals, quantities['totals'])
+        for group, combined in groups.items():
+            for key, values in quantities.get(group, {}).items():
+                _add(combined[key], values)
+        for layer, types in quantities.get('by_layer_type', {}).items():
+            for etype, values in types.items():
+                _add(by_layer_type[layer][etype], values)
+
+    def rounded(values: Dict[str, float]) -> Dict[str, float]:
+        return {key: round(value, precision) if isinstance(value, float) else value
+                for key, value in values.items()}
+
+    return {
+        'insunits': units.pop() if len(units) == 1 else None,
+        'files': len(takeoffs),
+        'totals': rounded(totals),
+        **{group: {key: rounded(values) for key, values in combined.items()}
+           for group, combined in groups.items()},
+        'by_layer_type': {layer: {etype: rounded(values) for etype, values in types.items()}
+                          for layer, types in by_layer_type.items()},
+    }
+
+def run_batch(files: List[str], out_dir: str, workers: Optional[int] = None,
+              config: Optional[Dict[str, Any]] = None, svg: bool = False,
+              svg_config: Optional[Dict[str, Any]] = None, takeoff: bool = True) -> Dict[str, Any]:
+    """
+    Process files on a ProcessPoolExecutor and write summary.json.
+
+    Args:
+        files: DXF files, e.g. from collect_files()
+        out_dir: Output directory, created if missing
+        workers: Pool size, defaults to the number of cores
+        config, svg, svg_config, takeoff: See process_file()
+
+    Returns:
+        The summary, see module docstring
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    sys.stderr.write(f'[PYTHON] Batch of {len(files)} files on {workers} processes\n')
+
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_file, path, out_dir, name, config, svg, svg_config, takeoff): (path, name)
+            for path, name in zip(files, output_names(files))
+        }
+        for future in as_completed(futures):
+            path, name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The pool process itself died, e.g. out of memory
+                result = {'file': path, 'name': name, 'ok': False, 'outputs': {}, 'timings': {},
+                          'error': f'{type(e).__name__}: {e}'}
+            results[path] = result
+            status = 'ok' if result['ok'] else f"failed: {result['error']}"
+            sys.stderr.write(f"[PYTHON] [{len(results)}/{len(files)}] {name} "
+                             f"{result['timings'].get('total', 0.0):.2f}s {status}\n")
+
+    ordered = [results[path] for path in files]
+    takeoffs = [result.pop('takeoff') for result in ordered if 'takeoff' in result]
+    summary = {
+        'files': ordered,
+        'succeeded': sum(1 for result in ordered if result['ok']),
+        'failed': sum(1 for result in ordered if not result['ok']),
+        'workers': workers,
+        'elapsed': time.perf_counter() - started,
+    }
+    if takeoff:
+        summary['takeoff'] = combine_takeoffs(takeoffs)
+    _write_json(os.path.join(out_dir, SUMMARY_FILE), summary)
+    return summary
+
+def _json_arg(value: Optional[str], what: str) -> Optional[Dict[str, Any]]:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        sys.stderr.write(f'[PYTHON] Error: Invalid JSON {what}\n')
+        sys.exit(2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse a directory or glob of DXF files on a process pool')
+    parser.add_argument('inputs', nargs='+', help='Directories, glob patterns or DXF files')
+    parser.add_argument('-o', '--out-dir', required=True, help='Directory for per-file outputs and summary.json')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Number of processes (default: number of cores)')
+    parser.add_argument('--config', help='Parser configuration as JSON string')
+    parser.add_argument('--svg', action='store_true', help='Also render an SVG per file')
+    parser.add_argument('--svg-config', help='Renderer configuration as JSON string')
+    parser.add_argument('--no-takeoff', action='store_true', help='Skip the per-file and combined takeoff')
+    args = parser.parse_args(argv)
+
+    config = _json_arg(args.config, 'configuration')
+    svg_config = _json_arg(args.svg_config, 'SVG configuration')
+    files = collect_files(args.inputs)
+    if not files:
+        sys.stderr.write('[PYTHON] Error: No DXF files found\n')
+        sys.exit(1)
+
+    summary = run_batch(files, args.out_dir, args.workers, config, args.svg, svg_config,
+                        takeoff=not args.no_takeoff)
+    sys.stderr.write(f"[PYTHON] Batch finished in {summary['elapsed']:.2f}s: "
+                     f"{summary['succeeded']} succeeded, {summary['failed']} failed\n")
+    # The summary goes to stdout like the output of the single-file scripts
+    from .utils.encoder import DXFEncoder
+    sys.stdout.write(json.dumps(summary, cls=DXFEncoder))
+    if not summary['succeeded']:
+        sys.exit(1)
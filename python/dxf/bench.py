@@ -0,0 +1,387 @@
+"""
+Benchmarks of the parser, the JSON encoding and the SVG renderer on
+synthetic drawings.
+
+Drawings are generated with ezdxf in four mixes that resemble real sheets:
+
+    floorplan   LINE-heavy walls and dimensions, door arcs, room tags
+    fixtures    INSERT-heavy fixture plan, block references with attributes
+    sketch      SPLINE-heavy freehand sketch
+    hatch       HATCH-heavy sheet, solid and ANSI31 filled regions
+
+at any number of modelspace entities (10k, 100k and 1M by default), from a
+fixed seed, and kept in the data directory for the next run.
+
+Every case (mix x size) runs in a fresh process and measures per phase
+
+    load      ezdxf readfile
+    parse     parse_document() into the layer-grouped tree
+    encode    JSON encoding of the tree with DXFEncoder
+    render    SVG render, serialized into a byte counter
+
+wall time in seconds, peak RSS in bytes during the phase (Linux resets the
+high-water mark per phase, elsewhere it is the process peak so far) and
+output bytes of encode and render.
+
+    python bench_dxf.py --sizes 10000 100000 --mixes floorplan hatch
+
+writes <results-dir>/<version>-<timestamp>.json with the parser and ezdxf
+versions, and prints each phase next to the previous result file in the
+directory (or --baseline), so regressions between versions show up as
+percentages.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+from . import __version__
+
+MIXES = ('floorplan', 'fixtures', 'sketch', 'hatch')
+SIZES = (10_000, 100_000, 1_000_000)
+PHASES = ('load', 'parse', 'encode', 'render')
+DEFAULT_SEED = 1
+DEFAULT_RESULTS_DIR = 'bench-results'
+# Bump when the generated drawings change, regenerates cached inputs
+GENERATOR_VERSION = 1
+
+# Grid spacing of generated cells in drawing units
+CELL = 10.0
+
+def _cells(count: int):
+    """Lower left corners of count grid cells filling a square"""
+    columns = max(1, int(math.sqrt(count)))
+    for i in range(count):
+        yield (i % columns) * CELL, (i // columns) * CELL
+
+def _floorplan(doc, msp, count: int, rnd: random.Random) -> None:
+    for name, color in (('A-WALL', 7), ('A-DOOR', 3), ('A-DIMS', 1), ('A-ANNO', 2)):
+        doc.layers.add(name, color=color)
+    cells = _cells(count)
+    added = 0
+    while added < count:
+        x, y = next(cells)
+        roll = rnd.random()
+        if roll < 0.80:
+            # Wall segment along one side of the cell, rarely a diagonal dimension line
+            if rnd.random() < 0.9:
+                end = (x + CELL, y) if rnd.random() < 0.5 else (x, y + CELL)
+                msp.add_line((x, y), end, dxfattribs={'layer': 'A-WALL'})
+            else:
+                msp.add_line((x, y), (x + CELL * rnd.random(), y + CELL * rnd.random()),
+                             dxfattribs={'layer': 'A-DIMS'})
+        elif roll < 0.90:
+            msp.add_lwpolyline([(x, y), (x + 2, y), (x + 2, y + 2), (x, y + 2)], close=True,
+                               dxfattribs={'layer': 'A-WALL'})
+        elif roll < 0.95:
+            msp.add_arc((x, y), radius=0.9, start_angle=0, end_angle=90, dxfattribs={'layer': 'A-DOOR'})
+        else:
+            msp.add_text(f'RM {added}', height=0.5,
+                         dxfattribs={'layer': 'A-ANNO', 'insert': (x + 1, y + 1)})
+        added += 1
+
+def _fixtures(doc, msp, count: int, rnd: random.Random) -> None:
+    for name, color in (('P-FIXT', 4), ('E-LITE', 5), ('A-WALL', 7)):
+        doc.layers.add(name, color=color)
+    names = []
+    for i in range(8):
+        name = f'FIXTURE-{i}'
+        block = doc.blocks.new(name)
+        block.add_circle((0, 0), radius=0.4)
+        block.add_lwpolyline([(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)], close=True)
+        for j in range(i + 2):
+            angle = 2 * math.pi * j / (i + 2)
+            block.add_line((0, 0), (0.5 * math.cos(angle), 0.5 * math.sin(angle)))
+        block.add_attdef('TAG', (0, -0.8), dxfattribs={'height': 0.2})
+        names.append(name)
+    added = 0
+    for x, y in _cells(count):
+        if added >= count:
+            break
+        if rnd.random() < 0.85:
+            layer = 'P-FIXT' if rnd.random() < 0.6 else 'E-LITE'
+            insert = msp.add_blockref(rnd.choice(names), (x + 5, y + 5),
+                                      dxfattribs={'layer': layer, 'rotation': rnd.choice((0, 90, 180, 270))})
+            insert.add_attrib('TAG', f'{layer}-{added % 50}', (x + 5, y + 4.2))
+        else:
+            msp.add_line((x, y), (x + CELL, y), dxfattribs={'layer': 'A-WALL'})
+        added += 1
+
+def _sketch(doc, msp, count: int, rnd: random.Random) -> None:
+    for name, color in (('SKETCH', 7), ('CONSTRUCTION', 8)):
+        doc.layers.add(name, color=color)
+    added = 0
+    for x, y in _cells(count):
+        if added >= count:
+            break
+        if rnd.random() < 0.70:
+            points = [(x + CELL * i / 6, y + CELL * rnd.random()) for i in range(rnd.randint(5, 8))]
+            msp.add_spline(points, dxfattribs={'layer': 'SKETCH'})
+        elif rnd.random() < 0.5:
+            msp.add_circle((x + 5, y + 5), radius=CELL * rnd.uniform(0.1, 0.4),
+                           dxfattribs={'layer': 'CONSTRUCTION'})
+        else:
+            msp.add_line((x, y), (x + CELL, y + CELL), dxfattribs={'layer': 'CONSTRUCTION'})
+        added += 1
+
+def _hatch(doc, msp, count: int, rnd: random.Random) -> None:
+    for name, color in (('A-HATCH', 9), ('A-OUTLINE', 7)):
+        doc.layers.add(name, color=color)
+    added = 0
+    for x, y in _cells(count):
+        if added >= count:
+            break
+        size = CELL * rnd.uniform(0.3, 0.9)
+        outline = [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+        if rnd.random() < 0.60:
+            hatch = msp.add_hatch(color=rnd.randint(1, 9), dxfattribs={'layer': 'A-HATCH'})
+            if rnd.random() < 0.5:
+                hatch.set_pattern_fill('ANSI31', scale=0.5)
+            hatch.paths.add_polyline_path(outline, is_closed=True)
+        else:
+            msp.add_lwpolyline(outline, close=True, dxfattribs={'layer': 'A-OUTLINE'})
+        added += 1
+
+GENERATORS: Dict[str, Callable] = {
+    'floorplan': _floorplan,
+    'fixtures': _fixtures,
+    'sketch': _sketch,
+    'hatch': _hatch,
+}
+
+def generate(mix: str, count: int, path: str, seed: int = DEFAULT_SEED) -> str:
+    """
+    Write a synthetic drawing with count modelspace entities, see module docstring.
+
+    Raises:
+        ValueError: for an unknown mix
+    """
+    import ezdxf
+
+    if mix not in GENERATORS:
+        raise ValueError(f"Unknown mix '{mix}', expected one of {', '.join(MIXES)}")
+    doc = ezdxf.new('R2018')
+    GENERATORS[mix](doc, doc.modelspace(), count, random.Random(seed))
+    doc.saveas(path)
+    return path
+
+def drawing_path(data_dir: str, mix: str, count: int, seed: int = DEFAULT_SEED) -> str:
+    """Generated drawing of a case, created on first use"""
+    path = os.path.join(data_dir, f'{mix}-{count}-s{seed}-g{GENERATOR_VERSION}.dxf')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        started = time.perf_counter()
+        # Written under a temporary name, an interrupted run leaves no partial drawing
+        partial = f'{path}.{os.getpid()}.tmp'
+        generate(mix, count, partial, seed)
+        os.replace(partial, path)
+        sys.stderr.write(f'[PYTHON] Generated {os.path.basename(path)} '
+                         f'in {time.perf_counter() - started:.1f}s\n')
+    return path
+
+def _reset_peak_rss() -> bool:
+    """Reset the RSS high-water mark of this process, Linux only"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss() -> int:
+    """Peak RSS of this process in bytes since the last reset"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class _ByteCounter:
+    """Binary stream that only counts what is written"""
+    def __init__(self):
+        self.count = 0
+
+    def write(self, data) -> int:
+        self.count += len(data)
+        return len(data)
+
+def run_case(path: str, phases: List[str], config: Optional[Dict[str, Any]] = None,
+             svg_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run the phases of one case in this process, see module docstring.
+
+    Returns:
+        Dict with 'entities', 'file_bytes' and 'phases', phase name ->
+        {'seconds', 'peak_rss', 'output_bytes'?}
+    """
+    from .parser import create_render_context, load_document, parse_document
+    from .styles import style_table
+    from .utils.encoder import DXFEncoder
+
+    result: Dict[str, Any] = {'file_bytes': os.path.getsize(path), 'phases': {}}
+
+    def measure(name: str, run: Callable[[], Any]) -> Any:
+        _reset_peak_rss()
+        started = time.perf_counter()
+        value = run()
+        result['phases'][name] = {'seconds': round(time.perf_counter() - started, 4),
+                                  'peak_rss': _peak_rss()}
+        return value
+
+    doc = measure('load', lambda: load_document(path))
+    result['entities'] = len(doc.modelspace())
+    render_context = create_render_context(doc)
+    tree = None
+    if 'parse' in phases or 'encode' in phases:
+        tree = measure('parse', lambda: parse_document(doc, config, render_context, style_table(config)))
+    if 'encode' in phases:
+        encoded = measure('encode', lambda: json.dumps(tree, cls=DXFEncoder).encode('utf-8'))
+        result['phases']['encode']['output_bytes'] = len(encoded)
+        del encoded
+    del tree
+    if 'render' in phases:
+        from .renderer import render_root, write_svg
+        out = _ByteCounter()
+        measure('render', lambda: write_svg(render_root(doc, svg_config, render_context), out))
+        result['phases']['render']['output_bytes'] = out.count
+    return result
+
+def _ezdxf_version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+        return version('ezdxf')
+    except Exception:
+        return None
+
+def run_benchmarks(mixes: List[str], sizes: List[int], data_dir: str, phases: List[str],
+                   config: Optional[Dict[str, Any]] = None, svg_config: Optional[Dict[str, Any]] = None,
+                   seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    Generate missing drawings and run every case in a fresh process.
+
+    Returns:
+        Results with the environment and one entry per case; a case that
+        fails has 'error' instead of 'phases'
+    """
+    results: Dict[str, Any] = {
+        'version': __version__,
+        'ezdxf': _ezdxf_version(),
+        'python': platform.python_version(),
+        'machine': f'{platform.system()} {platform.machine()} x{os.cpu_count()}',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'config': config,
+        'svg_config': svg_config,
+        'cases': [],
+    }
+    for mix in mixes:
+        for size in sizes:
+            case: Dict[str, Any] = {'mix': mix, 'size': size}
+            try:
+                path = drawing_path(data_dir, mix, size, seed)
+                # Fresh process per case, so peak RSS and caches do not carry over
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                    case.update(executor.submit(run_case, path, phases, config, svg_config).result())
+            except Exception as e:
+                case['error'] = f'{type(e).__name__}: {e}'
+            results['cases'].append(case)
+            sys.stderr.write(f'[PYTHON] {format_case(case)}\n')
+    return results
+
+def _megabytes(value: int) -> str:
+    return f'{value / 1e6:.1f} MB'
+
+def format_case(case: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """One line per case, with the change against the same case of a baseline"""
+    label = f"{case['mix']} {case['size']}"
+    if 'error' in case:
+        return f'{label}: failed: {case["error"]}'
+    parts = []
+    for name, phase in case['phases'].items():
+        text = f"{name} {phase['seconds']:.2f}s {_megabytes(phase['peak_rss'])}"
+        if 'output_bytes' in phase:
+            text += f" -> {_megabytes(phase['output_bytes'])}"
+        previous = (baseline or {}).get('phases', {}).get(name)
+        if previous and previous['seconds'] > 0:
+            text += f" ({(phase['seconds'] / previous['seconds'] - 1) * 100:+.0f}%)"
+        parts.append(text)
+    return f'{label}: ' + ', '.join(parts)
+
+def latest_results(results_dir: str, exclude: Optional[str] = None) -> Optional[str]:
+    """Most recent results file in a directory"""
+    if not os.path.isdir(results_dir):
+        return None
+    paths = [os.path.join(results_dir, name) for name in os.listdir(results_dir) if name.endswith('.json')]
+    paths = [path for path in paths if path != exclude]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Lines of every case of results next to the same case of a baseline"""
+    previous = {(case['mix'], case['size']): case for case in baseline.get('cases', [])}
+    return [format_case(case, previous.get((case['mix'], case['size']))) for case in results['cases']]
+
+def _json_arg(value: Optional[str], what: str) -> Optional[Dict[str, Any]]:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        sys.stderr.write(f'[PYTHON] Error: Invalid JSON {what}\n')
+        sys.exit(2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parsing and rendering of synthetic DXF drawings')
+    parser.add_argument('--mixes', nargs='+', choices=MIXES, default=list(MIXES), help='Drawing mixes')
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help='Modelspace entities per drawing')
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES),
+                        help='Phases to measure, load always runs')
+    parser.add_argument('--config', help='Parser configuration as JSON string')
+    parser.add_argument('--svg-config', help='Renderer configuration as JSON string')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed of the generated drawings')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'rapidtakeoff-bench'),
+                        help='Directory for generated drawings, reused between runs')
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR, help='Directory for result files')
+    parser.add_argument('--baseline', help='Results file to compare with (default: latest in --results-dir)')
+    parser.add_argument('--generate-only', action='store_true', help='Only generate the drawings')
+    args = parser.parse_args(argv)
+
+    if args.generate_only:
+        for mix in args.mixes:
+            for size in args.sizes:
+                print(drawing_path(args.data_dir, mix, size, args.seed))
+        return
+
+    results = run_benchmarks(args.mixes, args.sizes, args.data_dir, args.phases,
+                             _json_arg(args.config, 'configuration'),
+                             _json_arg(args.svg_config, 'SVG configuration'), args.seed)
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{__version__}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    baseline_path = args.baseline or latest_results(args.results_dir, exclude=path)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {os.path.basename(baseline_path)} (version {baseline.get('version')}):")
+        lines = compare(results, baseline)
+    else:
+        lines = [format_case(case) for case in results['cases']]
+    print('\n'.join(lines))
+    print(f'Results written to {path}')
+    if all('error' in case for case in results['cases']):
+        sys.exit(1)
@@ -0,0 +1,147 @@
+"""
+Block and attribute index for count takeoff.
+
+Built from the INSERT records of a parsed tree, so no second pass over the
+drawing is needed. Every level carries its aggregated count, so a query like
+"all LT-Fixture-TypeA with VOLTAGE=277" is a chain of dictionary lookups:
+
+    index['LT-Fixture-TypeA']['attributes']['VOLTAGE']['277']['count']
+
+Layout per block name:
+
+    {
+      "count": 12,
+      "handles": ["1A2", ...],
+      "inserts": [[x, y, z], ...],
+      "layers": {"E-LITE": 12},
+      "attributes": {
+        "VOLTAGE": {
+          "277": {"count": 5, "handles": [...], "inserts": [...]},
+          ...
+        }
+      }
+    }
+
+"handles" and "inserts" are parallel lists with one entry per block
+instance, and "count" is their length. With the document at hand every
+instance is counted:
+
+    - an MINSERT counts rows x columns times, its cells are listed as
+      "<handle>#<cell>" in row order
+    - blocks inserted in other blocks count once per instance of the outer
+      block, listed by handle path "<outer>/<inner>" with their WCS insert
+      point; on layer 0 they count on the layer of the outer instance
+
+Without the document only the INSERT records themselves are indexed.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .utils.encoder import round_point
+
+# Nesting depth up to which block definitions are searched for INSERTs
+MAX_NESTING = 16
+
+# (handle path, block name, insert point in block coordinates, layer or None
+# for layer 0, attributes as (tag, text)) of an INSERT inside a block
+_Nested = Tuple[str, str, Any, Optional[str], List[Tuple[str, str]]]
+
+def _entry() -> Dict[str, Any]:
+    return {'count': 0, 'handles': [], 'inserts': []}
+
+def _add(entry: Dict[str, Any], handle: str, insert: List[float]) -> None:
+    entry['count'] += 1
+    entry['handles'].append(handle)
+    entry['inserts'].append(insert)
+
+def _cells(entity) -> List[Tuple[str, Any]]:
+    """(handle, INSERT) of every grid cell of an MINSERT, the entity itself for a plain INSERT"""
+    handle = entity.dxf.handle
+    if entity.mcount <= 1:
+        return [(handle, entity)]
+    return [(f'{handle}#{i}', cell) for i, cell in enumerate(entity.multi_insert())]
+
+class _BlockInstances:
+    """INSERTs nested in block definitions, resolved once per block name"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.resolved: Dict[str, List[_Nested]] = {}
+
+    def nested(self, name: str, visiting: Optional[Set[str]] = None) -> List[_Nested]:
+        if name in self.resolved:
+            return self.resolved[name]
+        visiting = visiting if visiting is not None else set()
+        block = self.doc.blocks.get(name)
+        if block is None or name in visiting or len(visiting) >= MAX_NESTING:
+            return []
+        visiting.add(name)
+        instances: List[_Nested] = []
+        for e in block.query('INSERT'):
+            layer = e.dxf.layer
+            layer = None if layer == '0' else layer
+            attribs = [(attrib.dxf.tag, attrib.dxf.text) for attrib in e.attribs]
+            inner = self.nested(e.dxf.name, visiting)
+            for handle, cell in _cells(e):
+                instances.append((handle, e.dxf.name, cell.ocs().to_wcs(cell.dxf.insert), layer, attribs))
+                if inner:
+                    matrix = cell.matrix44()
+                    for path, inner_name, point, inner_layer, inner_attribs in inner:
+                        instances.append((f'{handle}/{path}', inner_name, matrix.transform(point),
+                                          inner_layer if inner_layer is not None else layer, inner_attribs))
+        visiting.discard(name)
+        self.resolved[name] = instances
+        return instances
+
+def build_block_index(records: Iterable[Dict[str, Any]], doc=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Index INSERT records by block name, attribute tag and attribute value.
+
+    Args:
+        records: Entity records, e.g. all lists of a parsed tree; records
+                 other than INSERT are skipped
+        doc: Optional ezdxf document of the records, needed to count MINSERT
+             cells and nested block instances
+
+    Returns:
+        Dict mapping block names to their index entries, see module docstring
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+
+    def add(name: str, handle: str, insert: List[float], layer: str, attribs: Iterable[Tuple[str, str]]) -> None:
+        block = index.get(name)
+        if block is None:
+            block = index[name] = {**_entry(), 'layers': {}, 'attributes': {}}
+        _add(block, handle, insert)
+        block['layers'][layer] = block['layers'].get(layer, 0) + 1
+
+        for tag, text in attribs:
+            values = block['attributes'].setdefault(tag, {})
+            value = values.get(text)
+            if value is None:
+                value = values[text] = _entry()
+            _add(value, handle, insert)
+
+    blocks = _BlockInstances(doc) if doc is not None else None
+    for data in records:
+        if not data or data.get('type') != 'INSERT':
+            continue
+        attribs = [(attrib['tag'], attrib['text']) for attrib in data.get('attribs', ())]
+        entity = doc.entitydb.get(data['handle']) if doc is not None else None
+        if entity is None or entity.dxftype() != 'INSERT':
+            add(data['name'], data['handle'], data['insert'], data['layer'], attribs)
+            continue
+
+        nested = blocks.nested(entity.dxf.name)
+        for handle, cell in _cells(entity):
+            insert = data['insert'] if cell is entity else round_point(cell.ocs().to_wcs(cell.dxf.insert))
+            add(data['name'], handle, insert, data['layer'], attribs)
+            if nested:
+                matrix = cell.matrix44()
+                for path, name, point, layer, nested_attribs in nested:
+                    add(name, f'{handle}/{path}', round_point(matrix.transform(point)),
+                        layer if layer is not None else data['layer'], nested_attribs)
+    return index
+
+def build_tree_block_index(tree: Dict[str, list], doc=None) -> Dict[str, Dict[str, Any]]:
+    """Block index for all INSERT records of a layer-grouped tree, see build_block_index()"""
+    return build_block_index((data for entities in tree.values() for data in entities), doc)
@@ -0,0 +1,181 @@
+"""
+Content-addressed on-disk cache for parse and render outputs.
+
+Entries are keyed by a hash of the DXF bytes, the normalized config JSON, the
+kind of output and the parser/ezdxf versions, and stored gzip-compressed.
+The directory is kept under a size bound by evicting least recently used
+entries. This module deliberately does not import ezdxf so a cache hit never
+pays for it.
+"""
+import os
+import sys
+import json
+import gzip
+import shutil
+import hashlib
+import zlib
+import tempfile
+import contextlib
+from typing import Any, BinaryIO, Iterator, Optional
+
+from . import __version__
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Entries decompressed for stream_to() spill from memory to disk above this size
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DIR_ENV = 'RAPIDTAKEOFF_CACHE_DIR'
+ENTRY_SUFFIX = '.gz'
+
+def _ezdxf_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version('ezdxf')
+    except Exception:
+        return 'unknown'
+
+def normalize_config(config: Any) -> str:
+    """
+    Canonical JSON for a config value. Keys starting with an underscore
+    (e.g. the client's _timestamp cache buster) do not affect the output
+    and are dropped.
+    """
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if not str(k).startswith('_')}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    return json.dumps(strip(config), sort_keys=True, separators=(',', ':'))
+
+def hash_file(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """Size-bounded LRU cache of compressed results in a directory"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, filepath: str, kind: str, config: Any = None) -> str:
+        """Cache key for one kind of output ('parse', 'render', ...) of a file"""
+        digest = hashlib.sha256()
+        for part in (hash_file(filepath), kind, normalize_config(config),
+                     __version__, _ezdxf_version()):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _discard(self, path: str, error: Exception) -> None:
+        """Drop a corrupt or truncated entry, so the caller recomputes and stores it again"""
+        sys.stderr.write(f'[PYTHON] Warning: Discarding corrupt cache entry {path}: {error}\n')
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stream_to(self, key: str, out: BinaryIO) -> bool:
+        """
+        Copy a cached entry into a binary stream without loading it whole.
+        The entry is decompressed completely before the first byte is
+        written, so a corrupt entry never leaves partial output behind.
+
+        Returns:
+            True on a cache hit, False if the key is not cached or its
+            entry is corrupt
+        """
+        path = self._path(key)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            try:
+                with gzip.open(path, 'rb') as f:
+                    shutil.copyfileobj(f, spool, 1 << 20)
+            except FileNotFoundError:
+                return False
+            except (OSError, EOFError, zlib.error) as e:
+                self._discard(path, e)
+                return False
+            spool.seek(0)
+            shutil.copyfileobj(spool, out, 1 << 20)
+        # Mark as recently used for LRU eviction
+        os.utime(path)
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a cached entry, or None if it is not cached or corrupt"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error) as e:
+            self._discard(path, e)
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an entry atomically, then evict old entries over the size bound"""
+        with self.writer(key) as f:
+            f.write(data)
+
+    @contextlib.contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Binary stream for an entry written piece by piece, e.g. while the
+        same output goes to stdout. The entry is stored atomically when the
+        block exits and discarded if it raises.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+                yield f
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the directory fits max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                sys.stderr.write(f'[PYTHON] Could not evict cache entry {path}: {e}\n')
+
+def open_cache(directory: Optional[str] = None) -> Optional[ResultCache]:
+    """
+    Open the result cache in directory, or in the directory named by the
+    RAPIDTAKEOFF_CACHE_DIR environment variable. Returns None when caching is
+    not configured or the directory is unusable.
+    """
+    directory = directory or os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    try:
+        return ResultCache(directory)
+    except OSError as e:
+        sys.stderr.write(f'[PYTHON] Warning: Could not open cache directory {directory}: {e}\n')
+        return None
@@ -0,0 +1,65 @@
+"""
+Bounded LRU pool of loaded ezdxf documents
+"""
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .parser import load_document
+
+class DocumentPool:
+    """
+    Keeps recently used ezdxf documents in memory so repeated requests for the
+    same file skip ezdxf.readfile. Entries are invalidated when the file's
+    modification time or size changes on disk.
+    """
+
+    def __init__(self, max_documents: int = 4):
+        self.max_documents = max(1, max_documents)
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int], Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(filepath: str) -> str:
+        return os.path.realpath(filepath)
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, filepath: str):
+        """Return the document for filepath, loading it if needed"""
+        key = self._key(filepath)
+        stamp = self._stamp(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        doc = load_document(key)
+        self._entries[key] = (stamp, doc)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_documents:
+            evicted, _ = self._entries.popitem(last=False)
+            sys.stderr.write(f'[PYTHON] Evicted document from pool: {evicted}\n')
+        return doc
+
+    def discard(self, filepath: str) -> bool:
+        """Drop a document from the pool, returns True if it was present"""
+        return self._entries.pop(self._key(filepath), None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'documents': list(self._entries.keys()),
+            'max_documents': self.max_documents,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
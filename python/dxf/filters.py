@@ -0,0 +1,110 @@
+"""
+Include/exclude filters applied to layout entities before they are parsed.
+
+The filter is given in the parser config as
+
+    "filter": {
+        "layers": ["P-PIPE-*", "A-WALL"],
+        "exclude_layers": ["*-NPLT"],
+        "types": ["LINE", "LWPOLYLINE", "INSERT"],
+        "exclude_types": ["HATCH"],
+        "blocks": ["DOOR-*"],
+        "exclude_blocks": ["*|*"]
+    }
+
+Every entry is optional and takes a list or a single string. Layer and block
+names are matched as case-insensitive globs (fnmatch), entity types exactly.
+An entity passes when its layer and type are included (everything is when
+the include list is missing) and not excluded. "blocks"/"exclude_blocks"
+only decide about INSERTs, by block name; combine them with
+"types": ["INSERT"] to get block references alone.
+
+The filter looks at the entities of the layout. An INSERT that passes is
+expanded or instanced as a whole, whatever the layers and types inside its
+block. Decisions are cached per layer and block name, so skipping an entity
+costs a type lookup and two dict lookups, no parsing and no INSERT
+expansion. Skipped entities are counted per type in the "filtered" metrics
+counter.
+"""
+import fnmatch
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from . import metrics
+
+def _names(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+def _glob(patterns: List[str]):
+    """Compiled case-insensitive matcher for a list of globs, None if empty"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns), re.IGNORECASE).match
+
+class EntityFilter:
+    """Include/exclude filter, see module docstring"""
+
+    def __init__(self, layers: Iterable[str] = (), exclude_layers: Iterable[str] = (),
+                 types: Iterable[str] = (), exclude_types: Iterable[str] = (),
+                 blocks: Iterable[str] = (), exclude_blocks: Iterable[str] = ()):
+        self._layers = _glob(list(layers))
+        self._exclude_layers = _glob(list(exclude_layers))
+        self.types = frozenset(t.upper() for t in types) or None
+        self.exclude_types = frozenset(t.upper() for t in exclude_types)
+        self._blocks = _glob(list(blocks))
+        self._exclude_blocks = _glob(list(exclude_blocks))
+        # Name -> decision, drawings have few layers and blocks but many entities
+        self._layer_cache: Dict[str, bool] = {}
+        self._block_cache: Dict[str, bool] = {}
+
+    def accepts_layer(self, name: str) -> bool:
+        accepted = self._layer_cache.get(name)
+        if accepted is None:
+            accepted = self._layer_cache[name] = (
+                (self._layers is None or self._layers(name) is not None)
+                and (self._exclude_layers is None or self._exclude_layers(name) is None))
+        return accepted
+
+    def accepts_block(self, name: str) -> bool:
+        accepted = self._block_cache.get(name)
+        if accepted is None:
+            accepted = self._block_cache[name] = (
+                (self._blocks is None or self._blocks(name) is not None)
+                and (self._exclude_blocks is None or self._exclude_blocks(name) is None))
+        return accepted
+
+    def accepts(self, e) -> bool:
+        etype = e.dxftype()
+        if (self.types is not None and etype not in self.types) or etype in self.exclude_types:
+            return False
+        if not self.accepts_layer(e.dxf.get('layer', '0')):
+            return False
+        return etype != 'INSERT' or self.accepts_block(e.dxf.get('name', ''))
+
+    def apply(self, entities: Iterable[Any]) -> Iterator[Any]:
+        """The entities that pass, in their original order"""
+        collected = metrics.active()
+        for e in entities:
+            if self.accepts(e):
+                yield e
+            elif collected is not None:
+                collected.count('filtered', e.dxftype())
+
+def entity_filter(config: Optional[Dict[str, Any]]) -> Optional[EntityFilter]:
+    """EntityFilter from the "filter" entry of a parser config, None without one"""
+    options = config.get('filter') if isinstance(config, dict) else None
+    if not isinstance(options, dict):
+        return None
+    keys = ('layers', 'exclude_layers', 'types', 'exclude_types', 'blocks', 'exclude_blocks')
+    if not any(options.get(key) for key in keys):
+        return None
+    return EntityFilter(**{key: _names(options.get(key)) for key in keys})
+
+def filtered(entities: Iterable[Any], config: Optional[Dict[str, Any]]) -> Iterable[Any]:
+    """The entities that pass the filter of a parser config, all of them without one"""
+    selection = entity_filter(config)
+    return entities if selection is None else selection.apply(entities)
@@ -0,0 +1,293 @@
+"""
+Adaptive flattening of curves to a chord tolerance.
+
+The chord tolerance is the largest distance allowed between a curve and the
+polyline that replaces it. It is given in the parser config as
+
+    "flatten": {"tolerance": 0.01, "relative": 0.005}
+
+where "tolerance" is absolute, in drawing units, and "relative" is a fraction
+of the size of each curve (radius of arcs and circles, major axis of
+ellipses, control point extents of splines). With both set the looser of
+the two wins, so tiny curves are not oversampled and huge ones stay bounded.
+"flatten": true uses the defaults.
+
+Point counts follow the curvature: circular arcs get the number of segments
+whose sagitta stays within the tolerance, splines get per knot span the
+segment count their midpoint deviation calls for (bounded, see
+spline_vertices()), ellipses are subdivided by ezdxf.
+
+SPLINE records always carry their flattened "points". With "flatten" in the
+config, ARC, CIRCLE, ELLIPSE and LWPOLYLINE records with bulges also get a
+"flattened" [[x, y, z], ...] polyline next to their analytic definition.
+"""
+import math
+import itertools
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from ezdxf.math import BoundingBox, distance_point_line_3d
+
+PRECISION = 6
+DEFAULT_RELATIVE_TOLERANCE = 0.005
+# Upper bound of segments for one arc, whatever the tolerance
+MAX_ARC_SEGMENTS = 1024
+# Tolerance floor, keeps degenerate curves from subdividing forever
+MIN_TOLERANCE = 1e-9
+# Segments per knot span of a spline before refinement, and the bound of its refinement
+SPLINE_SPAN_SEGMENTS = 4
+MAX_SPLINE_SEGMENTS = 1024
+
+class Flattening:
+    """Chord tolerance settings, see module docstring"""
+
+    def __init__(self, tolerance: Optional[float] = None,
+                 relative: Optional[float] = DEFAULT_RELATIVE_TOLERANCE, curves: bool = False):
+        self.tolerance = tolerance
+        self.relative = relative
+        # Emit "flattened" polylines for arcs, circles, ellipses and bulges
+        self.curves = curves
+
+    def distances(self, sizes: np.ndarray) -> np.ndarray:
+        """Chord tolerance for curves of the given sizes"""
+        sizes = np.abs(np.asarray(sizes, dtype=np.float64))
+        relative = self.relative if self.relative or self.tolerance else DEFAULT_RELATIVE_TOLERANCE
+        result = relative * sizes if relative else np.zeros_like(sizes)
+        if self.tolerance:
+            result = np.maximum(result, self.tolerance)
+        return np.maximum(result, MIN_TOLERANCE)
+
+    def distance(self, size: float) -> float:
+        return float(self.distances(np.array([size]))[0])
+
+DEFAULT_FLATTENING = Flattening()
+
+def flattening_options(config: Optional[Dict[str, Any]]) -> Flattening:
+    """Flattening settings from the "flatten" entry of a parser config"""
+    options = config.get('flatten') if isinstance(config, dict) else None
+    if not options:
+        return DEFAULT_FLATTENING
+    if not isinstance(options, dict):
+        return Flattening(curves=True)
+    return Flattening(options.get('tolerance'), options.get('relative', DEFAULT_RELATIVE_TOLERANCE),
+                      curves=options.get('curves', True))
+
+def arc_segments(radius: np.ndarray, sweep: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """
+    Segments per circular arc so that the sagitta of every segment stays
+    within the chord tolerance.
+
+    Args:
+        radius: Arc radii
+        sweep: Absolute sweep angles in radians
+        distance: Chord tolerances
+
+    Returns:
+        int64 segment counts, at least 1
+    """
+    radius = np.abs(radius)
+    # sagitta = r * (1 - cos(step / 2)) <= distance
+    ratio = np.clip(1.0 - distance / np.maximum(radius, MIN_TOLERANCE), -1.0, 1.0)
+    step = 2.0 * np.arccos(ratio)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        count = np.ceil(np.abs(sweep) / step)
+    count = np.where(np.isfinite(count), count, 1)
+    return np.clip(count, 1, MAX_ARC_SEGMENTS).astype(np.int64)
+
+def _arc_vertices(cx: float, cy: float, radius: float, start: float, sweep: float,
+                  count: int, z: float = 0.0) -> np.ndarray:
+    """count + 1 vertices of an arc, (count + 1, 3)"""
+    angles = start + sweep * np.linspace(0.0, 1.0, count + 1)
+    vertices = np.empty((count + 1, 3))
+    vertices[:, 0] = cx + radius * np.cos(angles)
+    vertices[:, 1] = cy + radius * np.sin(angles)
+    vertices[:, 2] = z
+    return vertices
+
+def _rounded(vertices: np.ndarray) -> list:
+    return np.round(vertices, PRECISION).tolist()
+
+def flatten_arcs(entities: List[Any], flattening: Flattening) -> List[list]:
+    """Flattened ARC polylines, counter-clockwise from start to end angle"""
+    n = len(entities)
+    values = np.array([(e.dxf.center[0], e.dxf.center[1], e.dxf.center[2], e.dxf.radius,
+                        e.dxf.start_angle, e.dxf.end_angle) for e in entities],
+                      dtype=np.float64).reshape(n, 6)
+    start = np.radians(values[:, 4])
+    sweep = np.radians(np.mod(values[:, 5] - values[:, 4], 360.0))
+    sweep[np.isclose(sweep, 0.0)] = 2.0 * np.pi
+    counts = arc_segments(values[:, 3], sweep, flattening.distances(values[:, 3]))
+    return [
+        _rounded(_arc_vertices(cx, cy, r, a, s, int(c), z))
+        for (cx, cy, z, r), a, s, c in zip(values[:, :4].tolist(), start.tolist(), sweep.tolist(), counts.tolist())
+    ]
+
+def flatten_circles(entities: List[Any], flattening: Flattening) -> List[list]:
+    """Flattened CIRCLE polylines, closed by repeating the first vertex"""
+    n = len(entities)
+    values = np.array([(e.dxf.center[0], e.dxf.center[1], e.dxf.center[2], e.dxf.radius) for e in entities],
+                      dtype=np.float64).reshape(n, 4)
+    counts = arc_segments(values[:, 3], np.full(n, 2.0 * np.pi), flattening.distances(values[:, 3]))
+    # At least a triangle, a single segment would collapse the circle
+    counts = np.maximum(counts, 3)
+    return [
+        _rounded(_arc_vertices(cx, cy, r, 0.0, 2.0 * np.pi, int(c), z))
+        for (cx, cy, z, r), c in zip(values.tolist(), counts.tolist())
+    ]
+
+def flatten_ellipses(entities: List[Any], flattening: Flattening) -> List[Optional[list]]:
+    """Flattened ELLIPSE polylines, subdivided by ezdxf to the chord tolerance"""
+    sizes = [math.hypot(*e.dxf.major_axis) for e in entities]
+    result = []
+    for e, distance in zip(entities, flattening.distances(sizes).tolist()):
+        try:
+            result.append(_rounded(np.array([tuple(v) for v in e.flattening(distance)], dtype=np.float64)))
+        except Exception:
+            result.append(None)
+    return result
+
+def bulge_vertices(points: np.ndarray, closed: bool, flattening: Flattening,
+                   elevation: float = 0.0) -> np.ndarray:
+    """
+    Replace the bulge segments of a polyline by arcs.
+
+    Args:
+        points: (n, 3) rows of x, y, bulge
+        closed: Also flatten the segment from the last to the first vertex
+        flattening: Chord tolerance settings
+        elevation: z of every vertex
+
+    Returns:
+        (m, 3) polyline vertices
+    """
+    xy = points[:, :2]
+    bulges = points[:, 2]
+    if closed and len(points) > 1:
+        xy = np.vstack((xy, xy[:1]))
+    else:
+        bulges = bulges[:-1]
+    p0 = xy[:-1]
+    p1 = xy[1:]
+    chord = p1 - p0
+    length = np.hypot(chord[:, 0], chord[:, 1])
+    arc = (bulges != 0.0) & (length > 0.0)
+
+    # Bulge b = tan(sweep / 4), positive bulges run counter-clockwise
+    sweep = 4.0 * np.arctan(bulges)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        radius = np.where(arc, length * (1.0 + bulges * bulges) / (4.0 * np.abs(bulges)), 0.0)
+        offset = np.where(arc, (1.0 - bulges * bulges) / (4.0 * bulges), 0.0)
+    normal = np.column_stack((-chord[:, 1], chord[:, 0]))
+    center = (p0 + p1) / 2.0 + normal * offset[:, None]
+    counts = arc_segments(radius, sweep, flattening.distances(radius))
+
+    parts = [xy[:1]]
+    for i in range(len(p0)):
+        if arc[i]:
+            start = math.atan2(p0[i, 1] - center[i, 1], p0[i, 0] - center[i, 0])
+            vertices = _arc_vertices(center[i, 0], center[i, 1], radius[i], start, sweep[i], int(counts[i]))
+            # Land exactly on the next vertex
+            vertices[-1, :2] = p1[i]
+            parts.append(vertices[1:, :2])
+        else:
+            parts.append(p1[i:i + 1])
+    flat = np.concatenate(parts)
+    return np.column_stack((flat, np.full(len(flat), elevation)))
+
+def flatten_lwpolylines(entities: List[Any], flattening: Flattening) -> List[Optional[list]]:
+    """Flattened LWPOLYLINE paths, None for polylines without bulges"""
+    result = []
+    for e in entities:
+        points = np.array(list(e.get_points('xyb')), dtype=np.float64).reshape(-1, 3)
+        if not points[:, 2].any():
+            result.append(None)
+            continue
+        elevation = e.dxf.elevation if e.dxf.hasattr('elevation') else 0.0
+        result.append(_rounded(bulge_vertices(points, e.closed, flattening, elevation)))
+    return result
+
+def spline_size(tool) -> float:
+    """Diagonal of the control point extents of a BSpline construction tool"""
+    return BoundingBox(tool.control_points).size.magnitude
+
+def _span_segments(sampled: list, spans: int, base: int, distance: float) -> List[int]:
+    """
+    Segments per knot span, from points sampled at 2 * base per span: every
+    other point is a segment midpoint, and the chord error falls with the
+    square of the segment count.
+    """
+    n = 2 * base
+    counts = []
+    for span in range(spans):
+        worst = 0.0
+        for i in range(span * n, (span + 1) * n, 2):
+            start, mid, end = sampled[i], sampled[i + 1], sampled[i + 2]
+            try:
+                deviation = distance_point_line_3d(mid, start, end)
+            except ZeroDivisionError:
+                # Degenerate chord, e.g. a closed spline
+                deviation = mid.distance(start)
+            worst = max(worst, deviation)
+        if worst > distance:
+            counts.append(max(base, math.ceil(base * math.sqrt(worst / distance))))
+        else:
+            counts.append(base)
+    return counts
+
+def _span_params(knots: List[float], counts: List[int]) -> List[float]:
+    params = [a + (b - a) * i / count for a, b, count in zip(knots, knots[1:], counts) for i in range(count)]
+    params.append(knots[-1])
+    return params
+
+def spline_vertices(e, flattening: Flattening = DEFAULT_FLATTENING) -> np.ndarray:
+    """
+    Flattened SPLINE vertices, (n, 3).
+
+    The construction tool is built once, also for fit point splines. Every
+    knot span is sampled at SPLINE_SPAN_SEGMENTS segments (fewer for splines
+    with very many spans) plus their midpoints in one batch. If midpoints
+    are off by more than the tolerance, the spline is evaluated again in a
+    second batch at the segment count per span their deviation calls for.
+    At most MAX_SPLINE_SEGMENTS segments per spline, or one per knot span.
+    Batched evaluation is several times faster than the recursive
+    BSpline.flattening(), which evaluates one point per call.
+    """
+    tool = e.construction_tool()
+    distance = flattening.distance(spline_size(tool))
+    knots = sorted(set(tool.knots()))
+    if len(knots) < 2:
+        points = list(tool.points(knots))
+    else:
+        spans = len(knots) - 1
+        base = max(1, min(SPLINE_SPAN_SEGMENTS, MAX_SPLINE_SEGMENTS // spans))
+        sampled = list(tool.points(_span_params(knots, [2 * base] * spans)))
+        counts = _span_segments(sampled, spans, base, distance)
+        if all(count == base for count in counts):
+            points = sampled[::2]
+        else:
+            extra = sum(counts) - spans * base
+            room = max(MAX_SPLINE_SEGMENTS - spans * base, 0)
+            if extra > room:
+                # Share the remaining segments in proportion to what each span asked for
+                counts = [base + (count - base) * room // extra for count in counts]
+            points = list(tool.points(_span_params(knots, counts)))
+    return np.fromiter(itertools.chain.from_iterable(points), dtype=np.float64,
+                       count=3 * len(points)).reshape(-1, 3)
+
+# Entity type -> flattener for the "flattened" field
+FLATTENERS = {
+    'ARC': flatten_arcs,
+    'CIRCLE': flatten_circles,
+    'ELLIPSE': flatten_ellipses,
+    'LWPOLYLINE': flatten_lwpolylines,
+}
+
+def add_flattened(etype: str, entities: List[Any], records: List[Optional[Dict[str, Any]]],
+                  flattening: Flattening) -> None:
+    """Attach "flattened" polylines to the records of entities of one type"""
+    flattener = FLATTENERS.get(etype)
+    if flattener is None or not flattening.curves or not entities:
+        return
+    for data, points in zip(records, flattener(entities, flattening)):
+        if data is not None and points is not None:
+            data['flattened'] = points
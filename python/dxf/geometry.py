@@ -0,0 +1,164 @@
+"""
+Batched geometry extraction into per-entity-type column buffers.
+
+Geometry is appended to flat typed buffers per entity type and converted to
+NumPy arrays once at the end, instead of building a dict per entity. Used by
+the columnar output format and the takeoff engine.
+"""
+from array import array
+from typing import Dict, List
+
+import numpy as np
+
+from .flatten import spline_vertices
+
+# Column definitions per section: name -> (array typecode, values per entity or vertex)
+SECTION_COLUMNS = {
+    'LINE': {'start': ('d', 3), 'end': ('d', 3)},
+    'POINT': {'location': ('d', 3)},
+    'CIRCLE': {'center': ('d', 3), 'radius': ('d', 1)},
+    'ARC': {'center': ('d', 3), 'radius': ('d', 1), 'start_angle': ('d', 1), 'end_angle': ('d', 1)},
+    'ELLIPSE': {'center': ('d', 3), 'major_axis': ('d', 3), 'ratio': ('d', 1),
+                'start_param': ('d', 1), 'end_param': ('d', 1)},
+    'LWPOLYLINE': {'vertices': ('d', 3), 'bulges': ('d', 1), 'closed': ('B', 1)},
+    'POLYLINE': {'vertices': ('d', 3), 'bulges': ('d', 1), 'closed': ('B', 1)},
+    'SPLINE': {'vertices': ('d', 3), 'closed': ('B', 1)},
+}
+
+class _Section:
+    """Growable column buffers for one entity type"""
+
+    def __init__(self, columns: Dict[str, tuple]):
+        self.columns = columns
+        self.data = {name: array(code) for name, (code, _) in columns.items()}
+        self.layer = array('I')
+        self.block = array('i')
+        self.handle = array('Q')
+        self.offsets = array('I', [0]) if 'vertices' in columns else None
+        self.count = 0
+
+    def add(self, layer_index: int, block_index: int, handle: str, **values) -> None:
+        self.layer.append(layer_index)
+        self.block.append(block_index)
+        self.handle.append(int(handle, 16) if handle else 0)
+        for name, value in values.items():
+            if isinstance(value, (int, float)):
+                self.data[name].append(value)
+            elif isinstance(value, np.ndarray):
+                self.data[name].frombytes(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+            else:
+                self.data[name].extend(value)
+        if self.offsets is not None:
+            self.offsets.append(len(self.data['vertices']) // 3)
+        self.count += 1
+
+    def as_numpy(self, float_dtype=np.float64, precision: int = 6) -> Dict[str, np.ndarray]:
+        """Convert the buffers to NumPy arrays, rounding coordinates once per array"""
+        arrays = {
+            'layer': np.frombuffer(self.layer, dtype=np.uint32),
+            'block': np.frombuffer(self.block, dtype=np.int32),
+            'handle': np.frombuffer(self.handle, dtype=np.uint64),
+        }
+        for name, (code, width) in self.columns.items():
+            values = np.frombuffer(self.data[name], dtype=np.float64 if code == 'd' else np.uint8)
+            if code == 'd':
+                values = np.round(values, precision).astype(float_dtype, copy=False)
+            if width > 1:
+                values = values.reshape(-1, width)
+            arrays[name] = values
+        if self.offsets is not None:
+            arrays['offsets'] = np.frombuffer(self.offsets, dtype=np.uint32)
+        return arrays
+
+def _xyz(point) -> tuple:
+    return (point[0], point[1], point[2] if len(point) > 2 else 0.0)
+
+class GeometryExtractor:
+    """
+    Collects entity geometry into per-type sections. Layers and block names
+    are interned into index tables; a block index of -1 means the entity is
+    not part of a block reference.
+    """
+
+    def __init__(self):
+        self.layers: List[str] = []
+        self.blocks: List[str] = []
+        self._layer_indices: Dict[str, int] = {}
+        self._block_indices: Dict[str, int] = {}
+        self.sections = {name: _Section(columns) for name, columns in SECTION_COLUMNS.items()}
+
+    def layer_index(self, name: str) -> int:
+        index = self._layer_indices.get(name)
+        if index is None:
+            index = self._layer_indices[name] = len(self.layers)
+            self.layers.append(name)
+        return index
+
+    def block_index(self, name: str) -> int:
+        index = self._block_indices.get(name)
+        if index is None:
+            index = self._block_indices[name] = len(self.blocks)
+            self.blocks.append(name)
+        return index
+
+    def add(self, e, etype: str = None, block_index: int = -1) -> bool:
+        """Append entity geometry to its section, returns False if the type is not columnar"""
+        etype = etype or e.dxftype()
+        section = self.sections.get(etype)
+        if section is None:
+            return False
+
+        dxf = e.dxf
+        if etype == 'POLYLINE' and not (e.is_2d_polyline or e.is_3d_polyline):
+            # Polyface and polygon meshes have no polyline geometry
+            return False
+        if etype == 'SPLINE':
+            try:
+                vertices = spline_vertices(e)
+            except Exception:
+                return False
+
+        layer_index = self.layer_index(dxf.layer)
+        handle = dxf.handle
+        if etype == 'LINE':
+            section.add(layer_index, block_index, handle, start=_xyz(dxf.start), end=_xyz(dxf.end))
+        elif etype == 'POINT':
+            section.add(layer_index, block_index, handle, location=_xyz(dxf.location))
+        elif etype == 'CIRCLE':
+            section.add(layer_index, block_index, handle, center=_xyz(dxf.center), radius=dxf.radius)
+        elif etype == 'ARC':
+            section.add(layer_index, block_index, handle, center=_xyz(dxf.center), radius=dxf.radius,
+                        start_angle=dxf.start_angle, end_angle=dxf.end_angle)
+        elif etype == 'ELLIPSE':
+            section.add(layer_index, block_index, handle, center=_xyz(dxf.center),
+                        major_axis=_xyz(dxf.major_axis), ratio=dxf.ratio,
+                        start_param=dxf.start_param, end_param=dxf.end_param)
+        elif etype == 'LWPOLYLINE':
+            elevation = dxf.elevation if dxf.hasattr('elevation') else 0.0
+            # Rows of x, y, start width, end width, bulge, read as one block
+            points = np.asarray(e.lwpoints.values, dtype=np.float64).reshape(-1, 5)
+            vertices = np.empty((len(points), 3))
+            vertices[:, :2] = points[:, :2]
+            vertices[:, 2] = elevation
+            bulges = points[:, 4]
+            section.add(layer_index, block_index, handle, vertices=vertices, bulges=bulges,
+                        closed=int(e.closed))
+        elif etype == 'POLYLINE':
+            vertices = []
+            bulges = []
+            for v in e.vertices:
+                vertices.extend(_xyz(v.dxf.location))
+                bulges.append(v.dxf.bulge if e.is_2d_polyline else 0.0)
+            section.add(layer_index, block_index, handle, vertices=vertices, bulges=bulges,
+                        closed=int(e.is_closed))
+        elif etype == 'SPLINE':
+            section.add(layer_index, block_index, handle, vertices=vertices, closed=int(e.closed))
+        return True
+
+    def arrays(self, float_dtype=np.float64) -> Dict[str, Dict[str, np.ndarray]]:
+        """NumPy arrays of every non-empty section"""
+        return {
+            name: section.as_numpy(float_dtype)
+            for name, section in self.sections.items()
+            if section.count
+        }
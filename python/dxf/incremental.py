@@ -0,0 +1,342 @@
+"""
+Incremental re-parse of a DXF file that changed on disk.
+
+An IncrementalParser keeps a fingerprint per modelspace entity handle from
+the previous parse. After a change only entities whose fingerprint changed
+are parsed again, and the result is a delta against the previous state:
+
+    {
+      "version": 2,              # 1 for the first parse
+      "full": false,             # true when everything is in "added"
+      "added": [record, ...],
+      "modified": [record, ...],
+      "removed": [{"handle": "1A", "layer": "Walls"}, ...],
+      "unchanged": 12345,
+      "blocks": {...},           # with config.instancing, for the blocks of changed INSERTs
+      "styles": [...]            # with config.styles, the whole style table so far
+    }
+
+Fingerprints are hashes of the raw DXF tags of each entity, taken in one
+pass over the file without building ezdxf entities. An INSERT or DIMENSION
+fingerprint also covers the definition of its block, including nested
+blocks. Fingerprints also cover the LAYER, LTYPE, STYLE and DIMSTYLE records
+the entity or its blocks reference by name, so a changed layer or block
+definition marks only its dependent entities as modified. VPORT, VIEW, UCS
+and APPID records, which most saves rewrite, are not part of any
+fingerprint. Tags are read
+with universal newlines, so any line ending works. Binary DXF, files
+without entity handles and files the scan cannot read (a malformed tag
+stream, no ENTITIES section, fewer fingerprints than modelspace entities)
+fall back to hashing the parsed records.
+"""
+import json
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from ezdxf.lldxf.const import DXFStructureError
+
+from .filters import entity_filter
+from .flatten import flattening_options
+from .parser import (create_render_context, inserted_block_names, is_instancing,
+                     parse_blocks, parse_entities)
+from .styles import style_table
+from .utils.encoder import DXFEncoder
+
+BINARY_SENTINEL = b'AutoCAD Binary DXF'
+# Entities written after their owner and part of its fingerprint
+LINKED_TYPES = {'VERTEX', 'SEQEND', 'ATTRIB'}
+# Entities that reference a block definition by name (group code 2)
+BLOCK_REFERENCES = {'INSERT', 'DIMENSION'}
+# Entities that reference a dimension style by name (group code 3)
+DIMSTYLE_REFERENCES = {'DIMENSION', 'LEADER'}
+# Group codes of table record names: layer, linetype, text style
+RECORD_REFERENCES = {8: 'LAYER', 6: 'LTYPE', 7: 'STYLE'}
+# Tables whose records are part of the fingerprints of the entities using them
+FINGERPRINT_TABLES = {'LAYER', 'LTYPE', 'STYLE', 'DIMSTYLE'}
+
+def _digest() -> 'hashlib.blake2b':
+    return hashlib.blake2b(digest_size=16)
+
+def _tags(f) -> Iterator[Tuple[int, str]]:
+    """
+    (group code, value) of every tag of a text stream, read like ezdxf's
+    ascii_tags_loader() but without building DXFTag objects, which doubles
+    the scan time. Comments are skipped.
+
+    Raises:
+        DXFStructureError: for an invalid group code
+    """
+    lines = iter(f)
+    number = 1
+    for code in lines:
+        value = next(lines, None)
+        if value is None:
+            return
+        try:
+            code = int(code)
+        except ValueError:
+            raise DXFStructureError(f'Invalid group code {code.strip()!r} at line {number}')
+        number += 2
+        if code != 999:
+            yield code, value.rstrip('\n')
+
+def _hash(parts: List[str]) -> bytes:
+    """Digest of tags as text, the file is read as Latin-1 so this hashes its bytes"""
+    h = _digest()
+    h.update(''.join(parts).encode('latin-1'))
+    return h.digest()
+
+class _Chunk:
+    """
+    Raw tags of one modelspace entity with its linked entities, one block
+    definition or one table record, and the names it references
+    """
+
+    def __init__(self, etype: str):
+        self.etype = etype
+        # Type of the (sub)entity whose tags are being added
+        self.current = etype
+        self.parts: List[str] = []
+        self.handle: Optional[str] = None
+        self.name: Optional[str] = None
+        self.paperspace = False
+        # Upper case names of the inserted blocks and referenced table records
+        self.blocks: Set[str] = set()
+        self.records: Set[Tuple[str, str]] = set()
+
+    def add(self, code: int, value: str, raw: str) -> None:
+        self.parts.append(raw)
+        if code == 0:
+            self.current = value
+            return
+        table = RECORD_REFERENCES.get(code)
+        if table is not None:
+            self.records.add((table, value.strip().upper()))
+        elif code == 2:
+            if self.name is None:
+                self.name = value
+            if self.current in BLOCK_REFERENCES:
+                self.blocks.add(value.upper())
+        elif code == 3 and self.current in DIMSTYLE_REFERENCES:
+            self.records.add(('DIMSTYLE', value.strip().upper()))
+        elif code == 5 and self.handle is None:
+            self.handle = value.strip().upper()
+        elif code == 67 and value.strip() == '1':
+            self.paperspace = True
+
+def scan_fingerprints(filepath: str) -> Optional[Dict[str, str]]:
+    """
+    Fingerprints of the modelspace entities of an ASCII DXF file, see
+    module docstring.
+
+    Returns:
+        Dict mapping handles to fingerprints in file order, or None for
+        binary files, files without entity handles, a malformed tag stream
+        and files without an ENTITIES section
+    """
+    # (table, upper case name) -> record, upper case block name -> definition
+    records: Dict[Tuple[str, str], _Chunk] = {}
+    blocks: Dict[str, _Chunk] = {}
+    entities: List[_Chunk] = []
+
+    with open(filepath, 'rb') as f:
+        if f.read(len(BINARY_SENTINEL)) == BINARY_SENTINEL:
+            return None
+    # Latin-1 maps every byte to one character, the tag values are only
+    # compared and hashed; universal newlines handle CR LF, LF and CR-only files
+    with open(filepath, 'r', encoding='latin-1', newline=None) as f:
+        section = None
+        after_section = False
+        found_entities = False
+        chunk: Optional[_Chunk] = None
+        try:
+            for code, value in _tags(f):
+                raw = f'{code}\n{value}\n'
+                if code == 0:
+                    value = value.strip()
+                    if value == 'ENDSEC':
+                        section = None
+                        chunk = None
+                        after_section = False
+                        continue
+                    after_section = value == 'SECTION'
+                elif code == 2:
+                    value = value.strip()
+                    if after_section:
+                        section = value
+                        found_entities = found_entities or value == 'ENTITIES'
+                    after_section = False
+                else:
+                    after_section = False
+
+                if section == 'ENTITIES':
+                    if code == 0 and value not in LINKED_TYPES:
+                        chunk = _Chunk(value)
+                        entities.append(chunk)
+                    if chunk is not None:
+                        chunk.add(code, value, raw)
+                elif section == 'TABLES':
+                    if code == 0:
+                        if chunk is not None and chunk.name is not None:
+                            records[(chunk.etype, chunk.name.upper())] = chunk
+                        # VPORT, VIEW, UCS and APPID records are rewritten on
+                        # most saves and do not change entity output
+                        chunk = _Chunk(value) if value in FINGERPRINT_TABLES else None
+                    if chunk is not None:
+                        chunk.add(code, value, raw)
+                elif section == 'BLOCKS':
+                    if code == 0 and value == 'BLOCK':
+                        chunk = _Chunk(value)
+                    if chunk is None:
+                        continue
+                    chunk.add(code, value, raw)
+                    if code == 0 and value == 'ENDBLK':
+                        if chunk.name is not None:
+                            blocks[chunk.name.upper()] = chunk
+                        chunk = None
+        except DXFStructureError:
+            return None
+    if not found_entities:
+        return None
+
+    resolved_records: Dict[Tuple[str, str], bytes] = {}
+    resolved_blocks: Dict[str, bytes] = {}
+
+    def record_digest(key: Tuple[str, str]) -> bytes:
+        """Digest of a table record and the records it references, like the linetype of a layer"""
+        if key not in resolved_records:
+            record = records.get(key)
+            h = _digest()
+            if record is not None:
+                h.update(''.join(record.parts).encode('latin-1'))
+                for ref in sorted(record.records - {key}):
+                    if ref in records:
+                        h.update(''.join(records[ref].parts).encode('latin-1'))
+            resolved_records[key] = h.digest()
+        return resolved_records[key]
+
+    def chunk_digest(chunk: _Chunk, visiting: Set[str]) -> bytes:
+        """Digest of a chunk, the table records it uses and, recursively, the blocks it inserts"""
+        h = _digest()
+        h.update(''.join(chunk.parts).encode('latin-1'))
+        for key in sorted(chunk.records):
+            h.update(record_digest(key))
+        for name in sorted(chunk.blocks - visiting):
+            h.update(block_digest(name, visiting))
+        return h.digest()
+
+    def block_digest(name: str, visiting: Set[str]) -> bytes:
+        if name not in resolved_blocks:
+            block = blocks.get(name)
+            if block is None:
+                return b''
+            visiting.add(name)
+            resolved_blocks[name] = chunk_digest(block, visiting)
+            visiting.discard(name)
+        return resolved_blocks[name]
+
+    fingerprints: Dict[str, str] = {}
+    for chunk in entities:
+        if chunk.paperspace:
+            continue
+        if chunk.handle is None:
+            return None
+        fingerprints[chunk.handle] = chunk_digest(chunk, set()).hex()
+    return fingerprints
+
+def record_fingerprint(data: Dict[str, Any]) -> str:
+    """Fingerprint of a parsed entity record, used when the raw scan is not possible"""
+    h = _digest()
+    h.update(json.dumps(data, sort_keys=True, cls=DXFEncoder).encode('utf-8'))
+    return h.hexdigest()
+
+class IncrementalParser:
+    """
+    Parse state of one file and config, see module docstring.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config
+        self.version = 0
+        self.fingerprints: Dict[str, str] = {}
+        self.layers: Dict[str, str] = {}
+        # Shared across updates, so style indexes stay valid between deltas
+        self.styles = style_table(config)
+
+    def update(self, doc, filepath: str) -> Dict[str, Any]:
+        """
+        Compare the file against the previous state and parse what changed.
+
+        Args:
+            doc: ezdxf document loaded from the current file
+            filepath: Path of the DXF file, scanned for fingerprints
+
+        Returns:
+            Delta dict, see module docstring
+        """
+        render_context = create_render_context(doc)
+        selection = entity_filter(self.config)
+        instancing = is_instancing(self.config)
+        flattening = flattening_options(self.config)
+        styles = self.styles
+        if styles is not None:
+            # Layers may have changed, unchanged entities keep their indexes
+            styles.clear_resolved()
+
+        fingerprints = scan_fingerprints(filepath)
+        if fingerprints is not None and len(fingerprints) < len(doc.modelspace()):
+            # The scan missed entities ezdxf loaded, trust the parsed records
+            fingerprints = None
+        if fingerprints is None:
+            entities = doc.modelspace() if selection is None else selection.apply(doc.modelspace())
+            records = [data for data in parse_entities(entities, render_context, instancing, flattening, styles)
+                       if data]
+            fingerprints = {data['handle']: record_fingerprint(data) for data in records}
+            records = [data for data in records if self.fingerprints.get(data['handle']) != fingerprints[data['handle']]]
+        else:
+            changed = []
+            entitydb = doc.entitydb
+            for handle, fingerprint in list(fingerprints.items()):
+                if self.fingerprints.get(handle) == fingerprint:
+                    continue
+                entity = entitydb.get(handle)
+                if entity is None:
+                    # Dropped by ezdxf while loading, e.g. invalid geometry
+                    del fingerprints[handle]
+                    continue
+                if selection is not None and not selection.accepts(entity):
+                    # Filtered out, reported as removed if it passed before
+                    del fingerprints[handle]
+                    continue
+                changed.append(entity)
+            records = [data for data in parse_entities(changed, render_context, instancing, flattening, styles)
+                       if data]
+
+        added = []
+        modified = []
+        for data in records:
+            (modified if data['handle'] in self.fingerprints else added).append(data)
+        removed = [{'handle': handle, 'layer': self.layers.get(handle)}
+                   for handle in self.fingerprints if handle not in fingerprints]
+
+        for item in removed:
+            self.layers.pop(item['handle'], None)
+        for data in records:
+            self.layers[data['handle']] = data['layer']
+        first = self.version == 0
+        self.version += 1
+        self.fingerprints = fingerprints
+
+        delta = {
+            'version': self.version,
+            'full': first,
+            'added': added,
+            'modified': modified,
+            'removed': removed,
+            'unchanged': len(fingerprints) - len(records),
+        }
+        if instancing:
+            delta['blocks'] = parse_blocks(doc, inserted_block_names(records), render_context, flattening, styles)
+        if styles is not None:
+            delta['styles'] = styles.entries
+        return delta
@@ -0,0 +1,152 @@
+"""
+Low-memory parsing of very large DXF files.
+
+ezdxf.readfile() materializes every entity before the first one is parsed.
+In low-memory mode the file is read twice instead:
+
+    1. A skeleton copy without the contents of the ENTITIES section is
+       written to a temporary file and loaded with ezdxf. It holds the
+       header, tables, blocks and objects needed to resolve layers and
+       block references, but no modelspace entities.
+    2. Modelspace entities are read one at a time in a single pass over
+       the ENTITIES section (like ezdxf's iterdxf add-on), bound to the
+       skeleton document, parsed and dropped.
+
+Together with the NDJSON streaming output (dxf.streaming) peak memory
+depends on the size of the tables and blocks, not on the entity count.
+Only ASCII DXF files are supported, with CR LF, LF or CR-only line
+endings. The skeleton pass checks every group code, so a malformed file is
+rejected before the first record is written.
+"""
+import io
+import os
+import sys
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+import ezdxf
+from ezdxf.addons import iterdxf
+from ezdxf.entities import factory
+from ezdxf.entities.subentity import entity_linker
+from ezdxf.lldxf.const import DXFStructureError
+from ezdxf.lldxf.extendedtags import ExtendedTags
+from ezdxf.lldxf.types import DXFTag
+from ezdxf.lldxf.tagger import tag_compiler
+
+from .streaming import iter_records
+
+BINARY_SENTINEL = b'AutoCAD Binary DXF'
+
+def _open_lines(filepath: str) -> io.TextIOWrapper:
+    """
+    Lines of a DXF file with universal newlines. Latin-1 maps every byte to
+    one character, so the original bytes are recovered with encode('latin-1').
+    """
+    return open(filepath, 'r', encoding='latin-1', newline=None)
+
+def _tags(lines) -> Iterator[tuple]:
+    """(group code, raw value) pairs of a line stream"""
+    number = 0
+    while True:
+        code = lines.readline()
+        value = lines.readline()
+        if not value:
+            return
+        number += 2
+        try:
+            yield int(code), value.rstrip('\n')
+        except ValueError:
+            raise DXFStructureError(f'Invalid group code {code.strip()!r} at line {number - 1}')
+
+def write_skeleton(filepath: str, out: BinaryIO) -> None:
+    """
+    Copy a DXF file tag by tag, leaving the ENTITIES section empty. Lines are
+    written with LF endings.
+
+    Raises:
+        ValueError: for binary DXF files
+        DXFStructureError: for a malformed tag stream
+    """
+    with open(filepath, 'rb') as f:
+        if f.read(len(BINARY_SENTINEL)) == BINARY_SENTINEL:
+            raise ValueError('Binary DXF files are not supported in low-memory mode')
+    with _open_lines(filepath) as lines:
+        in_entities = False
+        after_section = False
+        for code, value in _tags(lines):
+            tag = (code, value.strip())
+            if in_entities:
+                if tag != (0, 'ENDSEC'):
+                    continue
+                in_entities = False
+            out.write(f'{code}\n{value}\n'.encode('latin-1'))
+            # (0, SECTION) is followed by (2, name)
+            if after_section and tag == (2, 'ENTITIES'):
+                in_entities = True
+            after_section = tag == (0, 'SECTION')
+
+def load_skeleton(filepath: str):
+    """Load the header, tables, blocks and objects of a DXF file, see module docstring"""
+    sys.stderr.write('[PYTHON] Reading DXF tables and blocks\n')
+    fd, skeleton = tempfile.mkstemp(suffix='.dxf', prefix='rapidtakeoff-skeleton-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            write_skeleton(filepath, out)
+        doc = ezdxf.readfile(skeleton)
+    finally:
+        os.unlink(skeleton)
+    sys.stderr.write(f'[PYTHON] Loaded DXF skeleton. Version: {doc.dxfversion}\n')
+    return doc
+
+def _bind(entity, doc):
+    """Attach an entity to doc, files without handles get new ones like on a full load"""
+    entity.doc = doc
+    if not entity.dxf.handle:
+        entity.dxf.handle = doc.entitydb.next_handle()
+    return entity
+
+def iter_modelspace(filepath: str, doc) -> Iterator[Any]:
+    """
+    Modelspace entities of a DXF file read one at a time, bound to doc for
+    block resolution. Follows iterdxf.single_pass_modelspace(), which drops
+    the last entity of the ENTITIES section; the encoding comes from doc.
+    """
+    linked_entity = entity_linker()
+    queued = None
+    tags = []
+    in_entities = False
+    previous = None
+    with _open_lines(filepath) as lines:
+        raw = (DXFTag(code, value.encode('latin-1').decode(doc.encoding, errors='surrogateescape'))
+               for code, value in _tags(lines))
+        for tag in tag_compiler(raw):
+            code, value = tag.code, tag.value
+            if not in_entities:
+                in_entities = code == 2 and value == 'ENTITIES' and previous == (0, 'SECTION')
+                previous = (code, value)
+                continue
+            if code != 0:
+                tags.append(tag)
+                continue
+            if tags and tags[0].value in iterdxf.SUPPORTED_TYPES:
+                entity = factory.load(ExtendedTags(tags))
+                # VERTEX, SEQEND and ATTRIB are collected by their POLYLINE or INSERT
+                if not linked_entity(entity) and entity.dxf.paperspace == 0:
+                    if queued is not None:
+                        yield _bind(queued, doc)
+                    queued = entity
+            if value == 'ENDSEC':
+                break
+            tags = [tag]
+    if queued is not None:
+        yield _bind(queued, doc)
+
+def iter_large_records(filepath: str, config: Optional[Dict[str, Any]] = None,
+                       batch_size: int = 500, progress_every: int = 5000) -> Iterator[Dict[str, Any]]:
+    """
+    NDJSON records (see dxf.streaming) of a file parsed in low-memory mode.
+    The entity count is not known up front, so "total" is null.
+    """
+    doc = load_skeleton(filepath)
+    return iter_records(doc, config, batch_size=batch_size, progress_every=progress_every,
+                        entities=iter_modelspace(filepath, doc))
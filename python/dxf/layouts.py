@@ -0,0 +1,132 @@
+"""
+Lazy access to the modelspace and paperspace layouts of a document.
+
+layout_catalog() lists every layout without parsing a single entity:
+
+    {
+      "name": "A-101",
+      "modelspace": false,
+      "taborder": 1,
+      "entities": 1250,
+      "counts": {"LINE": 1100, "VIEWPORT": 2, ...},
+      "extents": [0, 0, 420, 297],   # [min_x, min_y, max_x, max_y] or null
+      "extents_source": "file"       # "file", "computed" or null
+    }
+
+Extents are the ones stored in the file ($EXTMIN/$EXTMAX for the
+modelspace, the LAYOUT entity for paperspace), which many writers leave
+unset. With compute_extents they are computed for layouts without valid
+stored extents, at about the cost of a parse (see dxf.spatial).
+
+parse_layout() then builds the layer-grouped tree of one layout, like
+parse_document() does for the modelspace. The worker keeps parsed layouts
+per document, layout and config, so a sheet set only pays for the layouts
+the client opens.
+"""
+from typing import Any, Dict, List, Optional
+
+from .filters import filtered
+from .flatten import flattening_options
+from .parser import create_render_context, group_by_layer, is_instancing, parse_entities, parse_tree_blocks
+from .styles import style_table
+
+def _valid_extents(extmin, extmax) -> Optional[List[float]]:
+    if extmin is None or extmax is None:
+        return None
+    box = [float(extmin[0]), float(extmin[1]), float(extmax[0]), float(extmax[1])]
+    # Unset extents are stored as +1e20/-1e20 or all zero
+    if not (box[0] < box[2] or box[1] < box[3]) or max(abs(v) for v in box) >= 1e20:
+        return None
+    return box
+
+def _stored_extents(doc, layout) -> Optional[List[float]]:
+    if layout.is_modelspace:
+        return _valid_extents(doc.header.get('$EXTMIN'), doc.header.get('$EXTMAX'))
+    return _valid_extents(layout.dxf.get('extmin'), layout.dxf.get('extmax'))
+
+def _computed_extents(layout) -> Optional[List[float]]:
+    from .spatial import entity_extents
+    _, boxes = entity_extents(layout)
+    if not len(boxes):
+        return None
+    return [float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+            float(boxes[:, 2].max()), float(boxes[:, 3].max())]
+
+def get_layout(doc, name: str):
+    """
+    Layout by name, case-insensitive like AutoCAD.
+
+    Raises:
+        KeyError: if the document has no layout of that name
+    """
+    for candidate in doc.layouts.names():
+        if candidate.lower() == name.lower():
+            return doc.layouts.get(candidate)
+    raise KeyError(f"No layout named {name!r}")
+
+def layout_catalog(doc, compute_extents: bool = False) -> List[Dict[str, Any]]:
+    """
+    List the layouts of a document in tab order, see module docstring.
+
+    Args:
+        doc: ezdxf document
+        compute_extents: Compute extents that are not stored in the file
+    """
+    catalog = []
+    for name in doc.layouts.names_in_taborder():
+        layout = doc.layouts.get(name)
+        counts: Dict[str, int] = {}
+        for e in layout:
+            etype = e.dxftype()
+            counts[etype] = counts.get(etype, 0) + 1
+        extents = _stored_extents(doc, layout)
+        source = 'file' if extents is not None else None
+        if extents is None and compute_extents and counts:
+            extents = _computed_extents(layout)
+            source = 'computed' if extents is not None else None
+        catalog.append({
+            'name': name,
+            'modelspace': layout.is_modelspace,
+            'taborder': layout.dxf.get('taborder', 0),
+            'entities': sum(counts.values()),
+            'counts': counts,
+            'extents': extents,
+            'extents_source': source,
+        })
+    return catalog
+
+def parse_layout(doc, name: str, config: Optional[Dict[str, Any]] = None,
+                 render_context=None) -> Dict[str, Any]:
+    """
+    Parse the entities of one layout.
+
+    Args:
+        doc: ezdxf document
+        name: Layout name, see layout_catalog()
+        config: Optional parser configuration, as for parse_document()
+        render_context: Optional RenderContext to reuse, created if not
+            given; its current layout is switched to this one
+
+    Returns:
+        Dict with 'name' and 'tree' (layer name -> entity list), plus
+        'blocks' when the config enables instancing and 'styles' when it
+        enables the style table
+
+    Raises:
+        KeyError: if the document has no layout of that name
+    """
+    layout = get_layout(doc, name)
+    if render_context is None:
+        render_context = create_render_context(doc)
+    if render_context is not None:
+        # Paperspace resolves some properties differently from the modelspace
+        render_context.set_current_layout(layout)
+    styles = style_table(config)
+    flattening = flattening_options(config)
+    tree = group_by_layer(parse_entities(filtered(layout, config), render_context, is_instancing(config), flattening, styles))
+    result: Dict[str, Any] = {'name': layout.name, 'tree': tree}
+    if is_instancing(config):
+        result['blocks'] = parse_tree_blocks(doc, tree, render_context, flattening, styles)
+    if styles is not None:
+        result['styles'] = styles.entries
+    return result
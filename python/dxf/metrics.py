@@ -0,0 +1,138 @@
+"""
+Per-phase timing and counters of a parse or render.
+
+Library code records spans and counters on the active collector:
+
+    with metrics.span('readfile'):
+        doc = ezdxf.readfile(filepath)
+    metrics.count('entities', 'LINE', 250)
+
+Outside of collect() both are no-ops, so instrumented code costs next to
+nothing when nobody listens. Entry points wrap a request:
+
+    with metrics.collect() as collected:
+        ...
+    metrics.emit(collected.record())
+
+and emit() writes the record as one line to stderr, which the Electron side
+picks up (utils/dxf/metrics.ts):
+
+    [PYTHON] Metrics: {"kind": "metrics", "version": 1, "seconds": 1.93,
+                       "spans": {"readfile": {"seconds": 0.81, "calls": 1}, ...},
+                       "counts": {"entities": {"LINE": 5120, ...},
+                                  "unsupported": {"PROXY": 2}, "errors": {"HATCH": 1}}}
+
+The worker puts the record into the "metrics" field of its response instead.
+
+Spans in use: readfile, render_context, entities.<TYPE> (the entity loop per
+type, including INSERT expansion), blocks (block definitions of instancing
+output), render and serialize. Spans nest, the time of a span includes the
+spans inside it. Counters: entities per type, entities skipped by the config
+filter per type (filtered, see dxf.filters), unsupported entities per type
+and entities whose record carries an error, per type. Entities of block
+definitions parsed for instancing output are counted as well.
+"""
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+RECORD_VERSION = 1
+PREFIX = '[PYTHON] Metrics: '
+# Record keys the entity parsers set when part of an entity failed
+ERROR_KEYS = ('error', 'boundary_error', 'block_error')
+
+class Metrics:
+    """Spans and counters of one request, see module docstring"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Span name -> [seconds, calls]
+        self.spans: Dict[str, list] = {}
+        # Counter group -> key -> count
+        self.counts: Dict[str, Dict[str, int]] = {}
+        # The pipeline renders on a thread while the tree is built
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [seconds, calls]
+            else:
+                span[0] += seconds
+                span[1] += calls
+
+    def count(self, group: str, key: str, n: int = 1) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(group, {})
+            counts[key] = counts.get(key, 0) + n
+
+    def count_records(self, records) -> None:
+        """Count unsupported and failed entities among parsed records"""
+        for data in records:
+            if not data:
+                continue
+            if data.get('unsupported'):
+                self.count('unsupported', data['type'])
+            if any(key in data for key in ERROR_KEYS):
+                self.count('errors', data['type'])
+
+    def record(self, **extra: Any) -> Dict[str, Any]:
+        """The machine-readable metrics record, extra keys are added as is"""
+        with self._lock:
+            return {
+                'kind': 'metrics',
+                'version': RECORD_VERSION,
+                **extra,
+                'seconds': round(time.perf_counter() - self.started, 6),
+                'spans': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                          for name, (seconds, calls) in self.spans.items()},
+                'counts': {group: dict(counts) for group, counts in self.counts.items()},
+            }
+
+_active: Optional[Metrics] = None
+
+def active() -> Optional[Metrics]:
+    """The collector of the current request, None outside of collect()"""
+    return _active
+
+@contextmanager
+def collect() -> Iterator[Metrics]:
+    """
+    Collect spans and counters until the block ends. Nested calls share the
+    outer collector.
+    """
+    global _active
+    if _active is not None:
+        yield _active
+        return
+    _active = Metrics()
+    try:
+        yield _active
+    finally:
+        _active = None
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Add the time of the block to a span of the active collector"""
+    collected = _active
+    if collected is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        collected.add(name, time.perf_counter() - started)
+
+def count(group: str, key: str, n: int = 1) -> None:
+    """Increment a counter of the active collector"""
+    if _active is not None:
+        _active.count(group, key, n)
+
+def emit(record: Dict[str, Any]) -> None:
+    """Write a metrics record as one line to stderr"""
+    sys.stderr.write(PREFIX + json.dumps(record, separators=(',', ':')) + '\n')
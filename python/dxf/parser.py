@@ -2,27 +2,47 @@
 Main parser module for DXF files
 """
 import sys
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Iterable, Iterator, Optional
 
 try:
     import ezdxf
     from ezdxf.math import Vec2, Vec3
-    from ezdxf.addons.drawing import Frontend, RenderContext
-    from ezdxf.addons.drawing.properties import LayoutProperties
 except ImportError:
     sys.stderr.write('Error: ezdxf is required. Install via pip install ezdxf\n')
     sys.exit(1)
 
+from . import metrics
+from .filters import filtered
+from .flatten import Flattening, add_flattened, flattening_options
+from .styles import StyleTable
 from .utils.encoder import DXFEncoder, format_points, round_point
 from .parsers import (
     basic_entities,
     curve_entities,
     complex_entities,
     text_entities,
+    batch_entities,
     organizational_entities,
     advanced_entities
 )
 
+def load_document(filepath: str):
+    """
+    Read a DXF file with ezdxf.
+    
+    Args:
+        filepath: Path to the DXF file
+        
+    Returns:
+        The loaded ezdxf document
+    """
+    sys.stderr.write('[PYTHON] Reading DXF file with ezdxf\n')
+    with metrics.span('readfile'):
+        doc = ezdxf.readfile(filepath)
+    sys.stderr.write(f'[PYTHON] Successfully loaded DXF file. Version: {doc.dxfversion}\n')
+    return doc
+
 def parse_dxf(filepath: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
     Parse DXF file using ezdxf and extract entity data.
@@ -35,144 +55,372 @@ def parse_dxf(filepath: str, config: Optional[Dict[str, Any]] = None) -> Dict[st
         Dict mapping layer names to lists of entity data
     """
     sys.stderr.write(f'[PYTHON] Starting to parse DXF file: {filepath}\n')
-    if config:
-        sys.stderr.write(f'[PYTHON] Using config\n')
-        # Extract SVG-specific config if available
-        svg_config = config.get('svg', {}) if isinstance(config, dict) else {}
-        if svg_config:
-            sys.stderr.write(f'[PYTHON] Found SVG config section with {len(svg_config)} parameters\n')
-    
     try:
-        sys.stderr.write('[PYTHON] Reading DXF file with ezdxf\n')
-        doc = ezdxf.readfile(filepath)
-        sys.stderr.write(f'[PYTHON] Successfully loaded DXF file. Version: {doc.dxfversion}\n')
+        doc = load_document(filepath)
     except Exception as e:
         sys.stderr.write(f'[PYTHON] Error reading DXF file: {e}\n')
         sys.exit(1)
     
-    sys.stderr.write('[PYTHON] Accessing modelspace\n')
-    msp = doc.modelspace()
-    sys.stderr.write(f'[PYTHON] DXF modelspace accessed. Found layers: {[layer.dxf.name for layer in doc.layers]}\n')
-    tree = {}
+    return parse_document(doc, config)
+
+def create_render_context(doc):
+    """
+    Create a RenderContext for resolving drawing properties like colors.
     
-    # Create a RenderContext to get access to the drawing properties
-    render_context = None
-    frontend = None
+    Args:
+        doc: ezdxf document
+        
+    Returns:
+        RenderContext, or None if it could not be created
+    """
+    # The Frontend is not needed here - it requires an output backend
     try:
         sys.stderr.write('[PYTHON] Creating render context\n')
-        render_context = RenderContext(doc)
-        layout_properties = LayoutProperties.from_layout(msp)
-        frontend = Frontend(render_context, layout_properties)
+        # The drawing add-on is only imported once a render context is needed
+        with metrics.span('render_context'):
+            from ezdxf.addons.drawing import RenderContext
+            render_context = RenderContext(doc)
         sys.stderr.write('[PYTHON] Render context created successfully\n')
+        return render_context
     except Exception as e:
         sys.stderr.write(f'[PYTHON] Warning: Could not create render context: {e}\n')
+        return None
+
+def parse_document(doc, config: Optional[Dict[str, Any]] = None, render_context=None,
+                   styles: Optional[StyleTable] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Extract entity data from an already loaded ezdxf document.
     
-    # Process each entity in the model space
-    for e in msp:
-        etype = e.dxftype()
-        layer = e.dxf.layer
-        
-        # Common attributes for all entities
-        common_attrs = {
-            'type': etype,
-            'handle': e.dxf.handle,
-            'layer': layer
-        }
-        
-        # Add color information if available
-        try:
-            if hasattr(e.dxf, 'color'):
-                color_value = e.dxf.color
-                common_attrs['color'] = color_value
-                # Try to get the actual RGB color
-                if render_context:
-                    try:
-                        rgb = render_context.colors.get_color(e)
-                        if rgb:
-                            common_attrs['rgb'] = rgb.hex_rgb()
-                    except:
-                        pass
-        except Exception:
-            pass
-            
-        # Add linetype information if available
-        try:
-            if hasattr(e.dxf, 'linetype'):
-                common_attrs['linetype'] = e.dxf.linetype
-        except Exception:
-            pass
-        
-        # Entity-specific attributes
-        data = None
+    Args:
+        doc: ezdxf document, e.g. from load_document()
+        config: Optional configuration parameters; {'instancing': true} emits
+            INSERTs as block references, see parse_tree_blocks(), 'flatten'
+            sets the chord tolerance of curves, see dxf.flatten, 'styles' is
+            read by the callers that emit the style table, see dxf.styles,
+            'filter' selects the entities to parse, see dxf.filters
+        render_context: Optional RenderContext to reuse, created if not given
+        styles: Optional StyleTable, records then carry a style index
+            instead of their color and linetype, see dxf.styles
         
-        # --------- BASIC GEOMETRIC ENTITIES ---------
-        if etype == 'LINE':
-            data = basic_entities.parse_line(e, common_attrs)
-        elif etype == 'POINT':
-            data = basic_entities.parse_point(e, common_attrs)
-        elif etype == 'CIRCLE':
-            data = basic_entities.parse_circle(e, common_attrs)
-        elif etype == 'ARC':
-            data = basic_entities.parse_arc(e, common_attrs)
-        elif etype == 'ELLIPSE':
-            data = basic_entities.parse_ellipse(e, common_attrs)
+    Returns:
+        Dict mapping layer names to lists of entity data
+    """
+    msp, render_context = _prepare(doc, config, render_context)
+    records = parse_entities(filtered(msp, config), render_context, is_instancing(config),
+                             flattening_options(config), styles)
+    return group_by_layer(records)
+
+def group_by_layer(records) -> Dict[str, List[Dict[str, Any]]]:
+    """Group records by layer, keeping their order within each layer"""
+    tree = {}
+    for data in records:
+        if data:
+            tree.setdefault(data['layer'], []).append(data)
+    
+    return tree
+
+def parse_entities(entities, render_context=None, instancing: bool = False,
+                   flattening: Optional[Flattening] = None,
+                   styles: Optional[StyleTable] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Convert a sequence of entities into records, in their original order.
+    
+    Args:
+        entities: Iterable of ezdxf entities, e.g. a layout or block
+        render_context: Optional RenderContext used to resolve RGB colors
+        instancing: Emit INSERTs as block references instead of expanding them
+        flattening: Chord tolerance of flattened curves, see dxf.flatten
+        styles: Optional StyleTable the style indexes refer to, see dxf.styles
         
-        # --------- CURVE ENTITIES ---------
-        elif etype == 'LWPOLYLINE':
-            data = curve_entities.parse_lwpolyline(e, common_attrs)
-        elif etype == 'POLYLINE':
-            data = curve_entities.parse_polyline(e, common_attrs)
-        elif etype == 'SPLINE':
-            data = curve_entities.parse_spline(e, common_attrs)
-        elif etype == 'HELIX':
-            data = curve_entities.parse_helix(e, common_attrs)
-        elif etype == 'LEADER':
-            data = curve_entities.parse_leader(e, common_attrs)
+    Returns:
+        List of entity data dicts, None where an entity produced no data
+    """
+    entities = list(entities)
+    records: List[Optional[Dict[str, Any]]] = [None] * len(entities)
+    collected = metrics.active()
+    
+    # Bucket high-volume geometry by type for the batched parsers,
+    # everything else goes through parse_entity() one by one
+    buckets: Dict[str, List[int]] = {}
+    for i, e in enumerate(entities):
+        etype = e.dxftype()
+        if etype in batch_entities.BATCH_PARSERS:
+            buckets.setdefault(etype, []).append(i)
+        elif collected is None:
+            records[i] = parse_entity(e, render_context, instancing, flattening, styles)
+        else:
+            started = time.perf_counter()
+            records[i] = parse_entity(e, render_context, instancing, flattening, styles)
+            collected.add(f'entities.{etype}', time.perf_counter() - started)
+            collected.count('entities', etype)
+    
+    for etype, indices in buckets.items():
+        started = time.perf_counter()
+        batch = [entities[i] for i in indices]
+        common = [common_attributes(e, render_context, styles) for e in batch]
+        for i, data in zip(indices, batch_entities.BATCH_PARSERS[etype](batch, common)):
+            records[i] = data
+        if flattening is not None:
+            add_flattened(etype, batch, common, flattening)
+        if collected is not None:
+            collected.add(f'entities.{etype}', time.perf_counter() - started, len(indices))
+            collected.count('entities', etype, len(indices))
+    
+    if collected is not None:
+        collected.count_records(records)
+    return records
+
+def is_instancing(config: Optional[Dict[str, Any]]) -> bool:
+    """True if the config asks for INSERTs as block references plus a blocks table"""
+    return isinstance(config, dict) and bool(config.get('instancing'))
+
+def inserted_block_names(records) -> List[str]:
+    """Block names referenced by INSERT records, in first-use order"""
+    names = {}
+    for data in records:
+        if data and data['type'] == 'INSERT':
+            names.setdefault(data['name'], None)
+    return list(names)
+
+def parse_blocks(doc, names, render_context=None, flattening: Optional[Flattening] = None,
+                 styles: Optional[StyleTable] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the blocks table for instancing output. Every block definition is
+    parsed once in block coordinates; blocks referenced from inside other
+    blocks are included as well.
+    
+    Args:
+        doc: ezdxf document
+        names: Names of the blocks referenced from the layout
+        render_context: Optional RenderContext used to resolve RGB colors
+        flattening: Chord tolerance of flattened curves, see dxf.flatten
+        styles: Optional StyleTable shared with the layout records
         
-        # --------- COMPLEX ENTITIES ---------
-        elif etype == 'HATCH':
-            data = complex_entities.parse_hatch(e, common_attrs)
-        elif etype == 'SOLID':
-            data = complex_entities.parse_solid(e, common_attrs)
-        elif etype == '3DFACE':
-            data = complex_entities.parse_3dface(e, common_attrs)
-        elif etype == 'MESH':
-            data = complex_entities.parse_mesh(e, common_attrs)
-        elif etype == '3DSOLID' or etype == 'BODY':
-            data = complex_entities.parse_3dsolid(e, common_attrs)
+    Returns:
+        Dict mapping block names to their definition records
+    """
+    blocks = {}
+    pending = list(names)
+    with metrics.span('blocks'):
+        while pending:
+            name = pending.pop()
+            if name in blocks:
+                continue
+            block = doc.blocks.get(name)
+            if block is None:
+                sys.stderr.write(f'[PYTHON] Warning: INSERT references missing block {name}\n')
+                continue
+            records = [data for data in parse_entities(block, render_context, True, flattening, styles) if data]
+            blocks[name] = organizational_entities.parse_block_definition(block, records)
+            pending.extend(inserted_block_names(records))
+    
+    sys.stderr.write(f'[PYTHON] Parsed {len(blocks)} block definitions\n')
+    return blocks
+
+def parse_tree_blocks(doc, tree: Dict[str, List[Dict[str, Any]]], render_context=None,
+                      flattening: Optional[Flattening] = None,
+                      styles: Optional[StyleTable] = None) -> Dict[str, Dict[str, Any]]:
+    """Blocks table for the INSERT records of a layer-grouped tree"""
+    records = (data for entities in tree.values() for data in entities)
+    return parse_blocks(doc, inserted_block_names(records), render_context, flattening, styles)
+
+def _prepare(doc, config: Optional[Dict[str, Any]] = None, render_context=None):
+    """Log the configuration and layers, and create the render context if needed"""
+    if config:
+        sys.stderr.write(f'[PYTHON] Using config\n')
+        # Extract SVG-specific config if available
+        svg_config = config.get('svg', {}) if isinstance(config, dict) else {}
+        if svg_config:
+            sys.stderr.write(f'[PYTHON] Found SVG config section with {len(svg_config)} parameters\n')
+    
+    sys.stderr.write('[PYTHON] Accessing modelspace\n')
+    msp = doc.modelspace()
+    sys.stderr.write(f'[PYTHON] DXF modelspace accessed. Found {len(doc.layers)} layers\n')
+    
+    # Create a RenderContext to get access to the drawing properties
+    if render_context is None:
+        render_context = create_render_context(doc)
+    
+    return msp, render_context
+
+def iter_entities(doc, config: Optional[Dict[str, Any]] = None, render_context=None,
+                  entities: Optional[Iterable[Any]] = None,
+                  styles: Optional[StyleTable] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily extract entity data from the modelspace of a document.
+    
+    Args:
+        doc: ezdxf document, e.g. from load_document()
+        config: Optional configuration parameters
+        render_context: Optional RenderContext to reuse, created if not given
+        entities: Optional entities to parse instead of the modelspace
+        styles: Optional StyleTable the style indexes refer to, see dxf.styles
         
-        # --------- DIMENSION ENTITIES ---------
-        elif etype == 'DIMENSION':
-            data = text_entities.parse_dimension(e, common_attrs)
-        elif etype == 'MTEXT' or etype == 'TEXT':
-            data = text_entities.parse_text(e, common_attrs)
+    Yields:
+        Entity data dicts in modelspace order
+    """
+    msp, render_context = _prepare(doc, config, render_context)
+    instancing = is_instancing(config)
+    flattening = flattening_options(config)
+    collected = metrics.active()
+    
+    # Process each entity in the model space
+    for e in filtered(msp if entities is None else entities, config):
+        if collected is None:
+            data = parse_entity(e, render_context, instancing, flattening, styles)
+        else:
+            etype = e.dxftype()
+            started = time.perf_counter()
+            data = parse_entity(e, render_context, instancing, flattening, styles)
+            collected.add(f'entities.{etype}', time.perf_counter() - started)
+            collected.count('entities', etype)
+            collected.count_records((data,))
+        if data:
+            yield data
+
+def common_attributes(e, render_context=None, styles: Optional[StyleTable] = None) -> Dict[str, Any]:
+    """
+    Collect the attributes shared by all entity records.
+    
+    Args:
+        e: ezdxf entity
+        render_context: Optional RenderContext used to resolve RGB colors
+        styles: Optional StyleTable, replaces color and linetype by a style index
         
-        # --------- ORGANIZATIONAL ENTITIES ---------
-        elif etype == 'INSERT':
-            data = organizational_entities.parse_insert(e, common_attrs)
-        elif etype == 'ATTDEF' or etype == 'ATTRIB':
-            data = organizational_entities.parse_attribute(e, common_attrs)
+    Returns:
+        Dict with type, handle, layer and, where available, color, rgb and
+        linetype, or style with a StyleTable
+    """
+    layer = e.dxf.layer
+    
+    # Common attributes for all entities
+    common_attrs = {
+        'type': e.dxftype(),
+        'handle': e.dxf.handle,
+        'layer': layer
+    }
+    
+    if styles is not None:
+        common_attrs['style'] = styles.index(e, render_context)
+        return common_attrs
+    
+    # Add color information if available
+    try:
+        if hasattr(e.dxf, 'color'):
+            color_value = e.dxf.color
+            common_attrs['color'] = color_value
+            # Try to get the actual RGB color
+            if render_context:
+                try:
+                    rgb = render_context.colors.get_color(e)
+                    if rgb:
+                        common_attrs['rgb'] = rgb.hex_rgb()
+                except:
+                    pass
+    except Exception:
+        pass
         
-        # --------- ADVANCED ENTITIES ---------
-        elif etype == 'IMAGE':
-            data = advanced_entities.parse_image(e, common_attrs)
-        elif etype == 'WIPEOUT':
-            data = advanced_entities.parse_wipeout(e, common_attrs)
-        elif etype == 'ACAD_TABLE':
-            data = advanced_entities.parse_acad_table(e, common_attrs)
-        elif etype == 'MLINE':
-            data = advanced_entities.parse_mline(e, common_attrs)
+    # Add linetype information if available
+    try:
+        if hasattr(e.dxf, 'linetype'):
+            common_attrs['linetype'] = e.dxf.linetype
+    except Exception:
+        pass
+    
+    return common_attrs
+
+def parse_entity(e, render_context=None, instancing: bool = False,
+                 flattening: Optional[Flattening] = None,
+                 styles: Optional[StyleTable] = None) -> Optional[Dict[str, Any]]:
+    """
+    Convert a single DXF entity into its JSON-serializable representation.
+    
+    Args:
+        e: ezdxf entity
+        render_context: Optional RenderContext used to resolve RGB colors
+        instancing: Emit an INSERT as a block reference instead of expanding it
+        flattening: Chord tolerance of flattened curves, see dxf.flatten
+        styles: Optional StyleTable the style index refers to, see dxf.styles
         
-        # --------- CATCH-ALL FOR OTHER ENTITIES ---------
+    Returns:
+        Dict with the entity data, or None if the entity produced no data
+    """
+    etype = e.dxftype()
+    common_attrs = common_attributes(e, render_context, styles)
+    
+    # Entity-specific attributes
+    data = None
+    
+    # --------- BASIC GEOMETRIC ENTITIES ---------
+    if etype == 'LINE':
+        data = basic_entities.parse_line(e, common_attrs)
+    elif etype == 'POINT':
+        data = basic_entities.parse_point(e, common_attrs)
+    elif etype == 'CIRCLE':
+        data = basic_entities.parse_circle(e, common_attrs)
+    elif etype == 'ARC':
+        data = basic_entities.parse_arc(e, common_attrs)
+    elif etype == 'ELLIPSE':
+        data = basic_entities.parse_ellipse(e, common_attrs)
+    
+    # --------- CURVE ENTITIES ---------
+    elif etype == 'LWPOLYLINE':
+        data = curve_entities.parse_lwpolyline(e, common_attrs)
+    elif etype == 'POLYLINE':
+        data = curve_entities.parse_polyline(e, common_attrs)
+    elif etype == 'SPLINE':
+        data = curve_entities.parse_spline(e, common_attrs, flattening)
+    elif etype == 'HELIX':
+        data = curve_entities.parse_helix(e, common_attrs)
+    elif etype == 'LEADER':
+        data = curve_entities.parse_leader(e, common_attrs)
+    
+    # --------- COMPLEX ENTITIES ---------
+    elif etype == 'HATCH':
+        data = complex_entities.parse_hatch(e, common_attrs)
+    elif etype == 'SOLID':
+        data = complex_entities.parse_solid(e, common_attrs)
+    elif etype == '3DFACE':
+        data = complex_entities.parse_3dface(e, common_attrs)
+    elif etype == 'MESH':
+        data = complex_entities.parse_mesh(e, common_attrs)
+    elif etype == '3DSOLID' or etype == 'BODY':
+        data = complex_entities.parse_3dsolid(e, common_attrs)
+    
+    # --------- DIMENSION ENTITIES ---------
+    elif etype == 'DIMENSION':
+        data = text_entities.parse_dimension(e, common_attrs)
+    elif etype == 'MTEXT' or etype == 'TEXT':
+        data = text_entities.parse_text(e, common_attrs)
+    
+    # --------- ORGANIZATIONAL ENTITIES ---------
+    elif etype == 'INSERT':
+        if instancing:
+            data = organizational_entities.parse_insert_reference(e, common_attrs)
         else:
-            # Include basic information for unsupported entity types
-            data = {
-                **common_attrs,
-                'unsupported': True,
-            }
-        
-        # Add the entity data to the tree, grouped by layer
-        if data:
-            tree.setdefault(layer, []).append(data)
+            data = organizational_entities.parse_insert(e, common_attrs)
+    elif etype == 'ATTDEF' or etype == 'ATTRIB':
+        data = organizational_entities.parse_attribute(e, common_attrs)
+    
+    # --------- ADVANCED ENTITIES ---------
+    elif etype == 'IMAGE':
+        data = advanced_entities.parse_image(e, common_attrs)
+    elif etype == 'WIPEOUT':
+        data = advanced_entities.parse_wipeout(e, common_attrs)
+    elif etype == 'ACAD_TABLE':
+        data = advanced_entities.parse_acad_table(e, common_attrs)
+    elif etype == 'MLINE':
+        data = advanced_entities.parse_mline(e, common_attrs)
+    
+    # --------- CATCH-ALL FOR OTHER ENTITIES ---------
+    else:
+        # Include basic information for unsupported entity types
+        data = {
+            **common_attrs,
+            'unsupported': True,
+        }
+    
+    if flattening is not None:
+        add_flattened(etype, [e], [data], flattening)
     
-    return tree
\ No newline at end of file
+    return data
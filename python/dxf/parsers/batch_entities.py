@@ -0,0 +1,136 @@
+"""
+Batched parsers for high-volume geometric entities (LINE, POINT, CIRCLE, ARC,
+LWPOLYLINE, POLYLINE)
+
+Each parser takes all entities of one type at once together with their
+common attributes, pulls the coordinates into one preallocated NumPy array
+and rounds it in a single call. The output records are identical to the
+per-entity parsers, see _rounded().
+"""
+from itertools import chain
+from typing import Any, Dict, List
+
+import numpy as np
+
+PRECISION = 6
+
+def _coordinates(values, count: int) -> np.ndarray:
+    """Fill a preallocated float64 array from an iterable of numbers"""
+    return np.fromiter(values, dtype=np.float64, count=count)
+
+def _rounded(values: np.ndarray) -> list:
+    """
+    Round like Python's round(x, PRECISION), which the per-entity parsers
+    use. np.round() scales by 10**PRECISION first, so it can decide the
+    other way when the scaled value is within its rounding error of a half,
+    and it is inexact when the scaled value is too large to hold a fraction.
+    Only those values are rounded again in Python.
+    """
+    scaled = values * 10.0 ** PRECISION
+    rounded = np.round(values, PRECISION)
+    magnitude = np.abs(scaled)
+    undecided = (np.abs(magnitude - np.floor(magnitude) - 0.5) <= magnitude * 1e-15) | (magnitude >= 2.0 ** 52)
+    if undecided.any():
+        flat_values = values.reshape(-1)
+        flat = rounded.reshape(-1)
+        for i in np.flatnonzero(undecided).tolist():
+            flat[i] = round(float(flat_values[i]), PRECISION)
+    return rounded.tolist()
+
+def parse_lines(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse LINE entities"""
+    n = len(entities)
+    coords = _coordinates(chain.from_iterable(chain(e.dxf.start, e.dxf.end) for e in entities), n * 6)
+    for data, (start, end) in zip(common, _rounded(coords.reshape(n, 2, 3))):
+        data['start'] = start
+        data['end'] = end
+    return common
+
+def parse_points(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse POINT entities"""
+    n = len(entities)
+    coords = _coordinates(chain.from_iterable(e.dxf.location for e in entities), n * 3)
+    for data, location in zip(common, _rounded(coords.reshape(n, 3))):
+        data['location'] = location
+    return common
+
+def parse_circles(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse CIRCLE entities"""
+    n = len(entities)
+    coords = _coordinates(chain.from_iterable(chain(e.dxf.center, (e.dxf.radius,)) for e in entities), n * 4)
+    for data, values in zip(common, _rounded(coords.reshape(n, 4))):
+        data['center'] = values[:3]
+        data['radius'] = values[3]
+    return common
+
+def parse_arcs(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse ARC entities"""
+    n = len(entities)
+    coords = _coordinates(
+        chain.from_iterable(
+            chain(e.dxf.center, (e.dxf.radius, e.dxf.start_angle, e.dxf.end_angle)) for e in entities
+        ),
+        n * 6,
+    ).reshape(n, 6)
+    # SVG arc flags from the unrounded angles, DXF arcs are always CCW
+    large_arc = (np.abs(coords[:, 5] - coords[:, 4]) > 180).tolist()
+    for data, values, is_large_arc in zip(common, _rounded(coords), large_arc):
+        data['center'] = values[:3]
+        data['radius'] = values[3]
+        data['start_angle'] = values[4]
+        data['end_angle'] = values[5]
+        data['large_arc'] = is_large_arc
+        data['sweep'] = True
+    return common
+
+def _split(vertices: np.ndarray, counts: List[int]) -> List[list]:
+    """Round all vertices at once and split them into per-entity point lists"""
+    rounded = _rounded(vertices)
+    points = []
+    start = 0
+    for count in counts:
+        points.append(rounded[start:start + count])
+        start += count
+    return points
+
+def _lwpolyline_values(entity) -> np.ndarray:
+    """Raw (x, y, start_width, end_width, bulge) rows of a LWPOLYLINE"""
+    lwpoints = getattr(entity, 'lwpoints', None)
+    values = getattr(lwpoints, 'values', None)
+    if values is None:
+        values = list(chain.from_iterable(entity.get_points('xyseb')))
+    return np.asarray(values, dtype=np.float64).reshape(-1, 5)
+
+def parse_lwpolylines(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse LWPOLYLINE entities"""
+    rows = [_lwpolyline_values(e) for e in entities]
+    vertices = np.concatenate(rows) if rows else np.empty((0, 5))
+    points = _split(vertices, [len(r) for r in rows])
+    for data, entity, entity_points in zip(common, entities, points):
+        dxf = entity.dxf
+        data['points'] = entity_points
+        data['closed'] = entity.closed
+        data['const_width'] = dxf.const_width if hasattr(dxf, 'const_width') else 0
+    return common
+
+def parse_polylines(entities: List[Any], common: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse POLYLINE entities"""
+    locations = [[v.dxf.location for v in e.vertices] for e in entities]
+    counts = [len(loc) for loc in locations]
+    total = sum(counts)
+    vertices = _coordinates(chain.from_iterable(chain.from_iterable(locations)), total * 3)
+    points = _split(vertices.reshape(total, 3), counts)
+    for data, entity, entity_points in zip(common, entities, points):
+        data['points'] = entity_points
+        data['closed'] = entity.closed if hasattr(entity, 'closed') else False
+    return common
+
+# Entity type -> batched parser
+BATCH_PARSERS = {
+    'LINE': parse_lines,
+    'POINT': parse_points,
+    'CIRCLE': parse_circles,
+    'ARC': parse_arcs,
+    'LWPOLYLINE': parse_lwpolylines,
+    'POLYLINE': parse_polylines,
+}
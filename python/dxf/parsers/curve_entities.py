@@ -1,6 +1,7 @@
 """
 Parser for curve entities (LWPOLYLINE, POLYLINE, SPLINE, HELIX, LEADER)
 """
+from ..flatten import DEFAULT_FLATTENING, spline_vertices
 from ..utils.encoder import format_points, round_point
 
 def parse_lwpolyline(entity, common_attrs):
@@ -25,8 +26,8 @@ def parse_polyline(entity, common_attrs):
     else:
         return {**common_attrs, 'error': 'No vertices found'}
 
-def parse_spline(entity, common_attrs):
-    """Parse SPLINE entity data"""
+def parse_spline(entity, common_attrs, flattening=None):
+    """Parse SPLINE entity data, points are flattened to the chord tolerance of flattening"""
     try:
         data = {
             **common_attrs,
@@ -51,10 +52,7 @@ def parse_spline(entity, common_attrs):
                 
         # Get approximation points for easier rendering
         try:
-            if hasattr(entity, 'approximate'):
-                segments = min(32, max(8, entity.dxf.degree * 8))  # More segments for higher degree
-                points = list(entity.approximate(segments=segments))
-                data['points'] = format_points(points)
+            data['points'] = spline_vertices(entity, flattening or DEFAULT_FLATTENING).round(6).tolist()
         except Exception:
             pass
         
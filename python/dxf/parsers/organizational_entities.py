@@ -3,9 +3,9 @@ Parser for organizational entities (INSERT, ATTDEF, ATTRIB)
 """
 from ..utils.encoder import round_point
 
-def parse_insert(entity, common_attrs):
-    """Parse INSERT entity data"""
-    data = {
+def _insert_placement(entity, common_attrs):
+    """Block name, insert point, rotation and scale of an INSERT"""
+    return {
         **common_attrs,
         'name': entity.dxf.name,
         'insert': round_point(entity.dxf.insert),
@@ -16,6 +16,22 @@ def parse_insert(entity, common_attrs):
             round(getattr(entity.dxf, 'zscale', 1.0), 6)
         ],
     }
+
+def _attribs(entity):
+    """Tag, text and insert point of the ATTRIBs attached to an INSERT"""
+    return [
+        {
+            'tag': attrib.dxf.tag,
+            'text': attrib.dxf.text,
+            'insert': round_point(attrib.dxf.insert),
+        }
+        for attrib in entity.attribs
+    ]
+
+def parse_insert(entity, common_attrs):
+    """Parse INSERT entity data, expanding the block geometry inline"""
+    data = _insert_placement(entity, common_attrs)
+    data['attribs'] = _attribs(entity)
     
     # Try to expand block references for better rendering
     try:
@@ -62,6 +78,31 @@ def parse_insert(entity, common_attrs):
         
     return data
 
+def parse_insert_reference(entity, common_attrs):
+    """
+    Parse INSERT entity data for instancing output: only the placement and
+    attributes, the block geometry is emitted once in the blocks table
+    """
+    data = _insert_placement(entity, common_attrs)
+    
+    # MINSERT grid
+    if entity.dxf.column_count > 1 or entity.dxf.row_count > 1:
+        data['columns'] = entity.dxf.column_count
+        data['rows'] = entity.dxf.row_count
+        data['column_spacing'] = round(entity.dxf.column_spacing, 6)
+        data['row_spacing'] = round(entity.dxf.row_spacing, 6)
+    
+    data['attribs'] = _attribs(entity)
+    return data
+
+def parse_block_definition(block, entities):
+    """Parse a block definition with its already parsed entity records"""
+    return {
+        'name': block.name,
+        'base_point': round_point(block.block.dxf.base_point),
+        'entities': entities,
+    }
+
 def parse_attribute(entity, common_attrs):
     """Parse ATTDEF/ATTRIB entity data"""
     return {
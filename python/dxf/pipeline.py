@@ -0,0 +1,55 @@
+"""
+Single-pass pipeline producing the entity tree and the SVG from one document
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from .flatten import flattening_options
+from .parser import create_render_context, is_instancing, parse_document, parse_tree_blocks
+from .renderer import render_document
+from .styles import style_table
+
+def parse_and_render(doc, config: Optional[Dict[str, Any]] = None,
+                     svg_config: Optional[Dict[str, Any]] = None,
+                     parallel: bool = False) -> Dict[str, Any]:
+    """
+    Build the layer-grouped entity tree and the SVG from one loaded document,
+    sharing a single RenderContext between both. With parallel the renderer
+    gets a RenderContext of its own: it switches layer visibility on its
+    context while drawing, which the parser must not see.
+
+    Args:
+        doc: ezdxf document, e.g. from load_document()
+        config: Optional parser configuration
+        svg_config: Optional renderer configuration
+        parallel: Render the SVG on a worker thread while the tree is built
+
+    Returns:
+        Dict with 'tree' (layer name -> entity list) and 'svg' (SVG string),
+        plus 'blocks' when the config enables instancing and 'styles' when
+        it enables the style table (see dxf.styles)
+    """
+    styles = style_table(config)
+    render_context = create_render_context(doc)
+    if render_context is not None:
+        # Resolve the layout once up front, both consumers use modelspace
+        render_context.set_current_layout(doc.modelspace())
+
+    if not parallel:
+        tree = parse_document(doc, config, render_context, styles)
+        svg = render_document(doc, svg_config, render_context)
+    else:
+        sys.stderr.write('[PYTHON] Rendering SVG in parallel with parsing\n')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            svg_future = executor.submit(render_document, doc, svg_config, create_render_context(doc))
+            tree = parse_document(doc, config, render_context, styles)
+            svg = svg_future.result()
+
+    result = {'tree': tree, 'svg': svg}
+    if is_instancing(config):
+        result['blocks'] = parse_tree_blocks(doc, tree, render_context, flattening_options(config), styles)
+    if styles is not None:
+        result['styles'] = styles.entries
+    return result
+
@@ -0,0 +1,146 @@
+"""
+On-demand deep profiling of a parse or render.
+
+With --profile, parse_dxf.py and render_dxf_svg.py run under cProfile and
+tracemalloc and write, next to the output:
+
+    <base>.prof          cProfile stats, for pstats, snakeviz or gprof2dot
+    <base>.tracemalloc   tracemalloc snapshot, for tracemalloc.Snapshot.load()
+    <base>.profile.txt   summary: the top functions by cumulative and own
+                         time, and the top allocation sites, by line and by
+                         line in this package
+
+The memory snapshot is taken at checkpoint(), which the scripts call once
+the result is complete and still in memory, or else at the end of the run.
+The summary is written to stderr as well. <base> defaults to the DXF file
+path without its extension plus the kind of run, e.g. plan.parse, see
+profile_base(). Both profilers slow the run down several times, the
+timings are only meaningful relative to each other.
+"""
+import io
+import os
+import sys
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Rows per table of the summary
+TOP = 25
+# Frames kept per allocation, so allocations inside ezdxf can be attributed to our callers
+FRAMES = 10
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def profile_base(filepath: str, kind: str, output: Optional[str] = None) -> str:
+    """
+    Path prefix of the profile files.
+
+    Args:
+        filepath: DXF file
+        kind: Kind of run, e.g. 'parse' or 'render'
+        output: Output file of the run, if it writes one; the profile goes
+            next to it instead of next to the DXF file
+    """
+    base = os.path.splitext(output or filepath)[0]
+    return f'{base}.{kind}'
+
+def _function_table(stats: pstats.Stats, sort: str) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(TOP)
+    # Drop the preamble pstats prints before the table
+    text = out.getvalue()
+    start = text.find('   ncalls')
+    return text[start:] if start >= 0 else text
+
+def _package_sites(snapshot: tracemalloc.Snapshot) -> List[Tuple[str, int, int, int]]:
+    """
+    Live allocations attributed to the innermost frame inside this package,
+    as (filename, lineno, bytes, blocks) sorted by size
+    """
+    sites: Dict[Tuple[str, int], List[int]] = {}
+    for trace in snapshot.traces:
+        # Frames are ordered from the oldest to the most recent call
+        for frame in reversed(trace.traceback):
+            if frame.filename.startswith(PACKAGE_DIR):
+                site = sites.setdefault((frame.filename, frame.lineno), [0, 0])
+                site[0] += trace.size
+                site[1] += 1
+                break
+    ranked = sorted(sites.items(), key=lambda item: -item[1][0])[:TOP]
+    return [(filename, lineno, size, count) for (filename, lineno), (size, count) in ranked]
+
+def _relative(filename: str) -> str:
+    for root in (os.path.dirname(PACKAGE_DIR), sys.prefix):
+        if filename.startswith(root):
+            return os.path.relpath(filename, root)
+    return filename
+
+def summarize(profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+    """Text summary of a profile run, see module docstring"""
+    stats = pstats.Stats(profiler)
+    lines = [
+        f'Total: {stats.total_calls} calls in {stats.total_tt:.3f}s, '
+        f'peak traced memory {peak / 1e6:.1f} MB',
+        '',
+        f'Top {TOP} functions by cumulative time:',
+        _function_table(stats, 'cumulative'),
+        f'Top {TOP} functions by own time:',
+        _function_table(stats, 'tottime'),
+        f'Top {TOP} allocation sites:',
+    ]
+    for stat in snapshot.statistics('lineno')[:TOP]:
+        frame = stat.traceback[0]
+        lines.append(f'{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  '
+                     f'{_relative(frame.filename)}:{frame.lineno}')
+    lines += ['', f'Top {TOP} allocation sites in python/dxf, including allocations made by callees:']
+    for filename, lineno, size, count in _package_sites(snapshot):
+        lines.append(f'{size / 1024:10.1f} KiB {count:8d} blocks  {_relative(filename)}:{lineno}')
+    return '\n'.join(lines) + '\n'
+
+_snapshot: Optional[tracemalloc.Snapshot] = None
+
+def checkpoint() -> None:
+    """Take the memory snapshot of a profiled run now, if not taken yet"""
+    global _snapshot
+    if _snapshot is None and tracemalloc.is_tracing():
+        _snapshot = tracemalloc.take_snapshot()
+
+@contextmanager
+def profiled(base: Optional[str]) -> Iterator[None]:
+    """
+    Profile the block with cProfile and tracemalloc and write the profile
+    files for base, see module docstring. Does nothing if base is None.
+    """
+    global _snapshot
+    if base is None:
+        yield
+        return
+    _snapshot = None
+    tracemalloc.start(FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        checkpoint()
+        snapshot, _snapshot = _snapshot, None
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        write_profile(base, profiler, snapshot, peak)
+
+def write_profile(base: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int) -> None:
+    """Write the profile files and log the summary"""
+    try:
+        profiler.dump_stats(f'{base}.prof')
+        snapshot.dump(f'{base}.tracemalloc')
+        summary = summarize(profiler, snapshot, peak)
+        with open(f'{base}.profile.txt', 'w', encoding='utf-8') as f:
+            f.write(summary)
+    except OSError as e:
+        sys.stderr.write(f'[PYTHON] Warning: Could not write profile {base}: {e}\n')
+        return
+    sys.stderr.write(f'[PYTHON] Profile written to {base}.prof, {base}.tracemalloc and {base}.profile.txt\n')
+    sys.stderr.write(summary)
@@ -0,0 +1,258 @@
+"""
+SVG renderer for DXF documents using the ezdxf drawing add-on
+
+The paths of each DXF layer are collected in their own group under the
+entities group, in order of first appearance:
+
+    <g id="layer-walls" data-layer="Walls" data-color="#ff0000"
+       data-on="true" data-frozen="false" data-locked="false">
+
+so a client can show or hide a layer by toggling the display of its group
+instead of rendering again. Ids are stable across renders and documents,
+see layer_id(). Layers that are off or frozen are rendered too, with
+display="none".
+"""
+import sys
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Any, Optional
+
+from . import metrics
+
+try:
+    from ezdxf.addons.drawing import RenderContext, Frontend
+    from ezdxf.addons.drawing.config import Configuration, HatchPolicy
+    from ezdxf.addons.drawing.svg import SVGBackend, SVGRenderBackend
+except ImportError:
+    sys.stderr.write('ezdxf is required. Install via pip install ezdxf\n')
+    sys.exit(1)
+
+def layer_id(name: str) -> str:
+    """
+    SVG id of the group of a layer: 'layer-' and the lowercase layer name,
+    DXF layer names are case-insensitive. Characters other than ASCII
+    letters, digits and '-' are escaped as '_<hex code>_'.
+    """
+    escaped = ''.join(c if c.isascii() and (c.isalnum() or c == '-') else f'_{ord(c):x}_'
+                      for c in name.lower())
+    return f'layer-{escaped}'
+
+class LayeredRenderBackend(SVGRenderBackend):
+    """SVG render backend that collects the paths of each layer in a group, see module docstring"""
+
+    def __init__(self, page, settings) -> None:
+        super().__init__(page, settings)
+        self.entities_group = self.entities
+        # Lowercase layer name -> group
+        self.layers: Dict[str, ET.Element] = {}
+
+    def layer_group(self, layer: str) -> ET.Element:
+        key = layer.lower()
+        group = self.layers.get(key)
+        if group is None:
+            group = self.layers[key] = ET.SubElement(self.entities_group, 'g', id=layer_id(layer))
+            group.set('data-layer', layer)
+        return group
+
+    def add_strokes(self, d: str, properties) -> None:
+        if not d:
+            return
+        self.entities = self.layer_group(properties.layer)
+        try:
+            super().add_strokes(d, properties)
+        finally:
+            self.entities = self.entities_group
+
+    def add_filling(self, d: str, properties) -> None:
+        if not d:
+            return
+        self.entities = self.layer_group(properties.layer)
+        try:
+            super().add_filling(d, properties)
+        finally:
+            self.entities = self.entities_group
+
+class LayeredSVGBackend(SVGBackend):
+    """SVGBackend replaying the recorded drawing on a LayeredRenderBackend"""
+
+    @staticmethod
+    def make_backend(page, settings) -> SVGRenderBackend:
+        return LayeredRenderBackend(page, settings)
+
+class WireframeRenderBackend(LayeredRenderBackend):
+    """
+    SVG render backend that never emits fills: filled polygons and paths
+    (solids, text glyphs, filled hatches) are drawn as their outlines, and
+    the background rectangle stays transparent.
+    """
+
+    def add_filling(self, d: str, properties) -> None:
+        self.add_strokes(d, properties)
+
+    def set_background(self, color) -> None:
+        self.background.set('fill', 'none')
+
+class WireframeSVGBackend(SVGBackend):
+    """SVGBackend replaying the recorded drawing on a WireframeRenderBackend"""
+
+    @staticmethod
+    def make_backend(page, settings) -> SVGRenderBackend:
+        return WireframeRenderBackend(page, settings)
+
+def build_configuration(config: Optional[Dict[str, Any]] = None):
+    """
+    Build the drawing add-on Configuration from a renderer config dict.
+
+    Args:
+        config: Renderer configuration, may contain our custom 'use_drawing_addon' flag
+
+    Returns:
+        Tuple of (Configuration, use_drawing_addon)
+    """
+    # Default to component-based rendering (wireframe)
+    use_drawing_addon = False
+
+    if config:
+        # Print available Configuration parameters for debugging
+        import inspect
+        config_params = inspect.signature(Configuration.__init__).parameters
+        sys.stderr.write(f"Available configuration parameters: {list(config_params.keys())[1:]}\n")
+
+        config_dict = dict(config)
+        sys.stderr.write(f"Attempting to load config with: {config_dict}\n")
+
+        # Check if we should use the Drawing add-on
+        if config_dict.pop('use_drawing_addon', False):
+            use_drawing_addon = True
+
+        if not use_drawing_addon:
+            # Wireframe: only hatch boundaries, unless the config says otherwise
+            config_dict.setdefault('hatch_policy', HatchPolicy.SHOW_OUTLINE)
+        return Configuration(**config_dict), use_drawing_addon
+
+    # Wireframe look, see WireframeRenderBackend
+    return Configuration(hatch_policy=HatchPolicy.SHOW_OUTLINE), use_drawing_addon
+
+def render_root(doc, config: Optional[Dict[str, Any]] = None, render_context=None):
+    """
+    Render the modelspace of an already loaded ezdxf document to an SVG
+    element tree.
+
+    Args:
+        doc: ezdxf document
+        config: Optional renderer configuration dict
+        render_context: Optional RenderContext to reuse, created if not given;
+            its layer visibility changes while drawing, so it must not be
+            used by another thread at the same time
+
+    Returns:
+        xml.etree.ElementTree.Element of the <svg> root
+    """
+    with metrics.span('render'):
+        return _render_root(doc, config, render_context)
+
+def _render_root(doc, config: Optional[Dict[str, Any]] = None, render_context=None):
+    msp = doc.modelspace()
+    cfg, use_drawing_addon = build_configuration(config)
+
+    # Create rendering context
+    ctx = render_context if render_context is not None else RenderContext(doc)
+
+    # Component mode draws a wireframe, filled shapes become outlines in the backend
+    backend = LayeredSVGBackend() if use_drawing_addon else WireframeSVGBackend()
+
+    # Set up renderer with configuration
+    # Create Frontend directly with backend and config, without passing layout properties
+    # This is needed for compatibility with newer ezdxf versions
+    frontend = Frontend(ctx, backend, config=cfg)
+
+    # Draw hidden layers as well, their groups are hidden afterwards so the
+    # client can show them without rendering again. draw_layout() resets the
+    # layer properties of the context and then applies the override.
+    hidden = []
+
+    def show_all_layers(layers) -> None:
+        for layer in layers:
+            if not layer.is_visible:
+                hidden.append(layer)
+                layer.is_visible = True
+
+    ctx.set_layer_properties_override(show_all_layers)
+    try:
+        # Render the model space
+        frontend.draw_layout(msp)
+    finally:
+        ctx.set_layer_properties_override(None)
+        for layer in hidden:
+            layer.is_visible = False
+
+    # Get Page class
+    try:
+        from ezdxf.addons.drawing.layout import Page
+    except ImportError:
+        from ezdxf.addons.drawing import layout
+        Page = layout.Page
+
+    # Create a page with auto-detected dimensions
+    root = backend.get_xml_root_element(Page(0, 0))
+
+    # Add metadata about which renderer mode was used
+    root.set('data-renderer-mode', 'ezdxf' if use_drawing_addon else 'component')
+    annotate_layers(root, doc, ctx)
+    return root
+
+def annotate_layers(root, doc, render_context) -> None:
+    """
+    Add the layer table state to the layer groups of a rendered SVG, and
+    hide the groups of layers that are off or frozen. Layers without a
+    table entry get the state of the render context.
+    """
+    for group in root.iter('g'):
+        name = group.get('data-layer')
+        if name is None:
+            continue
+        properties = render_context.layers.get(name.lower())
+        if properties is not None:
+            # Drop the alpha channel of '#rrggbbaa'
+            group.set('data-color', properties.color[:7])
+            if not properties.is_visible:
+                group.set('display', 'none')
+        # Entities may sit on layers without a table entry, Table.get() raises
+        # for those; they behave like a new layer, on, thawed and unlocked
+        if name in doc.layers:
+            layer = doc.layers.get(name)
+            on, frozen, locked = layer.is_on(), layer.is_frozen(), layer.is_locked()
+        else:
+            on = properties is None or properties.is_visible
+            frozen = locked = False
+        group.set('data-on', 'true' if on else 'false')
+        group.set('data-frozen', 'true' if frozen else 'false')
+        group.set('data-locked', 'true' if locked else 'false')
+
+def render_document(doc, config: Optional[Dict[str, Any]] = None, render_context=None) -> str:
+    """
+    Render the modelspace of an already loaded ezdxf document to SVG.
+
+    Args:
+        doc: ezdxf document
+        config: Optional renderer configuration dict
+        render_context: Optional RenderContext to reuse, created if not given
+
+    Returns:
+        SVG document as string
+    """
+    root = render_root(doc, config, render_context)
+    with metrics.span('serialize'):
+        return ET.tostring(root, encoding='unicode', xml_declaration=True)
+
+def write_document(doc, out: BinaryIO, config: Optional[Dict[str, Any]] = None,
+                   render_context=None) -> None:
+    """
+    Render like render_document() and serialize the SVG straight into a
+    binary stream as UTF-8, without building the document string.
+    """
+    write_svg(render_root(doc, config, render_context), out)
+
+def write_svg(root, out: BinaryIO) -> None:
+    """Serialize an SVG element tree from render_root() into a binary stream as UTF-8"""
+    with metrics.span('serialize'):
+        ET.ElementTree(root).write(out, encoding='utf-8', xml_declaration=True)
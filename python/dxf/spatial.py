@@ -0,0 +1,311 @@
+"""
+Spatial index over entity extents.
+
+Per-entity 2D bounding boxes are stored in one (n, 4) array of
+[min_x, min_y, max_x, max_y] rows and bucketed into packed grids: the entity
+ids of all cells of a grid live in a single array, sorted by cell, with a
+start offset per cell (CSR layout). Grids are stacked in levels of doubling
+cell size and every entity goes to the finest level where it overlaps only
+a few cells, so long walls do not flood the fine grid. Window, point and
+nearest queries only look at the cells they touch on each level and then
+filter the candidates with vectorized box tests.
+
+Extents of LINE, POINT, CIRCLE and straight LWPOLYLINE are computed directly
+from their coordinates; all other entities go through ezdxf.bbox with a Cache, so
+rebuilding the index for the same document is cheap.
+"""
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from ezdxf import bbox
+
+# An entity is stored on the finest grid level where it overlaps at most this
+# many cells; every coarser level doubles the cell size
+MAX_CELLS_PER_ENTITY = 16
+
+def _line_extents(entities) -> np.ndarray:
+    coords = np.array([(*e.dxf.start.vec2, *e.dxf.end.vec2) for e in entities], dtype=np.float64)
+    return np.column_stack([
+        np.minimum(coords[:, 0], coords[:, 2]), np.minimum(coords[:, 1], coords[:, 3]),
+        np.maximum(coords[:, 0], coords[:, 2]), np.maximum(coords[:, 1], coords[:, 3]),
+    ])
+
+def _point_extents(entities) -> np.ndarray:
+    coords = np.array([e.dxf.location.vec2 for e in entities], dtype=np.float64)
+    return np.hstack([coords, coords])
+
+def _circle_extents(entities) -> np.ndarray:
+    values = np.array([(*e.dxf.center.vec2, e.dxf.radius) for e in entities], dtype=np.float64)
+    r = np.abs(values[:, 2:3])
+    return np.hstack([values[:, :2] - r, values[:, :2] + r])
+
+def _lwpolyline_extents(entities) -> np.ndarray:
+    rows = []
+    for e in entities:
+        points = np.array(e.get_points('xy'), dtype=np.float64)
+        rows.append((*points.min(axis=0), *points.max(axis=0)))
+    return np.array(rows, dtype=np.float64)
+
+# Types whose extents are computed without ezdxf.bbox, only for entities in
+# the XY plane (default extrusion) and polylines without arc segments
+DIRECT_EXTENTS = {
+    'LINE': _line_extents,
+    'POINT': _point_extents,
+    'CIRCLE': _circle_extents,
+    'LWPOLYLINE': _lwpolyline_extents,
+}
+
+def _is_direct(e, etype: str) -> bool:
+    extrusion = e.dxf.get('extrusion')
+    if extrusion is not None and not (extrusion.x == 0 and extrusion.y == 0 and extrusion.z > 0):
+        return False
+    if etype == 'LWPOLYLINE':
+        return len(e) > 0 and not e.has_arc
+    return True
+
+def entity_extents(entities, cache: Optional[bbox.Cache] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    Compute 2D bounding boxes of entities.
+
+    Args:
+        entities: Iterable of ezdxf entities, e.g. the modelspace
+        cache: Optional ezdxf.bbox.Cache reused across calls
+
+    Returns:
+        Tuple of (handles, boxes) where boxes is an (n, 4) float64 array of
+        [min_x, min_y, max_x, max_y]; entities without extents are skipped
+    """
+    direct: Dict[str, list] = {}
+    others = []
+    for e in entities:
+        etype = e.dxftype()
+        if etype in DIRECT_EXTENTS and _is_direct(e, etype):
+            direct.setdefault(etype, []).append(e)
+        else:
+            others.append(e)
+
+    handles: List[str] = []
+    parts = []
+    for etype, group in direct.items():
+        handles.extend(e.dxf.handle for e in group)
+        parts.append(DIRECT_EXTENTS[etype](group))
+
+    rows = []
+    for e, box in zip(others, bbox.multi_flat(others, cache=cache)):
+        if box.has_data:
+            handles.append(e.dxf.handle)
+            rows.append((box.extmin.x, box.extmin.y, box.extmax.x, box.extmax.y))
+    if rows:
+        parts.append(np.array(rows, dtype=np.float64))
+
+    boxes = np.vstack(parts) if parts else np.empty((0, 4))
+    return handles, boxes
+
+class _Grid:
+    """One grid level: entity ids sorted by cell with a start offset per cell"""
+
+    def __init__(self, origin: np.ndarray, cell_size: float, shape: np.ndarray):
+        self.origin = origin
+        self.cell_size = cell_size
+        self.shape = shape
+        self.entries = np.empty(0, dtype=np.int64)
+        self.starts = np.zeros(int(shape[0] * shape[1]) + 1, dtype=np.int64)
+
+    def cells(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Inclusive cell ranges (x0, y0) and (x1, y1) covered by boxes"""
+        low = np.floor((boxes[:, :2] - self.origin) / self.cell_size).astype(np.int64)
+        high = np.floor((boxes[:, 2:] - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(low, 0, self.shape - 1), np.clip(high, 0, self.shape - 1)
+
+    def fill(self, ids: np.ndarray, low: np.ndarray, high: np.ndarray) -> None:
+        nx, ny = self.shape
+        span = high - low + 1
+        counts = span[:, 0] * span[:, 1]
+
+        # Expand every entity into the cells it covers
+        owner = np.repeat(np.arange(len(ids)), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        k = np.arange(len(owner)) - first
+        width = span[owner, 0]
+        cx = low[owner, 0] + k % width
+        cy = low[owner, 1] + k // width
+        cell = cy * nx + cx
+
+        order = np.argsort(cell, kind='stable')
+        self.entries = ids[owner[order]]
+        self.starts = np.searchsorted(cell[order], np.arange(nx * ny + 1))
+
+    def candidates(self, window: np.ndarray) -> List[np.ndarray]:
+        low, high = self.cells(window.reshape(1, 4))
+        (x0, y0), (x1, y1) = low[0], high[0]
+        nx = self.shape[0]
+        return [
+            self.entries[self.starts[cy * nx + x0]:self.starts[cy * nx + x1 + 1]]
+            for cy in range(y0, y1 + 1)
+        ]
+
+class SpatialIndex:
+    """
+    Multi-level packed grid index over 2D bounding boxes. Query results are
+    indices into the box array, use handles_of() to map them to entity handles.
+    """
+
+    def __init__(self, handles: List[str], boxes: np.ndarray, cell_size: Optional[float] = None):
+        self.handles = handles
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        n = len(self.boxes)
+        if n:
+            self.extmin = self.boxes[:, :2].min(axis=0)
+            self.extmax = self.boxes[:, 2:].max(axis=0)
+        else:
+            self.extmin = self.extmax = np.zeros(2)
+
+        size = np.maximum(self.extmax - self.extmin, 1e-9)
+        if cell_size is None:
+            # About one entity per finest cell for evenly spread drawings
+            cell_size = float(np.sqrt(size[0] * size[1] / max(n, 1))) or float(max(size))
+        self.cell_size = max(cell_size, float(max(size)) / 4096)
+        self._build(size)
+
+    def _build(self, size: np.ndarray) -> None:
+        self.levels: List[_Grid] = []
+        remaining = np.arange(len(self.boxes))
+        cell_size = self.cell_size
+        while True:
+            shape = np.maximum(np.ceil(size / cell_size).astype(np.int64), 1)
+            grid = _Grid(self.extmin, cell_size, shape)
+            low, high = grid.cells(self.boxes[remaining])
+            span = high - low + 1
+            # The coarsest level (a single cell) takes everything that is left
+            fits = (span[:, 0] * span[:, 1] <= MAX_CELLS_PER_ENTITY) | (shape.max() == 1)
+            if np.any(fits):
+                grid.fill(remaining[fits], low[fits], high[fits])
+                self.levels.append(grid)
+            remaining = remaining[~fits]
+            if not len(remaining):
+                break
+            cell_size *= 2
+
+    def _candidates(self, window: np.ndarray) -> np.ndarray:
+        chunks = [np.empty(0, dtype=np.int64)]
+        for grid in self.levels:
+            chunks.extend(grid.candidates(window))
+        return np.unique(np.concatenate(chunks))
+
+    def window(self, min_x: float, min_y: float, max_x: float, max_y: float,
+               contained: bool = False) -> np.ndarray:
+        """Entities whose box intersects (or, with contained, lies inside) the window"""
+        window = np.array([min(min_x, max_x), min(min_y, max_y), max(min_x, max_x), max(min_y, max_y)])
+        if not len(self.boxes):
+            return np.empty(0, dtype=np.int64)
+        ids = self._candidates(window)
+        b = self.boxes[ids]
+        if contained:
+            hit = (b[:, 0] >= window[0]) & (b[:, 1] >= window[1]) & (b[:, 2] <= window[2]) & (b[:, 3] <= window[3])
+        else:
+            hit = (b[:, 0] <= window[2]) & (b[:, 1] <= window[3]) & (b[:, 2] >= window[0]) & (b[:, 3] >= window[1])
+        return ids[hit]
+
+    def point(self, x: float, y: float, tolerance: float = 0.0) -> np.ndarray:
+        """Entities whose box contains the point, grown by tolerance"""
+        return self.window(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+    def distances(self, ids: np.ndarray, x: float, y: float) -> np.ndarray:
+        """Distance from the point to the boxes of ids, 0 inside a box"""
+        b = self.boxes[ids]
+        dx = np.maximum(np.maximum(b[:, 0] - x, x - b[:, 2]), 0.0)
+        dy = np.maximum(np.maximum(b[:, 1] - y, y - b[:, 3]), 0.0)
+        return np.hypot(dx, dy)
+
+    def nearest(self, x: float, y: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k entities whose boxes are closest to the point.
+
+        Returns:
+            Tuple of (ids, distances) sorted by distance
+        """
+        n = len(self.boxes)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Grow the search window until k boxes lie within its inner radius
+        radius = self.cell_size
+        reach = max(float(np.hypot(*(self.extmax - self.extmin))), self.cell_size)
+        reach += float(np.hypot(*np.maximum(np.maximum(self.extmin - (x, y), (x, y) - self.extmax), 0.0)))
+        while True:
+            ids = self.point(x, y, radius)
+            dist = self.distances(ids, x, y)
+            found = dist <= radius
+            if np.count_nonzero(found) >= k or radius >= reach:
+                break
+            radius *= 2
+        if radius >= reach:
+            ids = np.arange(n)
+            dist = self.distances(ids, x, y)
+        order = np.argsort(dist, kind='stable')[:k]
+        return ids[order], dist[order]
+
+    def handles_of(self, ids: np.ndarray) -> List[str]:
+        return [self.handles[i] for i in ids.tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entities': len(self.boxes),
+            'cell_size': self.cell_size,
+            'levels': [
+                {'grid': grid.shape.tolist(), 'entities': int(len(np.unique(grid.entries)))}
+                for grid in self.levels
+            ],
+            'extents': [*self.extmin.tolist(), *self.extmax.tolist()],
+        }
+
+def build_spatial_index(doc, cache: Optional[bbox.Cache] = None) -> SpatialIndex:
+    """
+    Build a spatial index over the modelspace of a document.
+
+    Args:
+        doc: ezdxf document
+        cache: Optional ezdxf.bbox.Cache, pass the same one when rebuilding
+
+    Returns:
+        SpatialIndex over all modelspace entities with extents
+    """
+    handles, boxes = entity_extents(doc.modelspace(), cache)
+    index = SpatialIndex(handles, boxes)
+    sys.stderr.write(f'[PYTHON] Spatial index over {len(handles)} entities in {len(index.levels)} grid levels\n')
+    return index
+
+def query_spatial_index(index: SpatialIndex, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a query described by a JSON request against an index.
+
+    params.query is one of:
+        "window"  - params.window [min_x, min_y, max_x, max_y], params.contained
+        "point"   - params.point [x, y], params.tolerance
+        "nearest" - params.point [x, y], params.k
+        "extents" - all boxes, for viewport culling on the renderer side
+
+    Returns:
+        Dict with "handles" and "boxes" ([min_x, min_y, max_x, max_y] per
+        handle), plus "distances" for nearest queries
+    """
+    query = params.get('query', 'window')
+    result = {}
+    if query == 'window':
+        ids = index.window(*params['window'], contained=bool(params.get('contained')))
+    elif query == 'point':
+        x, y = params['point'][:2]
+        ids = index.point(x, y, float(params.get('tolerance', 0.0)))
+    elif query == 'nearest':
+        x, y = params['point'][:2]
+        ids, distances = index.nearest(x, y, int(params.get('k', 1)))
+        result['distances'] = np.round(distances, 6).tolist()
+    elif query == 'extents':
+        ids = np.arange(len(index.boxes))
+    else:
+        raise ValueError(f"Unknown spatial query {query!r}")
+    result['handles'] = index.handles_of(ids)
+    result['boxes'] = np.round(index.boxes[ids], 6).tolist()
+    return result
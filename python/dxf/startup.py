@@ -0,0 +1,119 @@
+"""
+Cold start instrumentation for the entry scripts.
+
+Every entry script imports this module first and calls first_output() right
+before its result reaches stdout. That logs the time to first output,
+measured from the start of the process:
+
+    [PYTHON] Startup: first output after 612 ms since process start (budget 1000 ms)
+
+The process start time comes from /proc on Linux and from psutil elsewhere.
+Without either it is measured from the import of this module, which leaves
+out interpreter startup, and the log says "since import" instead.
+
+and warns when it exceeds the startup budget, 1000 ms by default or
+RAPIDTAKEOFF_STARTUP_BUDGET_MS. The budget is the target for the frozen
+(PyInstaller) build; from source it is only informational.
+
+With RAPIDTAKEOFF_STARTUP_REPORT set, the first import of each heavy package
+is timed as well (each including the packages it imports) and listed with
+the time to first output:
+
+    [PYTHON] Startup imports: ezdxf 281 ms, ezdxf.addons.drawing 44 ms, ...
+
+Heavy imports (numpy, the drawing add-on, the SVG renderer) are deferred by
+the entry scripts and library modules until a request needs them, and a
+cache hit never imports ezdxf. The resident worker imports everything up
+front on purpose, its budget covers the time until it is ready.
+"""
+import os
+import sys
+import time
+import builtins
+from typing import Dict, Optional, Tuple
+
+DEFAULT_BUDGET_MS = 1000
+# Packages whose first import is timed in the startup report
+HEAVY_MODULES = ('ezdxf', 'ezdxf.addons.drawing', 'numpy', 'matplotlib', 'PIL', 'svgwrite')
+
+def _proc_age() -> Optional[float]:
+    """Seconds since the process started from /proc (Linux), None without it"""
+    try:
+        with open('/proc/self/stat') as f:
+            # The command name may contain spaces, fields resume after ')'
+            fields = f.read().rpartition(')')[2].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _psutil_age() -> Optional[float]:
+    """Seconds since the process started from psutil (macOS, Windows), None without it"""
+    try:
+        import psutil
+        return max(0.0, time.time() - psutil.Process().create_time())
+    except Exception:
+        return None
+
+def _process_age() -> Tuple[float, str]:
+    """Seconds since the process started and where they are counted from"""
+    for age in (_proc_age, _psutil_age):
+        seconds = age()
+        if seconds is not None:
+            return seconds, 'process start'
+    return 0.0, 'import'
+
+_age, SINCE = _process_age()
+STARTED = time.perf_counter() - _age
+# Module name -> milliseconds spent in its first import
+import_times: Dict[str, float] = {}
+_reported = False
+
+def _timed_import(original):
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name not in HEAVY_MODULES or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            import_times.setdefault(name, (time.perf_counter() - started) * 1000)
+    return timed_import
+
+if os.environ.get('RAPIDTAKEOFF_STARTUP_REPORT'):
+    builtins.__import__ = _timed_import(builtins.__import__)
+
+def budget_ms() -> float:
+    try:
+        return float(os.environ.get('RAPIDTAKEOFF_STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+    except ValueError:
+        return DEFAULT_BUDGET_MS
+
+def elapsed_ms() -> float:
+    """Milliseconds since the process started, or since import, see SINCE"""
+    return (time.perf_counter() - STARTED) * 1000
+
+def first_output(what: str = 'first output') -> Optional[float]:
+    """
+    Log the time to first output once per process, see module docstring.
+
+    Returns:
+        The elapsed milliseconds on the first call, None afterwards
+    """
+    global _reported
+    if _reported:
+        return None
+    _reported = True
+    elapsed = elapsed_ms()
+    budget = budget_ms()
+    frozen = ', frozen' if getattr(sys, 'frozen', False) else ''
+    sys.stderr.write(f'[PYTHON] Startup: {what} after {elapsed:.0f} ms since {SINCE} '
+                     f'(budget {budget:.0f} ms{frozen})\n')
+    if import_times:
+        costs = ', '.join(f'{name} {ms:.0f} ms'
+                          for name, ms in sorted(import_times.items(), key=lambda item: -item[1]))
+        sys.stderr.write(f'[PYTHON] Startup imports: {costs}\n')
+    if elapsed > budget:
+        sys.stderr.write(f'[PYTHON] Warning: {what} took {elapsed - budget:.0f} ms longer than the startup budget\n')
+    return elapsed
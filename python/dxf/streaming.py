@@ -0,0 +1,106 @@
+"""
+Streaming NDJSON output for the parser.
+
+One JSON record per line, flushed as it is produced:
+
+    {"kind": "start", "total": 1234, "layers": ["0", "Walls", ...]}
+    {"kind": "styles", "offset": 0, "styles": [...]}
+    {"kind": "batch", "layer": "Walls", "entities": [...]}
+    {"kind": "progress", "done": 500, "total": 1234}
+    {"kind": "blocks", "blocks": {...}}
+    {"kind": "end", "entities": 1234, "layers": 7}
+
+Entities are batched per layer; a layer's batch is emitted when it reaches
+the batch size, and all pending batches are emitted with every progress
+record and at the end of the parse. The blocks record is only written when
+the config enables instancing.
+
+With the style table enabled (see dxf.styles) a styles record precedes every
+batch that uses new styles; it holds the entries from "offset" on, appended
+to the table received so far.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .filters import entity_filter
+from .flatten import flattening_options
+from .parser import is_instancing, iter_entities, parse_blocks
+from .styles import style_table
+from .utils.encoder import DXFEncoder
+
+def iter_records(doc, config: Optional[Dict[str, Any]] = None, render_context=None,
+                 batch_size: int = 500, progress_every: int = 5000,
+                 entities: Optional[Iterable[Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generate NDJSON records for the modelspace of a document.
+
+    Args:
+        doc: ezdxf document
+        config: Optional configuration parameters
+        render_context: Optional RenderContext to reuse
+        batch_size: Maximum number of entities per batch record
+        progress_every: Emit a progress record every this many entities
+        entities: Entities to parse instead of the modelspace, "total" is
+            then null, see dxf.largefile; so it is with a config filter
+
+    Yields:
+        Record dicts, see module docstring
+    """
+    total = len(doc.modelspace()) if entities is None and entity_filter(config) is None else None
+    yield {'kind': 'start', 'total': total, 'layers': [layer.dxf.name for layer in doc.layers]}
+
+    styles = style_table(config)
+    sent_styles = 0
+    pending: Dict[str, List[Dict[str, Any]]] = {}
+    done = 0
+
+    def new_styles() -> Iterator[Dict[str, Any]]:
+        nonlocal sent_styles
+        if styles is not None and len(styles) > sent_styles:
+            yield {'kind': 'styles', 'offset': sent_styles, 'styles': styles.entries[sent_styles:]}
+            sent_styles = len(styles)
+
+    layers = set()
+    block_names: Dict[str, None] = {}
+    for data in iter_entities(doc, config, render_context, entities, styles):
+        layer = data['layer']
+        if data['type'] == 'INSERT':
+            block_names.setdefault(data['name'], None)
+        batch = pending.setdefault(layer, [])
+        batch.append(data)
+        layers.add(layer)
+        if len(batch) >= batch_size:
+            yield from new_styles()
+            yield {'kind': 'batch', 'layer': layer, 'entities': pending.pop(layer)}
+
+        done += 1
+        if progress_every and done % progress_every == 0:
+            yield from new_styles()
+            for pending_layer, entities in pending.items():
+                yield {'kind': 'batch', 'layer': pending_layer, 'entities': entities}
+            pending.clear()
+            yield {'kind': 'progress', 'done': done, 'total': total}
+
+    yield from new_styles()
+    for pending_layer, entities in pending.items():
+        yield {'kind': 'batch', 'layer': pending_layer, 'entities': entities}
+    if is_instancing(config):
+        blocks = parse_blocks(doc, block_names, render_context, flattening_options(config), styles)
+        yield from new_styles()
+        yield {'kind': 'blocks', 'blocks': blocks}
+    yield {'kind': 'end', 'entities': done, 'layers': len(layers)}
+
+def write_ndjson(records: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    """
+    Write records as newline-delimited JSON, flushing after every record.
+
+    Returns:
+        Number of characters written
+    """
+    written = 0
+    for record in records:
+        line = json.dumps(record, cls=DXFEncoder) + '\n'
+        out.write(line)
+        out.flush()
+        written += len(line)
+    return written
@@ -0,0 +1,102 @@
+"""
+Shared style table for entity records.
+
+With "styles": true in the parser config, entity records carry a "style"
+index instead of their own color and linetype fields, and the output gets a
+"styles" list, emitted once:
+
+    {
+      "color": 256,              # ACI, 256 = ByLayer, 0 = ByBlock
+      "true_color": null,        # 24-bit true color, if set
+      "linetype": "ByLayer",
+      "lineweight": -1,          # 1/100 mm, -1 ByLayer, -2 ByBlock, -3 default
+      "rgb": "#ff0000",          # resolved color
+      "resolved_linetype": "DASHED",
+      "resolved_lineweight": 0.25  # mm
+    }
+
+Resolution follows the ByLayer/ByBlock rules of ezdxf's RenderContext and
+runs once per (layer, color, true color, linetype, lineweight) key, so most
+entities cost a dict lookup. ByBlock resolves as for modelspace entities;
+entities of instancing block definitions inherit from their INSERT, whose
+own style applies.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from ezdxf import colors
+
+# Attributes of an entity that decide its resolved style
+StyleKey = Tuple[str, int, Optional[int], str, int]
+
+class StyleTable:
+    """Interned entity styles, see module docstring"""
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+        # Resolved style values -> index into entries
+        self._interned: Dict[tuple, int] = {}
+        # Raw entity attributes -> index into entries
+        self._resolved: Dict[StyleKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def index(self, e, render_context=None) -> int:
+        """Index of the style of an entity, resolving it on first use of its key"""
+        dxf = e.dxf
+        key = (dxf.layer, dxf.get('color', 256), dxf.get('true_color'),
+               dxf.get('linetype', 'ByLayer'), dxf.get('lineweight', -1))
+        index = self._resolved.get(key)
+        if index is None:
+            index = self._resolved[key] = self._intern(_resolve(e, key, render_context))
+        return index
+
+    def clear_resolved(self) -> None:
+        """
+        Resolve every key again on next use, e.g. for a reloaded document
+        whose layers changed. Indexes already handed out stay valid.
+        """
+        self._resolved.clear()
+
+    def _intern(self, style: Dict[str, Any]) -> int:
+        values = tuple(style.values())
+        index = self._interned.get(values)
+        if index is None:
+            index = self._interned[values] = len(self.entries)
+            self.entries.append(style)
+        return index
+
+def _resolve(e, key: StyleKey, render_context=None) -> Dict[str, Any]:
+    _, color, true_color, linetype, lineweight = key
+    rgb = None
+    resolved_linetype = linetype
+    resolved_lineweight = None
+    if render_context is not None:
+        try:
+            properties = render_context.resolve_all(e)
+            # Drop the alpha channel of '#rrggbbaa'
+            rgb = properties.color[:7]
+            resolved_linetype = properties.linetype_name
+            resolved_lineweight = properties.lineweight
+        except Exception:
+            pass
+    if rgb is None:
+        if true_color is not None:
+            rgb = colors.int2rgb(true_color).to_hex()
+        elif 0 < color < 256:
+            rgb = colors.aci2rgb(color).to_hex()
+    return {
+        'color': color,
+        'true_color': true_color,
+        'linetype': linetype,
+        'lineweight': lineweight,
+        'rgb': rgb,
+        'resolved_linetype': resolved_linetype,
+        'resolved_lineweight': resolved_lineweight,
+    }
+
+def style_table(config: Optional[Dict[str, Any]]) -> Optional[StyleTable]:
+    """A new StyleTable if the config asks for shared styles, else None"""
+    if isinstance(config, dict) and config.get('styles'):
+        return StyleTable()
+    return None
@@ -0,0 +1,211 @@
+"""
+Raster thumbnails of DXF modelspaces for sheet browsers.
+
+A thumbnail is drawn from decimated geometry, not from a full SVG render:
+the modelspace is flattened by ezdxf's disassemble module to the size of one
+thumbnail pixel and simplified like level 0 of a tile pyramid (see
+dxf.tiles), then drawn with Pillow into an image of at most size x size
+pixels that keeps the aspect ratio of the drawing extents. Lines get the
+color of their layer.
+
+PNG bytes are cached in the result cache (see dxf.cache) keyed by the hash
+of the DXF file and the thumbnail options, so a cached thumbnail never loads
+the document or imports ezdxf.
+
+    python thumbnail_dxf.py sheets/ -o thumbs/ --size 256
+
+writes <name>.png per file on a process pool, see main().
+"""
+import io
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SIZE = 256
+MAX_SIZE = 2048
+DEFAULT_BACKGROUND = '#212830'
+# Blank border around the drawing, in pixels
+MARGIN = 4
+
+def thumbnail_options(params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Normalized thumbnail options, part of the cache key.
+
+    Raises:
+        ValueError: for sizes outside 16..MAX_SIZE
+    """
+    params = params or {}
+    size = int(params.get('size', DEFAULT_SIZE))
+    if not 16 <= size <= MAX_SIZE:
+        raise ValueError(f'Thumbnail size must be between 16 and {MAX_SIZE} pixels')
+    return {
+        'size': size,
+        'background': str(params.get('background', DEFAULT_BACKGROUND)),
+        'line_width': max(1, int(params.get('line_width', 1))),
+    }
+
+def _layer_colors(doc) -> Dict[str, Tuple[int, int, int]]:
+    from ezdxf import colors
+    result = {}
+    for layer in doc.layers:
+        if layer.dxf.hasattr('true_color'):
+            result[layer.dxf.name] = tuple(colors.int2rgb(layer.dxf.true_color))
+        else:
+            result[layer.dxf.name] = tuple(colors.aci2rgb(abs(layer.dxf.color) or 7))
+    return result
+
+def render_thumbnail(doc, options: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Draw the modelspace of a document into a PNG, see module docstring.
+
+    Args:
+        doc: ezdxf document
+        options: Thumbnail options, see thumbnail_options()
+
+    Returns:
+        PNG image bytes
+    """
+    from PIL import Image, ImageDraw
+    from .tiles import TilePyramid
+
+    options = thumbnail_options(options)
+    size = options['size']
+    inner = size - 2 * MARGIN
+    # Level 0 of a pyramid with one thumbnail-sized tile, flattened to one pixel
+    pyramid = TilePyramid(doc, tile_size=inner, tolerance_px=1.0, max_zoom=0)
+    tile = pyramid.tile(0, 0, 0)
+
+    # The tile is square, crop the image to the drawing extents
+    scale = inner / pyramid.size
+    width = height = inner
+    if pyramid.paths:
+        extents = (pyramid.index.extmax - pyramid.index.extmin) * scale
+        width = max(1, int(round(float(extents[0]))))
+        height = max(1, int(round(float(extents[1]))))
+    image = Image.new('RGB', (width + 2 * MARGIN, height + 2 * MARGIN), options['background'])
+    draw = ImageDraw.Draw(image)
+
+    ox = float(pyramid.origin[0])
+    oy = float(pyramid.origin[1])
+    bottom = height + MARGIN
+
+    def pixel(x: float, y: float) -> Tuple[float, float]:
+        # Image rows grow downwards
+        return MARGIN + (x - ox) * scale, bottom - (y - oy) * scale
+
+    colors = _layer_colors(doc)
+    white = (255, 255, 255)
+    for line in tile['lines']:
+        points = line['points']
+        xy = [pixel(points[i], points[i + 1]) for i in range(0, len(points), 2)]
+        draw.line(xy, fill=colors.get(line['layer'], white), width=options['line_width'])
+    if tile['dots']:
+        draw.point([pixel(x, y) for x, y in tile['dots']], fill=white)
+
+    out = io.BytesIO()
+    image.save(out, format='PNG', optimize=False)
+    return out.getvalue()
+
+def cached_thumbnail(filepath: str, options: Optional[Dict[str, Any]] = None, cache=None,
+                     load=None) -> Tuple[bytes, bool]:
+    """
+    Thumbnail of a file from the result cache, rendered and stored on a miss.
+
+    Args:
+        filepath: DXF file
+        options: Thumbnail options, see thumbnail_options()
+        cache: Optional ResultCache, see dxf.cache.open_cache()
+        load: Optional callable returning the ezdxf document of filepath,
+            e.g. a document pool; dxf.parser.load_document() by default
+
+    Returns:
+        Tuple of (PNG bytes, True if it came from the cache)
+    """
+    options = thumbnail_options(options)
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key(filepath, 'thumbnail', options)
+            png = cache.get(key)
+            if png is not None:
+                return png, True
+        except OSError as e:
+            sys.stderr.write(f'[PYTHON] Warning: Cache lookup failed: {e}\n')
+            key = None
+
+    if load is None:
+        from .parser import load_document
+        load = load_document
+    png = render_thumbnail(load(filepath), options)
+    if key is not None:
+        cache.put(key, png)
+    return png, False
+
+def _write_thumbnail(filepath: str, path: str, options: Dict[str, Any],
+                     cache_dir: Optional[str]) -> Dict[str, Any]:
+    """Render one thumbnail file, runs in a pool process"""
+    from .cache import open_cache
+    started = time.perf_counter()
+    result: Dict[str, Any] = {'file': filepath, 'ok': False}
+    try:
+        png, cached = cached_thumbnail(filepath, options, open_cache(cache_dir) if cache_dir else None)
+        with open(path, 'wb') as f:
+            f.write(png)
+        result.update(ok=True, output=path, cached=cached)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+def main(argv=None):
+    from .batch import collect_files, output_names
+
+    parser = argparse.ArgumentParser(description='Render PNG thumbnails of DXF files')
+    parser.add_argument('inputs', nargs='+', help='Directories, glob patterns or DXF files')
+    parser.add_argument('-o', '--out-dir', required=True, help='Directory for <name>.png thumbnails')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='Largest thumbnail side in pixels')
+    parser.add_argument('--background', default=DEFAULT_BACKGROUND, help='Background color')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Number of processes (default: number of cores)')
+    parser.add_argument('--cache-dir',
+                        help='Result cache directory (default: $RAPIDTAKEOFF_CACHE_DIR, caching is off if unset)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the result cache')
+    args = parser.parse_args(argv)
+
+    try:
+        options = thumbnail_options({'size': args.size, 'background': args.background})
+    except ValueError as e:
+        sys.stderr.write(f'[PYTHON] Error: {e}\n')
+        sys.exit(2)
+    files = collect_files(args.inputs)
+    if not files:
+        sys.stderr.write('[PYTHON] Error: No DXF files found\n')
+        sys.exit(1)
+    os.makedirs(args.out_dir, exist_ok=True)
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or os.environ.get('RAPIDTAKEOFF_CACHE_DIR')
+
+    started = time.perf_counter()
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(files)))
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_write_thumbnail, path, os.path.join(args.out_dir, f'{name}.png'), options, cache_dir)
+            for path, name in zip(files, output_names(files))
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if not result['ok']:
+                sys.stderr.write(f"[PYTHON] {result['file']} failed: {result['error']}\n")
+
+    succeeded = sum(1 for result in results if result['ok'])
+    cached = sum(1 for result in results if result.get('cached'))
+    sys.stderr.write(f'[PYTHON] {succeeded}/{len(files)} thumbnails ({cached} cached) '
+                     f'in {time.perf_counter() - started:.2f}s on {workers} processes\n')
+    if not succeeded:
+        sys.exit(1)
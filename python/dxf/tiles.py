@@ -0,0 +1,259 @@
+"""
+Level-of-detail tile pyramid for zoomed-out views.
+
+Zoom level z splits the square drawing extents into 2^z x 2^z tiles of
+tile_size pixels. Tile (0, 0) is at the lower-left corner of the extents and
+y grows upwards, like DXF coordinates. For every level:
+
+    - polylines are simplified with Douglas-Peucker to tolerance_px pixels
+    - entities smaller than one pixel collapse into a dot, one per pixel
+    - geometry is clipped to the runs of segments that touch the tile
+
+Entities are flattened once to the pixel tolerance of the finest level.
+Level geometry is simplified lazily for the entities the requested tiles
+touch, using a spatial index over entity extents, and finished tiles are kept
+in an LRU cache.
+
+Tile layout:
+
+    {
+      "z": 2, "x": 1, "y": 3,
+      "bounds": [min_x, min_y, max_x, max_y],
+      "lines": [{"handle": "1A", "layer": "Walls", "points": [x0, y0, x1, y1, ...]}, ...],
+      "dots": [[x, y], ...]
+    }
+"""
+import math
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from ezdxf import bbox, disassemble
+
+from .spatial import SpatialIndex, entity_extents
+
+DEFAULT_TILE_SIZE = 256
+DEFAULT_TOLERANCE_PX = 0.5
+DEFAULT_MAX_ZOOM = 6
+# Finished tiles kept per pyramid
+TILE_CACHE_SIZE = 1024
+
+def simplify(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification of an (n, 2) polyline.
+
+    Args:
+        points: Polyline vertices
+        tolerance: Maximum distance of removed vertices from the result
+
+    Returns:
+        The kept vertices, always including both end points
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        inner = points[first + 1:last] - start
+        direction = points[last] - start
+        length = math.hypot(direction[0], direction[1])
+        if length == 0.0:
+            # Closed span, measure the distance to the shared end point
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(direction[0] * inner[:, 1] - direction[1] * inner[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep]
+
+def clip_runs(points: np.ndarray, bounds: Tuple[float, float, float, float]) -> List[np.ndarray]:
+    """Split a polyline into the runs of consecutive segments whose boxes touch bounds"""
+    min_x, min_y, max_x, max_y = bounds
+    p0 = points[:-1]
+    p1 = points[1:]
+    low = np.minimum(p0, p1)
+    high = np.maximum(p0, p1)
+    hit = (low[:, 0] <= max_x) & (high[:, 0] >= min_x) & (low[:, 1] <= max_y) & (high[:, 1] >= min_y)
+    if hit.all():
+        return [points]
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], hit.astype(np.int8), [0]))))
+    return [points[start:stop + 1] for start, stop in edges.reshape(-1, 2)]
+
+def _precision(pixel: float) -> int:
+    """Decimal places that resolve a tenth of a pixel"""
+    if pixel <= 0:
+        return 6
+    return int(min(6, max(0, math.ceil(-math.log10(pixel / 10)))))
+
+class TilePyramid:
+    """
+    Tile pyramid over the modelspace of one document, see module docstring.
+    """
+
+    def __init__(self, doc, tile_size: int = DEFAULT_TILE_SIZE,
+                 tolerance_px: float = DEFAULT_TOLERANCE_PX, max_zoom: int = DEFAULT_MAX_ZOOM):
+        self.tile_size = tile_size
+        self.tolerance_px = tolerance_px
+        self.max_zoom = max_zoom
+
+        msp = doc.modelspace()
+        handles, boxes = entity_extents(msp, bbox.Cache())
+        self.index = SpatialIndex(handles, boxes)
+        self.origin = self.index.extmin
+        self.size = float(max(np.max(self.index.extmax - self.index.extmin), 1e-9)) if len(boxes) else 1.0
+
+        # Flatten once to the tolerance of the finest level
+        entitydb = doc.entitydb
+        self.layers: List[str] = []
+        self.paths: List[List[np.ndarray]] = []
+        distance = self.pixel_size(max_zoom) * tolerance_px
+        for handle in handles:
+            e = entitydb[handle]
+            self.layers.append(e.dxf.layer)
+            self.paths.append(self._flatten(e, distance))
+
+        self._levels: Dict[int, Dict[int, List[np.ndarray]]] = {}
+        self._tiles: 'OrderedDict[Tuple[int, int, int], Dict[str, Any]]' = OrderedDict()
+        sys.stderr.write(f'[PYTHON] Tile pyramid over {len(handles)} entities, '
+                         f'{max_zoom + 1} zoom levels\n')
+
+    @staticmethod
+    def _flatten(e, distance: float) -> List[np.ndarray]:
+        """2D vertex arrays of all primitives of an entity, block references included"""
+        paths = []
+        try:
+            primitives = disassemble.to_primitives(disassemble.recursive_decompose([e]),
+                                                   max_flattening_distance=distance)
+            for primitive in primitives:
+                if primitive.is_empty:
+                    continue
+                vertices = np.array([(v.x, v.y) for v in primitive.vertices()], dtype=np.float64)
+                if len(vertices):
+                    paths.append(vertices)
+        except Exception as ex:
+            sys.stderr.write(f'[PYTHON] Warning: Could not flatten {e.dxftype()} {e.dxf.handle}: {ex}\n')
+        return paths
+
+    def pixel_size(self, z: int) -> float:
+        """Drawing units per pixel at zoom level z"""
+        return self.size / (2 ** z * self.tile_size)
+
+    def tile_bounds(self, z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+        span = self.size / 2 ** z
+        min_x = float(self.origin[0]) + x * span
+        min_y = float(self.origin[1]) + y * span
+        return (min_x, min_y, min_x + span, min_y + span)
+
+    def tiles_in_window(self, z: int, window) -> List[Tuple[int, int]]:
+        """Tile coordinates at level z that overlap a [min_x, min_y, max_x, max_y] window"""
+        span = self.size / 2 ** z
+        count = 2 ** z
+        x0, x1 = sorted((window[0], window[2]))
+        y0, y1 = sorted((window[1], window[3]))
+        tx0 = max(0, int(math.floor((x0 - self.origin[0]) / span)))
+        ty0 = max(0, int(math.floor((y0 - self.origin[1]) / span)))
+        tx1 = min(count - 1, int(math.floor((x1 - self.origin[0]) / span)))
+        ty1 = min(count - 1, int(math.floor((y1 - self.origin[1]) / span)))
+        return [(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def _level_paths(self, z: int, entity: int) -> List[np.ndarray]:
+        """Simplified paths of an entity at level z, computed on first use"""
+        level = self._levels.setdefault(z, {})
+        paths = level.get(entity)
+        if paths is None:
+            tolerance = self.pixel_size(z) * self.tolerance_px
+            paths = level[entity] = [simplify(p, tolerance) for p in self.paths[entity]]
+        return paths
+
+    def tile(self, z: int, x: int, y: int) -> Dict[str, Any]:
+        """Build (or fetch from the cache) one tile, see module docstring"""
+        if not 0 <= z <= self.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f'Tile {z}/{x}/{y} is outside the pyramid')
+        key = (z, x, y)
+        cached = self._tiles.get(key)
+        if cached is not None:
+            self._tiles.move_to_end(key)
+            return cached
+
+        bounds = self.tile_bounds(z, x, y)
+        pixel = self.pixel_size(z)
+        precision = _precision(pixel)
+        # Grow the clip window by a pixel so strokes on the tile edge are kept
+        clip = (bounds[0] - pixel, bounds[1] - pixel, bounds[2] + pixel, bounds[3] + pixel)
+
+        lines = []
+        dots = []
+        ids = self.index.window(*clip)
+        boxes = self.index.boxes[ids]
+        tiny = np.max(boxes[:, 2:] - boxes[:, :2], axis=1) < pixel
+        for entity, is_tiny, box in zip(ids.tolist(), tiny.tolist(), boxes):
+            if is_tiny:
+                dots.append(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2))
+                continue
+            for path in self._level_paths(z, entity):
+                if len(path) < 2:
+                    dots.append(tuple(path[0]))
+                    continue
+                for run in clip_runs(path, clip):
+                    lines.append({
+                        'handle': self.index.handles[entity],
+                        'layer': self.layers[entity],
+                        'points': np.round(run, precision).reshape(-1).tolist(),
+                    })
+
+        if dots:
+            # One dot per pixel
+            dots = np.asarray(dots, dtype=np.float64)
+            cells = np.floor((dots - (bounds[0], bounds[1])) / pixel).astype(np.int64)
+            _, first = np.unique(cells, axis=0, return_index=True)
+            dots = np.round(dots[np.sort(first)], precision).tolist()
+
+        result = {'z': z, 'x': x, 'y': y, 'bounds': list(bounds), 'lines': lines, 'dots': dots}
+        self._tiles[key] = result
+        if len(self._tiles) > TILE_CACHE_SIZE:
+            self._tiles.popitem(last=False)
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'origin': self.origin.tolist(),
+            'size': self.size,
+            'tile_size': self.tile_size,
+            'tolerance_px': self.tolerance_px,
+            'max_zoom': self.max_zoom,
+            'entities': len(self.paths),
+        }
+
+def query_tiles(pyramid: TilePyramid, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answer a JSON tile request.
+
+    params.z is the zoom level, tiles are selected by params.tiles
+    ([[x, y], ...]) or by params.window ([min_x, min_y, max_x, max_y]).
+    Without params.z only the pyramid info is returned.
+
+    Returns:
+        Dict with "info" and, for a zoom level, "tiles"
+    """
+    result: Dict[str, Any] = {'info': pyramid.info()}
+    z = params.get('z')
+    if z is None:
+        return result
+    z = min(int(z), pyramid.max_zoom)
+    if 'tiles' in params:
+        coords = [(int(x), int(y)) for x, y in params['tiles']]
+    else:
+        coords = pyramid.tiles_in_window(z, params['window'])
+    result['tiles'] = [pyramid.tile(z, x, y) for x, y in coords]
+    return result
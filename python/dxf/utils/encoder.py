@@ -1,43 +1,58 @@
 """
 JSON encoder for DXF parsing with support for numpy and custom types
+
+numpy and ezdxf are not imported here: values of their types can only exist
+once they were imported elsewhere, so they are looked up in sys.modules. That
+keeps the encoder cheap for outputs that never touch either.
 """
+import sys
 import json
 import array
-import numpy as np
-from ezdxf.math import Vec2, Vec3
+
+def _numpy():
+    return sys.modules.get('numpy')
+
+def _vector_types() -> tuple:
+    ezdxf_math = sys.modules.get('ezdxf.math')
+    return (ezdxf_math.Vec2, ezdxf_math.Vec3) if ezdxf_math is not None else ()
 
 class DXFEncoder(json.JSONEncoder):
     """Custom JSON encoder to handle numpy arrays and other special types"""
     def default(self, obj):
-        # Handle numpy arrays
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
         # Handle array.array objects
-        elif isinstance(obj, array.array):
+        if isinstance(obj, array.array):
             return list(obj)
         # Handle vectors
-        elif isinstance(obj, (Vec2, Vec3)):
+        if isinstance(obj, _vector_types()):
             if hasattr(obj, 'z'):
                 return [obj.x, obj.y, obj.z]
             return [obj.x, obj.y]
-        # Handle other numpy types
-        elif isinstance(obj, (np.int_, np.intc, np.intp, np.int8, np.int16, np.int32, np.int64, 
-                             np.uint8, np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
+        np = _numpy()
+        if np is not None:
+            # Handle numpy arrays
+            if isinstance(obj, np.ndarray):
+                return obj.tolist()
+            # Handle other numpy types
+            if isinstance(obj, np.integer):
+                return int(obj)
+            if isinstance(obj, np.floating):
+                return float(obj)
+            if isinstance(obj, np.bool_):
+                return bool(obj)
         # Let the base encoder handle the rest
         return super().default(obj)
 
 def round_point(point, precision=6):
     """Round coordinates in a point to specified precision"""
     if isinstance(point, (list, tuple)):
-        return [round(v, precision) for v in point]
-    elif isinstance(point, np.ndarray):
+        # np.float64 is a float whose round() rounds like np.round(), take
+        # Python's correctly rounded result for every float
+        return [round(float(v), precision) if isinstance(v, float) else round(v, precision)
+                for v in point]
+    np = _numpy()
+    if np is not None and isinstance(point, np.ndarray):
         return [round(float(v), precision) for v in point]
-    elif isinstance(point, (Vec2, Vec3)):
+    elif isinstance(point, _vector_types()):
         if hasattr(point, 'z'):
             return [round(point.x, precision), round(point.y, precision), round(point.z, precision)]
         return [round(point.x, precision), round(point.y, precision)]
@@ -47,4 +62,4 @@ def round_point(point, precision=6):
 
 def format_points(points, precision=6):
     """Format a list of points to specified precision"""
-    return [round_point(p, precision) for p in points]
\ No newline at end of file
+    return [round_point(p, precision) for p in points]
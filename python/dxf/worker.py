@@ -0,0 +1,303 @@
+"""
+Long-lived DXF worker that serves parse/render/query requests over stdin/stdout.
+
+Every message in either direction is a frame made of a 4-byte big-endian
+length followed by that many bytes of UTF-8 JSON.
+
+Request:  {"id": 1, "method": "parse", "params": {"file": "...", "config": {...}}}
+Response: {"id": 1, "ok": true, "result": ...}
+          {"id": 1, "ok": false, "error": "..."}
+
+Responses of requests that parsed or rendered something carry a "metrics"
+record with their per-phase timings and entity counters (see dxf.metrics).
+
+Methods:
+    ping      - liveness check, returns "pong"
+    parse     - layer-grouped entity tree (same as parse_dxf.py), config.filter selects
+                layers, entity types and blocks before parsing (see dxf.filters), with
+                config.instancing {"tree": ..., "blocks": ...}, config.styles
+                adds "styles" (see dxf.styles)
+    render    - SVG string (same as render_dxf_svg.py)
+    open      - {"tree": ..., "svg": ...} from one document and RenderContext,
+                params.svg_config is the renderer config, params.parallel renders on a thread,
+                params.takeoff adds a "takeoff" result, params.block_index a "block_index"
+                (see dxf.blockindex), config.instancing adds "blocks", config.styles "styles"
+    block_index - INSERTs indexed by block name, attribute tag and value (see dxf.blockindex)
+    takeoff   - length/area/count aggregates (see dxf.takeoff), params.expand_blocks,
+                config.filter measures only the selected entities (see dxf.filters)
+    spatial   - window/point/nearest queries on an entity extents index built once
+                per loaded document (see dxf.spatial.query_spatial_index)
+    tiles     - level-of-detail tiles for params.z by params.tiles or params.window,
+                params.tile_size/tolerance_px/max_zoom select the pyramid (see dxf.tiles)
+    delta     - added/modified/removed entities since the previous delta request for
+                the same file and config, the first one returns everything (see dxf.incremental)
+    thumbnail - {"png": base64, "cached": bool} PNG preview of params.size pixels with
+                params.background, cached by file hash in $RAPIDTAKEOFF_CACHE_DIR (see dxf.thumbnail)
+    layouts   - modelspace and paperspace layouts in tab order with entity counts and
+                stored extents, params.compute_extents fills in missing ones (see dxf.layouts)
+    layout    - {"name": ..., "tree": ...} of the layout params.name, parsed on first
+                request per document and config, config.instancing/styles as for parse
+    query     - cheap lookups on a loaded document, params.what is one of
+                "info" (version, layers, entity counts) or "entity" (params.handle)
+    close     - drop a file from the document pool and its delta state
+    stats     - document pool statistics
+    shutdown  - stop the worker
+"""
+import sys
+import json
+import struct
+import os
+import base64
+import argparse
+import weakref
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from . import metrics, startup
+from .blockindex import build_tree_block_index
+from .cache import normalize_config, open_cache
+from .documents import DocumentPool
+from .filters import entity_filter
+from .flatten import flattening_options
+from .incremental import IncrementalParser
+from .layouts import layout_catalog, parse_layout
+from .parser import is_instancing, parse_document, parse_entity, parse_tree_blocks
+from .pipeline import parse_and_render
+from .renderer import render_document
+from .spatial import build_spatial_index, query_spatial_index
+from .styles import style_table
+from .takeoff import compute_takeoff
+from .thumbnail import cached_thumbnail
+from .tiles import DEFAULT_MAX_ZOOM, DEFAULT_TILE_SIZE, DEFAULT_TOLERANCE_PX, TilePyramid, query_tiles
+from .utils.encoder import DXFEncoder
+
+HEADER = struct.Struct('>I')
+
+class WorkerError(Exception):
+    """Raised for malformed requests, reported back to the caller"""
+
+def read_frame(stream) -> Optional[bytes]:
+    """Read one length-prefixed frame, returns None on end of stream"""
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError('Truncated frame header')
+    (length,) = HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError('Truncated frame payload')
+    return payload
+
+def write_frame(stream, message: Dict[str, Any], result_json: Optional[str] = None) -> None:
+    """
+    Write one length-prefixed JSON frame and flush it. result_json is the
+    already encoded "result" of the message, if it was encoded beforehand.
+    """
+    payload = json.dumps(message, cls=DXFEncoder)
+    if result_json is not None:
+        payload = f'{payload[:-1]}, "result": {result_json}}}'
+    payload = payload.encode('utf-8')
+    stream.write(HEADER.pack(len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+def _require_file(params: Dict[str, Any]) -> str:
+    filepath = params.get('file')
+    if not filepath:
+        raise WorkerError("Missing 'file' parameter")
+    return filepath
+
+def _query(pool: DocumentPool, params: Dict[str, Any]) -> Any:
+    doc = pool.get(_require_file(params))
+    what = params.get('what', 'info')
+
+    if what == 'info':
+        msp = doc.modelspace()
+        return {
+            'dxfversion': doc.dxfversion,
+            'layers': [layer.dxf.name for layer in doc.layers],
+            'entity_counts': dict(Counter(e.dxftype() for e in msp)),
+        }
+    if what == 'entity':
+        handle = params.get('handle')
+        entity = doc.entitydb.get(handle) if handle else None
+        if entity is None:
+            raise WorkerError(f"No entity with handle {handle!r}")
+        return parse_entity(entity)
+    raise WorkerError(f"Unknown query {what!r}")
+
+class Worker:
+    """Dispatches decoded requests against a shared DocumentPool"""
+
+    def __init__(self, pool: DocumentPool):
+        self.pool = pool
+        self.running = True
+        # Spatial indexes live as long as their document stays in the pool
+        self.spatial_indexes = weakref.WeakKeyDictionary()
+        self.tile_pyramids = weakref.WeakKeyDictionary()
+        self.layout_trees = weakref.WeakKeyDictionary()
+        # (real path, normalized config) -> IncrementalParser
+        self.incremental: Dict[Tuple[str, str], IncrementalParser] = {}
+        # Thumbnails outlive the document pool, cached hits skip loading the file
+        self.cache = open_cache()
+
+    def spatial_index(self, doc):
+        index = self.spatial_indexes.get(doc)
+        if index is None:
+            index = self.spatial_indexes[doc] = build_spatial_index(doc)
+        return index
+
+    def tile_pyramid(self, doc, params: Dict[str, Any]) -> TilePyramid:
+        options = (int(params.get('tile_size', DEFAULT_TILE_SIZE)),
+                   float(params.get('tolerance_px', DEFAULT_TOLERANCE_PX)),
+                   int(params.get('max_zoom', DEFAULT_MAX_ZOOM)))
+        pyramids = self.tile_pyramids.setdefault(doc, {})
+        pyramid = pyramids.get(options)
+        if pyramid is None:
+            pyramid = pyramids[options] = TilePyramid(doc, *options)
+        return pyramid
+
+    def layout_tree(self, doc, name: str, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        trees = self.layout_trees.setdefault(doc, {})
+        key = (name.lower(), normalize_config(config))
+        tree = trees.get(key)
+        if tree is None:
+            tree = trees[key] = parse_layout(doc, name, config)
+        return tree
+
+    def delta(self, filepath: str, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        key = (os.path.realpath(filepath), normalize_config(config))
+        parser = self.incremental.get(key)
+        if parser is None:
+            parser = self.incremental[key] = IncrementalParser(config)
+        return parser.update(self.pool.get(filepath), key[0])
+
+    def handle(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == 'ping':
+            return 'pong'
+        if method == 'parse':
+            doc = self.pool.get(_require_file(params))
+            config = params.get('config')
+            styles = style_table(config)
+            tree = parse_document(doc, config, styles=styles)
+            if not is_instancing(config) and styles is None:
+                return tree
+            result = {'tree': tree}
+            if is_instancing(config):
+                result['blocks'] = parse_tree_blocks(doc, tree, flattening=flattening_options(config), styles=styles)
+            if styles is not None:
+                result['styles'] = styles.entries
+            return result
+        if method == 'render':
+            doc = self.pool.get(_require_file(params))
+            return render_document(doc, params.get('config'))
+        if method == 'open':
+            doc = self.pool.get(_require_file(params))
+            result = parse_and_render(doc, params.get('config'), params.get('svg_config'),
+                                      parallel=bool(params.get('parallel')))
+            if params.get('takeoff'):
+                result['takeoff'] = compute_takeoff(doc, entity_filter=entity_filter(params.get('config')))
+            if params.get('block_index'):
+                result['block_index'] = build_tree_block_index(result['tree'], doc)
+            return result
+        if method == 'block_index':
+            doc = self.pool.get(_require_file(params))
+            return build_tree_block_index(parse_document(doc, params.get('config')), doc)
+        if method == 'takeoff':
+            doc = self.pool.get(_require_file(params))
+            return compute_takeoff(doc, expand_blocks=params.get('expand_blocks', True),
+                                   entity_filter=entity_filter(params.get('config')))
+        if method == 'spatial':
+            doc = self.pool.get(_require_file(params))
+            try:
+                return query_spatial_index(self.spatial_index(doc), params)
+            except (KeyError, ValueError, TypeError) as e:
+                raise WorkerError(f"Invalid spatial query: {e}")
+        if method == 'tiles':
+            doc = self.pool.get(_require_file(params))
+            try:
+                return query_tiles(self.tile_pyramid(doc, params), params)
+            except (KeyError, ValueError, TypeError) as e:
+                raise WorkerError(f"Invalid tile request: {e}")
+        if method == 'layouts':
+            doc = self.pool.get(_require_file(params))
+            return layout_catalog(doc, compute_extents=bool(params.get('compute_extents')))
+        if method == 'layout':
+            doc = self.pool.get(_require_file(params))
+            name = params.get('name')
+            if not isinstance(name, str):
+                raise WorkerError("Missing 'name' parameter")
+            try:
+                return self.layout_tree(doc, name, params.get('config'))
+            except KeyError as e:
+                raise WorkerError(str(e.args[0]))
+        if method == 'delta':
+            return self.delta(_require_file(params), params.get('config'))
+        if method == 'thumbnail':
+            try:
+                png, cached = cached_thumbnail(_require_file(params), params, self.cache, self.pool.get)
+            except (ValueError, TypeError) as e:
+                raise WorkerError(f"Invalid thumbnail request: {e}")
+            return {'png': base64.b64encode(png).decode('ascii'), 'cached': cached}
+        if method == 'query':
+            return _query(self.pool, params)
+        if method == 'close':
+            filepath = _require_file(params)
+            realpath = os.path.realpath(filepath)
+            for key in [key for key in self.incremental if key[0] == realpath]:
+                del self.incremental[key]
+            return self.pool.discard(filepath)
+        if method == 'stats':
+            return self.pool.stats()
+        if method == 'shutdown':
+            self.running = False
+            return True
+        raise WorkerError(f"Unknown method {method!r}")
+
+    def serve(self, instream, outstream) -> None:
+        """Process frames until end of input or a shutdown request"""
+        while self.running:
+            payload = read_frame(instream)
+            if payload is None:
+                break
+
+            request_id = None
+            result_json = None
+            with metrics.collect() as collected:
+                try:
+                    request = json.loads(payload)
+                    request_id = request.get('id')
+                    method = request.get('method', '')
+                    result = self.handle(method, request.get('params') or {})
+                    response = {'id': request_id, 'ok': True}
+                    if collected.spans:
+                        # Encoded here so the record includes its serialization
+                        with metrics.span('serialize'):
+                            result_json = json.dumps(result, cls=DXFEncoder)
+                        response['metrics'] = collected.record(method=method)
+                    else:
+                        response['result'] = result
+                except Exception as e:
+                    sys.stderr.write(f'[PYTHON] Worker request {request_id} failed: {e}\n')
+                    response = {'id': request_id, 'ok': False, 'error': str(e)}
+            write_frame(outstream, response, result_json)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve DXF parse/render requests over stdin/stdout')
+    parser.add_argument('--pool-size', type=int, default=4,
+                        help='Maximum number of DXF documents kept in memory')
+    args = parser.parse_args(argv)
+
+    # stdout carries the framed protocol, route any stray prints to stderr
+    instream = sys.stdin.buffer
+    outstream = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    sys.stderr.write(f'[PYTHON] DXF worker ready (pool size {args.pool_size})\n')
+    startup.first_output('worker ready')
+    Worker(DocumentPool(args.pool_size)).serve(instream, outstream)
+    sys.stderr.write('[PYTHON] DXF worker exiting\n')
+
+if __name__ == '__main__':
+    main()
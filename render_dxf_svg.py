@@ -2,109 +2,79 @@
 """
 Minimal DXF to SVG renderer using ezdxf
 """
+import os
 import sys
 import json
 import argparse
-from ezdxf.addons.drawing.config import Configuration
+import contextlib
 
-try:
-    import ezdxf
-    from ezdxf.addons.drawing import RenderContext, Frontend
-    from ezdxf.addons.drawing.svg import SVGBackend
-except ImportError:
-    sys.stderr.write('ezdxf is required. Install via pip install ezdxf\n')
-    sys.exit(1)
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
 
-def render_svg(filepath, config_str=None):
+from dxf import metrics, startup
+from dxf.cache import open_cache
+
+class Tee:
+    """Binary stream writing to several streams"""
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, data):
+        for stream in self.streams:
+            stream.write(data)
+        return len(data)
+
+def render_svg(filepath, config_str=None, cache=None, profile=False):
     """Render DXF file to SVG with configuration"""
     try:
-        # Read the DXF file
-        doc = ezdxf.readfile(filepath)
-        msp = doc.modelspace()
-        
-        # Default to component-based rendering (wireframe)
-        use_drawing_addon = False
-        
         # Load renderer configuration
-        if config_str:
+        try:
+            config = json.loads(config_str) if config_str else None
+        except Exception as e:
+            sys.stderr.write(f"Error loading config JSON: {e}\n")
+            sys.exit(1)
+
+        # A cache hit streams the stored SVG and never imports ezdxf
+        cache_key = None
+        if cache:
             try:
-                # Print available Configuration parameters for debugging
-                import inspect
-                config_params = inspect.signature(Configuration.__init__).parameters
-                sys.stderr.write(f"Available configuration parameters: {list(config_params.keys())[1:]}\n")
-                
-                # Load configuration from JSON
-                config_dict = json.loads(config_str)
-                sys.stderr.write(f"Attempting to load config with: {config_dict}\n")
-                
-                # Check if we should use the Drawing add-on
-                if 'use_drawing_addon' in config_dict and config_dict['use_drawing_addon']:
-                    use_drawing_addon = True
-                    # Remove our custom parameter before passing to Configuration
-                    del config_dict['use_drawing_addon']
-                    
-                # Create configuration object
-                cfg = Configuration(**config_dict)
-            except Exception as e:
-                sys.stderr.write(f"Error loading config JSON: {e}\n")
-                sys.exit(1)
-        else:
-            # Use defaults with fill set to none for wireframe look
-            cfg = Configuration()
-            # Ensure all entities render as wireframes by default
-            cfg.fill_policy = "NONE"
-            cfg.lwpolyline_fill = False
-            cfg.polyline_fill = False
-            cfg.hatch_policy = "OUTLINE"  # Only show hatch outlines
+                cache_key = cache.key(filepath, 'render', config)
+                if cache.stream_to(cache_key, sys.stdout.buffer):
+                    sys.stderr.write("Served SVG from cache\n")
+                    startup.first_output('cached result')
+                    return
+            except OSError as e:
+                sys.stderr.write(f"Warning: Cache lookup failed: {e}\n")
+                cache_key = None
 
-        # Create rendering context
-        ctx = RenderContext(doc)
-        
-        # Create SVG backend
-        backend = SVGBackend()
-        
-        # Set up renderer with configuration
-        # Create Frontend directly with backend and config, without passing layout properties
-        # This is needed for compatibility with newer ezdxf versions
-        frontend = Frontend(ctx, backend, config=cfg)
-        
-        # Render the model space
-        frontend.draw_layout(msp)
-        
-        # Get Page class
         try:
-            from ezdxf.addons.drawing.layout import Page
+            import ezdxf
+            from dxf.renderer import render_root, write_svg
         except ImportError:
-            from ezdxf.addons.drawing import layout
-            Page = layout.Page
-        
-        # Create a page with auto-detected dimensions
-        page = Page(0, 0)
-        
-        # Get the SVG as a string
-        svg = backend.get_string(page)
-        
-        # Add metadata about which renderer mode was used
-        svg = svg.replace('<svg ', f'<svg data-renderer-mode="{("ezdxf" if use_drawing_addon else "component")}" ')
-        
-        # If not using Drawing add-on, modify SVG for wireframe rendering
-        if not use_drawing_addon:
-            # Brute force approach: Force SVG to use wireframe mode by directly modifying SVG XML
-            # Replace any fill declarations with none
-            svg = svg.replace('fill="#', 'fill="none" data-original-fill="#')
-            svg = svg.replace('fill="rgb', 'fill="none" data-original-fill="rgb')
-            
-            # Handle single quotes too
-            svg = svg.replace("fill='#", "fill='none' data-original-fill='#")
-            svg = svg.replace("fill='rgb", "fill='none' data-original-fill='rgb")
-            
-            # Force fill-opacity to 0
-            svg = svg.replace('fill-opacity="', 'fill-opacity="0" data-original-opacity="')
-            svg = svg.replace("fill-opacity='", "fill-opacity='0' data-original-opacity='")
-        
-        # Output the SVG to stdout
-        sys.stdout.write(svg)
-        
+            sys.stderr.write('ezdxf is required. Install via pip install ezdxf\n')
+            sys.exit(1)
+
+        # Read the DXF file
+        with metrics.span('readfile'):
+            doc = ezdxf.readfile(filepath)
+
+        root = render_root(doc, config)
+        if profile:
+            # Memory snapshot while the element tree is alive
+            from dxf import profiling
+            profiling.checkpoint()
+
+        # The SVG is serialized straight to stdout, and to the cache entry
+        # at the same time, without building the document string
+        startup.first_output()
+        sys.stdout.flush()
+        if cache_key:
+            with cache.writer(cache_key) as cached:
+                write_svg(root, Tee(sys.stdout.buffer, cached))
+        else:
+            write_svg(root, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+
     except Exception as e:
         sys.stderr.write(f"Error: {e}\n")
         sys.exit(1)
@@ -117,7 +87,29 @@ if __name__ == '__main__':
         help='Renderer configuration as JSON string',
         default=None,
     )
+    parser.add_argument(
+        '--cache-dir',
+        help='Result cache directory (default: $RAPIDTAKEOFF_CACHE_DIR, caching is off if unset)',
+        default=None,
+    )
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the result cache')
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=True,
+        metavar='BASE',
+        help='Profile the run with cProfile and tracemalloc, implies --no-cache. Writes BASE.prof, '
+             'BASE.tracemalloc and BASE.profile.txt, by default next to the DXF file as <name>.render.*',
+    )
     args = parser.parse_args()
-    
+
+    cache = None if args.no_cache or args.profile else open_cache(args.cache_dir)
+    profile = contextlib.nullcontext()
+    if args.profile:
+        from dxf.profiling import profile_base, profiled
+        profile = profiled(args.profile if isinstance(args.profile, str) else profile_base(args.file, 'render'))
+
     # Pass config JSON to renderer
-    render_svg(args.file, args.config)
\ No newline at end of file
+    with metrics.collect() as collected, profile:
+        render_svg(args.file, args.config, cache, profile=bool(args.profile))
+    metrics.emit(collected.record(script='render_dxf_svg.py'))
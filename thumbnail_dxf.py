@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+DXF thumbnails: renders a directory or glob of DXF files to small PNGs on a
+process pool, cached by file hash. See python/dxf/thumbnail.py.
+"""
+import os
+import sys
+
+# Make the python/dxf package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from dxf.thumbnail import main
+
+if __name__ == '__main__':
+    main()
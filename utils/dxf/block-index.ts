@@ -0,0 +1,57 @@
+import { BlockIndex, BlockIndexEntry } from '../../components/types';
+
+/**
+ * Find the INSERTs of a block whose attributes match all given tag/value
+ * pairs. With no filter or a single one this is a plain lookup; several
+ * filters intersect the handle lists, starting with the smallest
+ */
+export function findInserts(
+  index: BlockIndex,
+  blockName: string,
+  filters: { [tag: string]: string } = {}
+): BlockIndexEntry {
+  const empty: BlockIndexEntry = { count: 0, handles: [], inserts: [] };
+  const block = index[blockName];
+  if (!block) {
+    return empty;
+  }
+
+  const entries: BlockIndexEntry[] = [];
+  for (const [tag, value] of Object.entries(filters)) {
+    const entry = block.attributes[tag]?.[value];
+    if (!entry) {
+      return empty;
+    }
+    entries.push(entry);
+  }
+
+  if (entries.length === 0) {
+    return block;
+  }
+  if (entries.length === 1) {
+    return entries[0];
+  }
+
+  entries.sort((a, b) => a.count - b.count);
+  const others = entries.slice(1).map(entry => new Set(entry.handles));
+  const result: BlockIndexEntry = { count: 0, handles: [], inserts: [] };
+  entries[0].handles.forEach((handle, i) => {
+    if (others.every(handles => handles.has(handle))) {
+      result.handles.push(handle);
+      result.inserts.push(entries[0].inserts[i]);
+      result.count++;
+    }
+  });
+  return result;
+}
+
+/**
+ * Number of INSERTs of a block matching all given attribute values
+ */
+export function countInserts(
+  index: BlockIndex,
+  blockName: string,
+  filters: { [tag: string]: string } = {}
+): number {
+  return findInserts(index, blockName, filters).count;
+}
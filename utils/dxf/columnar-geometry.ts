@@ -0,0 +1,73 @@
+import fs from 'fs';
+
+/**
+ * Layout of one array inside the columnar geometry file
+ */
+export interface ColumnarArrayLayout {
+  dtype: 'float64' | 'float32' | 'uint64' | 'uint32' | 'uint8';
+  offset: number;
+  shape: number[];
+}
+
+/**
+ * JSON header written by parse_dxf.py --format columnar
+ * (see python/dxf/columnar.py for the section and array names)
+ */
+export interface ColumnarHeader {
+  format: 'rapidtakeoff-columnar';
+  version: number;
+  path: string;
+  byte_length: number;
+  layers: string[];
+  sections: {
+    [entityType: string]: {
+      count: number;
+      arrays: { [name: string]: ColumnarArrayLayout };
+    };
+  };
+  entities: any[];
+}
+
+export type ColumnarArray = Float64Array | Float32Array | BigUint64Array | Uint32Array | Uint8Array;
+
+export interface ColumnarGeometry {
+  header: ColumnarHeader;
+  sections: {
+    [entityType: string]: { count: number; arrays: { [name: string]: ColumnarArray } };
+  };
+}
+
+const TYPED_ARRAYS = {
+  float64: Float64Array,
+  float32: Float32Array,
+  uint64: BigUint64Array,
+  uint32: Uint32Array,
+  uint8: Uint8Array,
+};
+
+/**
+ * Load a columnar geometry file and expose every array as a typed array view
+ * over the file contents; the arrays are 8-byte aligned so no copy is made
+ */
+export function loadColumnarGeometry(header: ColumnarHeader): ColumnarGeometry {
+  if (header.format !== 'rapidtakeoff-columnar') {
+    throw new Error(`Unsupported geometry format: ${header.format}`);
+  }
+  
+  const file = fs.readFileSync(header.path);
+  // Node may hand out pooled buffers at unaligned offsets, copy only then
+  const bytes = file.byteOffset % 8 === 0 ? file : Uint8Array.prototype.slice.call(file);
+  
+  const sections: ColumnarGeometry['sections'] = {};
+  for (const [entityType, section] of Object.entries(header.sections)) {
+    const arrays: { [name: string]: ColumnarArray } = {};
+    for (const [name, layout] of Object.entries(section.arrays)) {
+      const TypedArray = TYPED_ARRAYS[layout.dtype];
+      const length = layout.shape.reduce((a, b) => a * b, 1);
+      arrays[name] = new TypedArray(bytes.buffer, bytes.byteOffset + layout.offset, length);
+    }
+    sections[entityType] = { count: section.count, arrays };
+  }
+  
+  return { header, sections };
+}
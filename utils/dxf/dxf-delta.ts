@@ -0,0 +1,73 @@
+import type { DxfDelta, Entity } from '../../components/types';
+
+/**
+ * Apply a delta from the incremental parser to a layer-grouped entity tree.
+ * Only the layers touched by the delta are copied, every other layer keeps
+ * its array so unchanged parts of the UI do not re-render. Modified entities
+ * keep their position; an entity that moved to another layer is removed
+ * from the old one and appended to the new one
+ */
+export function applyDxfDelta(
+  tree: Record<string, Entity[]>,
+  delta: DxfDelta
+): Record<string, Entity[]> {
+  const result = { ...tree };
+  const copied = new Set<string>();
+  const layerOf = (layer: string): Entity[] => {
+    if (!copied.has(layer)) {
+      result[layer] = result[layer] ? [...result[layer]] : [];
+      copied.add(layer);
+    }
+    return result[layer];
+  };
+
+  // Position of every entity by handle, built lazily for the layers we touch
+  const positions = new Map<string, [string, number]>();
+  const indexed = new Set<string>();
+  const find = (handle: string, layer: string | null | undefined): [string, number] | undefined => {
+    const layers = layer && result[layer] ? [layer] : Object.keys(result);
+    for (const name of layers) {
+      if (!indexed.has(name)) {
+        result[name].forEach((entity, i) => {
+          if (entity.handle) positions.set(entity.handle, [name, i]);
+        });
+        indexed.add(name);
+      }
+    }
+    return positions.get(handle);
+  };
+
+  const removed = new Map<string, Set<string>>();
+  const remove = (handle: string, layer: string | null | undefined) => {
+    const position = find(handle, layer);
+    if (!position) return;
+    if (!removed.has(position[0])) removed.set(position[0], new Set());
+    removed.get(position[0])!.add(handle);
+  };
+
+  for (const { handle, layer } of delta.removed) {
+    remove(handle, layer);
+  }
+  for (const entity of delta.modified) {
+    const position = find(entity.handle!, entity.layer) ?? find(entity.handle!, null);
+    if (position && position[0] === entity.layer) {
+      layerOf(position[0])[position[1]] = entity;
+    } else {
+      if (position) remove(entity.handle!, position[0]);
+      layerOf(entity.layer!).push(entity);
+    }
+  }
+  for (const entity of delta.added) {
+    layerOf(entity.layer!).push(entity);
+  }
+
+  removed.forEach((handles, layer) => {
+    const remaining = layerOf(layer).filter(entity => !entity.handle || !handles.has(entity.handle));
+    if (remaining.length) {
+      result[layer] = remaining;
+    } else {
+      delete result[layer];
+    }
+  });
+  return result;
+}
@@ -1,5 +1,9 @@
 import path from 'path';
-import { executePythonScript } from './python-executor';
+import { executePythonScript, executePythonScriptStreaming } from './python-executor';
+import { getPythonWorker } from './python-worker';
+import { buildSvgConfig } from './svg-renderer';
+import { ColumnarGeometry, loadColumnarGeometry } from './columnar-geometry';
+import type { BlockIndex, SpatialQuery, SpatialQueryResult, TakeoffResult, TileRequest, TileResponse, DxfDelta, ThumbnailRequest, ThumbnailResponse, LayoutInfo, LayoutTree, DxfFilter } from '../../components/types';
 
 // Cache for running DXF parse operations
 const parseOperations = new Map<string, Promise<string>>();
@@ -22,18 +26,26 @@ export async function parseDxfTree(
   
   const parseScript = path.join(process.cwd(), 'parse_dxf.py');
   
-  const parsePromise = executePythonScript(parseScript, [filePath], config)
-    .then(out => {
-      try {
-        // Validate the output is valid JSON
-        console.log(`Validating JSON output (${out.length} bytes)`);
-        JSON.parse(out);
-        console.log('Successfully parsed DXF data as JSON');
-        return out;
-      } catch (e) {
-        console.error('Failed to parse output as JSON:', e);
-        throw new Error(`Failed to parse DXF output as JSON: ${e.message}`);
-      }
+  // Prefer the resident worker, which keeps ezdxf imported and the document
+  // loaded between calls; fall back to a one-shot script run if it fails
+  const parsePromise = getPythonWorker()
+    .request('parse', { file: filePath, config })
+    .then(tree => JSON.stringify(tree))
+    .catch(workerError => {
+      console.error(`DXF worker parse failed, falling back to script: ${workerError}`);
+      return executePythonScript(parseScript, [filePath], config)
+        .then(out => {
+          try {
+            // Validate the output is valid JSON
+            console.log(`Validating JSON output (${out.length} bytes)`);
+            JSON.parse(out);
+            console.log('Successfully parsed DXF data as JSON');
+            return out;
+          } catch (e) {
+            console.error('Failed to parse output as JSON:', e);
+            throw new Error(`Failed to parse DXF output as JSON: ${e.message}`);
+          }
+        });
     })
     .finally(() => {
       // Remove from operations map when done
@@ -44,4 +56,162 @@ export async function parseDxfTree(
   parseOperations.set(operationKey, parsePromise);
   
   return parsePromise;
-}
\ No newline at end of file
+}
+/**
+ * Parse a DXF file and render it to SVG in one pass, so the document is
+ * read once and both outputs share a single ezdxf RenderContext
+ */
+export async function openDxf(
+  filePath: string, 
+  config: any = null,
+  parallel: boolean = false
+): Promise<{ tree: string; svg: string }> {
+  console.log(`Opening DXF file (tree + SVG): ${filePath}`);
+  
+  const result = await getPythonWorker().request('open', {
+    file: filePath,
+    config,
+    svg_config: buildSvgConfig(config),
+    parallel
+  });
+  
+  return { tree: JSON.stringify(result.tree), svg: result.svg };
+}
+
+/**
+ * Parse a DXF file in streaming mode. onRecord receives the NDJSON records
+ * written by parse_dxf.py --stream (start, batch, progress, end) while the
+ * parse is still running, so entities can be drawn before it finishes.
+ * lowMemory reads entities one at a time for very large files; the start
+ * record's total is then null
+ */
+export function streamDxfTree(
+  filePath: string, 
+  onRecord: (record: any) => void,
+  config: any = null,
+  lowMemory: boolean = false
+): Promise<void> {
+  console.log(`Streaming DXF tree for file: ${filePath}`);
+  
+  const parseScript = path.join(process.cwd(), 'parse_dxf.py');
+  const args = lowMemory ? [filePath, '--stream', '--low-memory'] : [filePath, '--stream'];
+  return executePythonScriptStreaming(parseScript, args, onRecord, config);
+}
+
+/**
+ * Parse a DXF file into columnar binary geometry. Only a small JSON header
+ * crosses stdout; coordinates are read from the file as typed arrays
+ */
+export async function parseDxfColumnar(
+  filePath: string, 
+  config: any = null,
+  float32: boolean = false
+): Promise<ColumnarGeometry> {
+  console.log(`Parsing DXF to columnar geometry: ${filePath}`);
+  
+  const parseScript = path.join(process.cwd(), 'parse_dxf.py');
+  const args = [filePath, '--format', 'columnar'];
+  if (float32) args.push('--float32');
+  
+  const out = await executePythonScript(parseScript, args, config);
+  return loadColumnarGeometry(JSON.parse(out));
+}
+
+/**
+ * Compute length/area/count takeoff aggregates for a DXF file in the
+ * resident Python worker. A config with a DxfFilter measures only the
+ * selected layers, entity types and blocks
+ */
+export function takeoffDxf(
+  filePath: string, 
+  expandBlocks: boolean = true, 
+  config: { filter?: DxfFilter } | null = null
+): Promise<TakeoffResult> {
+  console.log(`Computing takeoff for DXF file: ${filePath}`);
+  return getPythonWorker().request('takeoff', { file: filePath, expand_blocks: expandBlocks, config });
+}
+
+/**
+ * Index the INSERTs of a DXF file by block name, attribute tag and value
+ * in the resident Python worker
+ */
+export function indexDxfBlocks(
+  filePath: string, 
+  config: any = null
+): Promise<BlockIndex> {
+  console.log(`Indexing blocks of DXF file: ${filePath}`);
+  return getPythonWorker().request('block_index', { file: filePath, config });
+}
+
+/**
+ * Query the spatial index of a DXF file for viewport culling, selection
+ * or region takeoff. The index is built in the resident Python worker on
+ * first use and kept while the document stays loaded
+ */
+export function queryDxfSpatial(
+  filePath: string, 
+  query: SpatialQuery
+): Promise<SpatialQueryResult> {
+  return getPythonWorker().request('spatial', { file: filePath, ...query });
+}
+
+/**
+ * Fetch level-of-detail tiles for a viewport. Geometry is simplified to
+ * the pixel size of the zoom level and tiny entities collapse into dots,
+ * so zoomed-out views draw a bounded number of vertices
+ */
+export function getDxfTiles(
+  filePath: string, 
+  request: TileRequest
+): Promise<TileResponse> {
+  return getPythonWorker().request('tiles', { file: filePath, ...request });
+}
+
+/**
+ * Render a small PNG preview of a sheet from simplified geometry. Results
+ * are cached by file hash, so reopening a sheet browser does not load the files
+ */
+export function getDxfThumbnail(
+  filePath: string, 
+  request: ThumbnailRequest = {}
+): Promise<ThumbnailResponse> {
+  return getPythonWorker().request('thumbnail', { file: filePath, ...request });
+}
+
+/**
+ * List the modelspace and paperspace layouts of a DXF file with their
+ * entity counts and stored extents, without parsing any entity. Pass
+ * computeExtents to fill in extents the file does not store, which costs
+ * about as much as a parse
+ */
+export function getDxfLayouts(
+  filePath: string, 
+  computeExtents: boolean = false
+): Promise<LayoutInfo[]> {
+  return getPythonWorker().request('layouts', { file: filePath, compute_extents: computeExtents });
+}
+
+/**
+ * Parse one layout of a DXF file on demand. The worker keeps each parsed
+ * layout while the document stays loaded, so switching sheets back is free
+ */
+export function parseDxfLayout(
+  filePath: string, 
+  name: string, 
+  config: any = null
+): Promise<LayoutTree> {
+  console.log(`Parsing layout ${name} of DXF file: ${filePath}`);
+  return getPythonWorker().request('layout', { file: filePath, name, config });
+}
+
+/**
+ * Entities added, modified and removed since the previous call for the same
+ * file and config. Only changed entities are parsed again; the first call
+ * returns every entity as added. Apply the result with applyDxfDelta()
+ */
+export function parseDxfDelta(
+  filePath: string, 
+  config: any = null
+): Promise<DxfDelta> {
+  return getPythonWorker().request('delta', { file: filePath, config });
+}
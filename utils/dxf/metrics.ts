@@ -0,0 +1,71 @@
+import type { DxfMetrics } from '../../components/types';
+
+/**
+ * Prefix of the metrics line on stderr, matches PREFIX in python/dxf/metrics.py
+ */
+export const METRICS_PREFIX = '[PYTHON] Metrics: ';
+
+type MetricsListener = (metrics: DxfMetrics) => void;
+
+const listeners = new Set<MetricsListener>();
+
+/**
+ * Metrics records in the stderr output of a Python script
+ */
+export function extractMetrics(stderr: string): DxfMetrics[] {
+  const records: DxfMetrics[] = [];
+  for (const line of stderr.split('\n')) {
+    if (!line.startsWith(METRICS_PREFIX)) continue;
+    try {
+      records.push(JSON.parse(line.slice(METRICS_PREFIX.length)));
+    } catch (e) {
+      console.error(`Failed to decode metrics record: ${e.message}`);
+    }
+  }
+  return records;
+}
+
+/**
+ * One-line summary of a metrics record: total time, the slowest spans and
+ * the entity, unsupported and error counts
+ */
+export function formatMetrics(metrics: DxfMetrics, topSpans: number = 5): string {
+  const source = metrics.script || metrics.method || 'dxf';
+  const file = metrics.file ? ` ${metrics.file.replace(/^.*[\\/]/, '')}` : '';
+  const spans = Object.entries(metrics.spans)
+    .sort((a, b) => b[1].seconds - a[1].seconds)
+    .slice(0, topSpans)
+    .map(([name, span]) => `${name} ${(span.seconds * 1000).toFixed(0)} ms`);
+  const sum = (counts?: Record<string, number>) =>
+    Object.values(counts || {}).reduce((total, n) => total + n, 0);
+  return `${source}${file}: ${(metrics.seconds * 1000).toFixed(0)} ms` +
+    (spans.length ? ` (${spans.join(', ')})` : '') +
+    `, ${sum(metrics.counts.entities)} entities, ${sum(metrics.counts.unsupported)} unsupported, ` +
+    `${sum(metrics.counts.errors)} errors`;
+}
+
+/**
+ * Subscribe to every metrics record reported in this process. Returns a
+ * function that removes the listener
+ */
+export function onDxfMetrics(listener: MetricsListener): () => void {
+  listeners.add(listener);
+  return () => {
+    listeners.delete(listener);
+  };
+}
+
+/**
+ * Log a metrics record and pass it to the listeners
+ */
+export function reportDxfMetrics(metrics: DxfMetrics, file?: string): void {
+  const record = file && !metrics.file ? { ...metrics, file } : metrics;
+  console.log(`[METRICS] ${formatMetrics(record)}`);
+  for (const listener of listeners) {
+    try {
+      listener(record);
+    } catch (e) {
+      console.error(`Metrics listener failed: ${e.message}`);
+    }
+  }
+}
@@ -1,11 +1,29 @@
 import { spawn, spawnSync } from 'child_process';
 import path from 'path';
 import fs from 'fs';
+import { extractMetrics, reportDxfMetrics } from './metrics';
 
 /**
- * Find a valid Python executable with ezdxf installed
+ * Target for the time from spawning a script to its first output, matches
+ * DEFAULT_BUDGET_MS in python/dxf/startup.py
+ */
+export const STARTUP_BUDGET_MS = 1000;
+
+// Verified interpreter, probed once per process
+let cachedPythonExecutable: string | null = null;
+
+// Checks that ezdxf is installed without importing it and prints the implementation
+const PYTHON_PROBE =
+  'import importlib.util, platform; ' +
+  'print(platform.python_implementation() if importlib.util.find_spec("ezdxf") else "")';
+
+/**
+ * Find a valid Python executable with ezdxf installed. The first verified
+ * executable is cached for the lifetime of the process
  */
 export function findPythonExecutable(): string | null {
+  if (cachedPythonExecutable) return cachedPythonExecutable;
+  
   // List of possible Python executable locations to try
   const candidates: string[] = [];
   const venvPy = path.join(__dirname, '.venv', 'bin', 'python3');
@@ -22,15 +40,11 @@ export function findPythonExecutable(): string | null {
   // Try each candidate
   for (const cmd of candidates) {
     try {
-      // Check if ezdxf is available with this Python
-      const check = spawnSync(cmd, ['-c', 'import ezdxf'], { stdio: 'ignore' });
-      if (check.status !== 0) continue;
-      
-      // Verify it's CPython (not PyPy or other variant)
-      const impl = spawnSync(cmd, ['-c', 'import platform; print(platform.python_implementation())'], 
-                          { stdio: ['ignore', 'pipe', 'ignore'] });
-      if (impl.status === 0 && impl.stdout.toString().trim() === 'CPython') {
+      // One probe per candidate: ezdxf is available and it's CPython (not PyPy or other variant)
+      const probe = spawnSync(cmd, ['-c', PYTHON_PROBE], { stdio: ['ignore', 'pipe', 'ignore'] });
+      if (probe.status === 0 && probe.stdout.toString().trim() === 'CPython') {
         console.log(`Found valid Python executable: ${cmd}`);
+        cachedPythonExecutable = cmd;
         return cmd;
       }
     } catch (e) {
@@ -42,6 +56,18 @@ export function findPythonExecutable(): string | null {
   return candidates.find(Boolean) || null;
 }
 
+/**
+ * Log the time from spawning a script to its first output against the startup budget
+ */
+function logFirstOutput(scriptPath: string, started: number): void {
+  const elapsed = Date.now() - started;
+  const script = path.basename(scriptPath);
+  console.log(`${script} time to first output: ${elapsed} ms (budget ${STARTUP_BUDGET_MS} ms)`);
+  if (elapsed > STARTUP_BUDGET_MS) {
+    console.warn(`${script} exceeded the startup budget by ${elapsed - STARTUP_BUDGET_MS} ms`);
+  }
+}
+
 /**
  * Execute a Python script with the given arguments
  */
@@ -69,9 +95,11 @@ export function executePythonScript(
   
   return new Promise((resolve, reject) => {
     let out = '', err = '';
+    const started = Date.now();
     const proc = spawn(pythonCmd, [scriptPath, ...scriptArgs]);
     
     proc.stdout.on('data', d => {
+      if (!out) logFirstOutput(scriptPath, started);
       const chunk = d.toString();
       out += chunk;
     });
@@ -84,6 +112,7 @@ export function executePythonScript(
     
     proc.on('close', code => {
       console.log(`Python process exited with code: ${code}`);
+      extractMetrics(err).forEach(metrics => reportDxfMetrics(metrics, args[0]));
       
       if (code === 0) {
         resolve(out);
@@ -98,4 +127,74 @@ export function executePythonScript(
       reject(`Failed to start Python process: ${err.message}`);
     });
   });
-}
\ No newline at end of file
+}
+/**
+ * Execute a Python script that writes newline-delimited JSON, invoking
+ * onRecord for each record as soon as its line is complete
+ */
+export function executePythonScriptStreaming(
+  scriptPath: string, 
+  args: string[], 
+  onRecord: (record: any) => void,
+  config: any = null
+): Promise<void> {
+  console.log(`Executing streaming Python script: ${scriptPath}`);
+  
+  const pythonCmd = findPythonExecutable();
+  if (!pythonCmd) {
+    console.error('No Python executable found with ezdxf module');
+    return Promise.reject('Python executable not found. Please make sure Python 3 with ezdxf is installed.');
+  }
+  
+  const scriptArgs = [...args];
+  if (config) {
+    scriptArgs.push('--config', JSON.stringify(config));
+  }
+  
+  return new Promise((resolve, reject) => {
+    // Only the incomplete trailing line is kept between chunks
+    let partial = '', err = '', received = false;
+    const started = Date.now();
+    const proc = spawn(pythonCmd, [scriptPath, ...scriptArgs]);
+    proc.stdout.setEncoding('utf8');
+    
+    proc.stdout.on('data', (chunk: string) => {
+      if (!received) {
+        received = true;
+        logFirstOutput(scriptPath, started);
+      }
+      const lines = (partial + chunk).split('\n');
+      partial = lines.pop() ?? '';
+      for (const line of lines) {
+        if (!line) continue;
+        try {
+          onRecord(JSON.parse(line));
+        } catch (e) {
+          console.error(`Failed to handle streamed record: ${e.message}`);
+        }
+      }
+    });
+    
+    proc.stderr.on('data', d => {
+      const errorMsg = d.toString();
+      err += errorMsg;
+      console.error(`Python error: ${errorMsg}`);
+    });
+    
+    proc.on('close', code => {
+      console.log(`Python process exited with code: ${code}`);
+      extractMetrics(err).forEach(metrics => reportDxfMetrics(metrics, args[0]));
+      
+      if (code === 0) {
+        resolve();
+      } else {
+        reject(err || `Python script exited with code ${code}`);
+      }
+    });
+    
+    proc.on('error', (err) => {
+      console.error(`Failed to start Python process: ${err.message}`);
+      reject(`Failed to start Python process: ${err.message}`);
+    });
+  });
+}
@@ -0,0 +1,145 @@
+import { spawn, ChildProcess } from 'child_process';
+import path from 'path';
+import { findPythonExecutable } from './python-executor';
+import { reportDxfMetrics } from './metrics';
+
+interface PendingRequest {
+  resolve: (value: any) => void;
+  reject: (reason: any) => void;
+  file?: string;
+}
+
+/**
+ * Client for the resident Python DXF worker (dxf_worker.py).
+ *
+ * Messages are framed as a 4-byte big-endian length followed by UTF-8 JSON,
+ * see python/dxf/worker.py for the protocol.
+ */
+export class PythonWorker {
+  private proc: ChildProcess | null = null;
+  private buffer: Buffer = Buffer.alloc(0);
+  private nextId = 1;
+  private pending = new Map<number, PendingRequest>();
+
+  constructor(
+    private scriptPath: string = path.join(process.cwd(), 'dxf_worker.py'),
+    private poolSize: number = 4
+  ) {}
+
+  /**
+   * Start the worker process if it is not running yet
+   */
+  start(): void {
+    if (this.proc) return;
+
+    const pythonCmd = findPythonExecutable();
+    if (!pythonCmd) {
+      throw new Error('Python executable not found. Please make sure Python 3 with ezdxf is installed.');
+    }
+
+    console.log(`Starting DXF worker: ${pythonCmd} ${this.scriptPath}`);
+    const proc = spawn(pythonCmd, [this.scriptPath, '--pool-size', String(this.poolSize)]);
+    this.proc = proc;
+
+    proc.stdout.on('data', (chunk: Buffer) => this.onData(chunk));
+
+    proc.stderr.on('data', d => {
+      console.error(`DXF worker: ${d.toString()}`);
+    });
+
+    proc.on('close', code => {
+      console.log(`DXF worker exited with code: ${code}`);
+      this.failPending(`DXF worker exited with code ${code}`);
+    });
+
+    proc.on('error', err => {
+      console.error(`Failed to start DXF worker: ${err.message}`);
+      this.failPending(`Failed to start DXF worker: ${err.message}`);
+    });
+  }
+
+  /**
+   * Send a request to the worker and resolve with its result
+   */
+  request(method: string, params: Record<string, any> = {}): Promise<any> {
+    try {
+      this.start();
+    } catch (e) {
+      return Promise.reject(e.message);
+    }
+
+    const id = this.nextId++;
+    const payload = Buffer.from(JSON.stringify({ id, method, params }), 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(payload.length, 0);
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, file: params.file });
+      this.proc!.stdin.write(Buffer.concat([header, payload]));
+    });
+  }
+
+  /**
+   * Ask the worker to exit
+   */
+  stop(): void {
+    if (!this.proc) return;
+    this.request('shutdown').catch(() => undefined);
+    this.proc.stdin.end();
+  }
+
+  private onData(chunk: Buffer): void {
+    this.buffer = Buffer.concat([this.buffer, chunk]);
+
+    // Consume every complete frame in the buffer
+    while (this.buffer.length >= 4) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + length) break;
+
+      const payload = this.buffer.subarray(4, 4 + length).toString('utf8');
+      this.buffer = this.buffer.subarray(4 + length);
+
+      let response: any;
+      try {
+        response = JSON.parse(payload);
+      } catch (e) {
+        console.error('Failed to decode DXF worker response:', e);
+        continue;
+      }
+
+      const request = this.pending.get(response.id);
+      if (!request) continue;
+      this.pending.delete(response.id);
+
+      if (response.metrics) {
+        reportDxfMetrics(response.metrics, request.file);
+      }
+      if (response.ok) {
+        request.resolve(response.result);
+      } else {
+        request.reject(response.error);
+      }
+    }
+  }
+
+  private failPending(reason: string): void {
+    this.proc = null;
+    this.buffer = Buffer.alloc(0);
+    for (const request of this.pending.values()) {
+      request.reject(reason);
+    }
+    this.pending.clear();
+  }
+}
+
+let sharedWorker: PythonWorker | null = null;
+
+/**
+ * Get the process-wide DXF worker, created on first use
+ */
+export function getPythonWorker(): PythonWorker {
+  if (!sharedWorker) {
+    sharedWorker = new PythonWorker();
+  }
+  return sharedWorker;
+}
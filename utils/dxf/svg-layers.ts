@@ -0,0 +1,44 @@
+import type { LayerVisibility, SvgLayer } from '../../components/types';
+
+/**
+ * Id of the group of a layer in SVG from render_dxf_svg.py, mirrors
+ * layer_id() in python/dxf/renderer.py
+ */
+export function svgLayerId(layerName: string): string {
+  let escaped = '';
+  for (const c of layerName.toLowerCase()) {
+    escaped += /^[a-z0-9-]$/.test(c) ? c : `_${c.codePointAt(0)!.toString(16)}_`;
+  }
+  return `layer-${escaped}`;
+}
+
+/**
+ * Layer groups of a rendered SVG with their layer table state
+ */
+export function getSvgLayers(svg: ParentNode): SvgLayer[] {
+  return Array.from(svg.querySelectorAll<SVGGElement>('g[data-layer]')).map(group => ({
+    id: group.id,
+    name: group.getAttribute('data-layer')!,
+    color: group.getAttribute('data-color'),
+    on: group.getAttribute('data-on') !== 'false',
+    frozen: group.getAttribute('data-frozen') === 'true',
+    locked: group.getAttribute('data-locked') === 'true',
+    visible: group.getAttribute('display') !== 'none'
+  }));
+}
+
+/**
+ * Show or hide the layer groups of a rendered SVG in place, without
+ * rendering again. Layers missing from the visibility map keep their state
+ */
+export function applySvgLayerVisibility(svg: ParentNode, visibility: LayerVisibility): void {
+  svg.querySelectorAll<SVGGElement>('g[data-layer]').forEach(group => {
+    const visible = visibility[group.getAttribute('data-layer')!];
+    if (visible === undefined) return;
+    if (visible) {
+      group.removeAttribute('display');
+    } else {
+      group.setAttribute('display', 'none');
+    }
+  });
+}
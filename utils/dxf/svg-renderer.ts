@@ -1,25 +1,14 @@
 import path from 'path';
 import { executePythonScript } from './python-executor';
+import { getPythonWorker } from './python-worker';
 
 // Cache for running SVG render operations
 const renderOperations = new Map<string, Promise<string>>();
 
 /**
- * Render a DXF file to SVG format
+ * Derive the render_dxf_svg.py configuration from the unified renderer config
  */
-export async function renderDxfToSvg(
-  filePath: string, 
-  config: any = null
-): Promise<string> {
-  console.log(`Rendering SVG for DXF file: ${filePath}`);
-  
-  // Check if we're already rendering this file with same config
-  const operationKey = `${filePath}-${JSON.stringify(config)}`;
-  if (renderOperations.has(operationKey)) {
-    console.log(`Already rendering this file with same config, returning existing promise`);
-    return renderOperations.get(operationKey)!;
-  }
-  
+export function buildSvgConfig(config: any = null): any {
   // Custom configuration - extract SVG parameters if it exists
   let effectiveConfig = config;
   if (config && typeof config === 'object') {
@@ -78,9 +67,35 @@ export async function renderDxfToSvg(
     }
   }
   
+  return effectiveConfig;
+}
+
+/**
+ * Render a DXF file to SVG format
+ */
+export async function renderDxfToSvg(
+  filePath: string, 
+  config: any = null
+): Promise<string> {
+  console.log(`Rendering SVG for DXF file: ${filePath}`);
+  
+  // Check if we're already rendering this file with same config
+  const operationKey = `${filePath}-${JSON.stringify(config)}`;
+  if (renderOperations.has(operationKey)) {
+    console.log(`Already rendering this file with same config, returning existing promise`);
+    return renderOperations.get(operationKey)!;
+  }
+  
+  const effectiveConfig = buildSvgConfig(config);
+  
   const renderScript = path.join(process.cwd(), 'render_dxf_svg.py');
   
-  const renderPromise = executePythonScript(renderScript, [filePath], effectiveConfig)
+  const renderPromise = getPythonWorker()
+    .request('render', { file: filePath, config: effectiveConfig })
+    .catch(workerError => {
+      console.error(`DXF worker render failed, falling back to script: ${workerError}`);
+      return executePythonScript(renderScript, [filePath], effectiveConfig);
+    })
     .finally(() => {
       // Remove from operations map when done
       renderOperations.delete(operationKey);